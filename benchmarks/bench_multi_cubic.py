@@ -0,0 +1,115 @@
+"""
+Compare the fused single-pass `fqs.multi_cubic` against the original
+mask-and-scatter implementation on batches mixing all root cases.
+
+Run from the repository root:
+
+    python benchmarks/bench_multi_cubic.py
+"""
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from equations import fqs  # noqa: E402
+
+SIZES = [10**3, 10**4, 10**5, 10**6]
+REPEAT = 5
+
+
+def masked_multi_cubic(a0, b0, c0, d0):
+    """Original `multi_cubic`: boolean masks, gathers and scatters"""
+    a, b, c = b0 / a0, c0 / a0, d0 / a0
+
+    third = 1./3.
+    a13 = a*third
+    a2 = a13*a13
+    sqr3 = math.sqrt(3)
+
+    f = third*b - a2
+    g = a13 * (2*a2 - b) + c
+    h = 0.25*g*g + f*f*f
+
+    m1 = (f == 0) & (g == 0) & (h == 0)
+    m2 = (~m1) & (h <= 0)
+    m3 = (~m1) & (~m2)
+
+    def cubic_root(x):
+        root = np.zeros_like(x)
+        positive = (x >= 0)
+        negative = ~positive
+        root[positive] = x[positive]**third
+        root[negative] = -(-x[negative])**third
+        return root
+
+    def roots_all_real_equal(c):
+        r1 = -cubic_root(c)
+        return r1, r1, r1
+
+    def roots_all_real_distinct(a13, f, g):
+        j = np.sqrt(-f)
+        k = np.arccos(-0.5*g / (j*j*j))
+        m = np.cos(third*k)
+        n = sqr3 * np.sin(third*k)
+        return 2*j*m - a13, -j * (m + n) - a13, -j * (m - n) - a13
+
+    def roots_one_real(a13, g, h):
+        sqrt_h = np.sqrt(h)
+        S = cubic_root(-0.5*g + sqrt_h)
+        U = cubic_root(-0.5*g - sqrt_h)
+        SPU = S + U
+        SMU = S - U
+        r1 = SPU - a13
+        r2 = -0.5*SPU - a13 + SMU*sqr3*0.5j
+        r3 = -0.5*SPU - a13 - SMU*sqr3*0.5j
+        return r1, r2, r3
+
+    roots = np.zeros((3, len(a))).astype(complex)
+    roots[:, m1] = roots_all_real_equal(c[m1])
+    roots[:, m2] = roots_all_real_distinct(a13[m2], f[m2], g[m2])
+    roots[:, m3] = roots_one_real(a13[m3], g[m3], h[m3])
+    return roots
+
+
+def mixed_batch(n: int, rng: np.random.Generator) -> np.ndarray:
+    """Random cubics (about half with three real roots) plus some triple
+    and double roots"""
+    p = rng.standard_normal((n, 4))
+    triple = rng.standard_normal(n // 10)
+    p[:n // 10] = np.stack([np.ones_like(triple), -3*triple,
+                            3*triple**2, -triple**3], axis=1)
+    return p
+
+
+def best_time(func, *args, **kwargs) -> float:
+    func(*args, **kwargs)
+    best = math.inf
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>10} {'masked [s]':>12} {'fused [s]':>12} "
+          f"{'fused+ws [s]':>13} {'speed-up':>9}")
+    for n in SIZES:
+        p = mixed_batch(n, rng).T
+        workspace = fqs.Workspace(n)
+        out = np.empty((3, n), dtype=complex)
+
+        masked = best_time(masked_multi_cubic, *p)
+        fused = best_time(fqs.multi_cubic, *p)
+        reused = best_time(fqs.multi_cubic, *p, out=out, workspace=workspace)
+        print(f"{n:>10} {masked:>12.6f} {fused:>12.6f} {reused:>13.6f} "
+              f"{masked / fused:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Compare the latency of parsing a single equation with the single-pass
+`terms.parse` scanner, cold and cached, against the original per-degree
+regex parsers and the generic regex term parser.
+
+Run from the repository root:
+
+    python benchmarks/bench_parse.py
+"""
+import functools
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from equations import terms  # noqa: E402
+
+REPEAT = 20000
+ROUNDS = 7
+
+EQUATIONS = {
+    2: "3x² - 12x + 40",
+    3: "2x³+3x²-11x-6",
+    4: "x⁴-3x³+2x²-x+5",
+}
+
+COEFF = re.compile(r"[+-]?\d*")
+DEGREE_TERMS = {
+    2: re.compile(r"([+-]?\d*(x?)(²?))"),
+    3: re.compile(r"([+-]?\d*(x?)([²³]?))"),
+    4: re.compile(r"([+-]?\d*(x?)([²³⁴]?))"),
+}
+TERM = re.compile(r"([+-]?)(\d+\.?\d*(?:e[+-]?\d+)?|\.\d+)?"
+                  r"(x(?:([⁰¹²³⁴⁵⁶⁷⁸⁹]+)|\^(\d+))?)?")
+DIGITS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹", "0123456789")
+
+
+def numify(num: str):
+    """Original `terms.numify`"""
+    if num == "-":
+        return -1
+    if num == "":
+        return 1
+    value = float(num)
+    if value % 1 == 0:
+        return int(num) if num.lstrip("+-").isdigit() else int(value)
+    return value
+
+
+def degree_regex(equation: str, degree: int):
+    """Original `quadratic_coefficients` etc.: a `findall` for the terms,
+    then one per coefficient"""
+    found = DEGREE_TERMS[degree].findall(equation.replace(" ", ""))
+    return tuple(numify(COEFF.findall(term[0])[0])
+                 for term in found[:degree + 1])
+
+
+def term_regex(equation: str):
+    """Previous generic `terms.coefficients`: one regex match per term"""
+    equation = equation.replace(" ", "")
+    powers = {}
+    position = 0
+    while position < len(equation):
+        match = TERM.match(equation, position)
+        sign, coeff, x, superscript_power, caret_power = match.groups()
+        position = match.end()
+        if not x:
+            power = 0
+        elif superscript_power:
+            power = int(superscript_power.translate(DIGITS))
+        else:
+            power = int(caret_power or 1)
+        value = numify(coeff or "")
+        powers[power] = powers.get(power, 0) + (-value if sign == "-"
+                                                else value)
+    return tuple(powers.get(n, 0) for n in range(max(powers), -1, -1))
+
+
+def latency(func, equation: str) -> float:
+    """Median over `ROUNDS` of the mean time per call, in microseconds"""
+    rounds = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            func(equation)
+        rounds.append((time.perf_counter() - start) / REPEAT)
+    return statistics.median(rounds) * 1e6
+
+
+def main():
+    names = ["degree regex", "term regex", "scan", "scan cached"]
+    print(f"{'degree':>6} " + " ".join(f"{name + ' [us]':>17}"
+                                       for name in names))
+    for degree, equation in EQUATIONS.items():
+        parsers = {
+            "degree regex": functools.partial(degree_regex, degree=degree),
+            "term regex": term_regex,
+            "scan": terms.parse.__wrapped__,
+            "scan cached": terms.parse,
+        }
+        expected = terms.parse(equation)
+        for name, func in parsers.items():
+            assert func(equation) == expected, (name, equation)
+        print(f"{degree:>6} " + " ".join(
+            f"{latency(func, equation):>17.2f}" for func in parsers.values()))
+
+
+if __name__ == "__main__":
+    main()
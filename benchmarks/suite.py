@@ -0,0 +1,279 @@
+"""
+Benchmark suite for the solvers, parsers and formatters, with JSON output
+and comparison against a stored baseline.
+
+Cases are named `group/.../size` paths, e.g.
+`roots/quartic/complex/float64/multi/10000`:
+
+- roots: `single_*` in a Python loop, `multi_*`, the `cubic_roots` and
+  `quartic_roots` backends and `np.roots` in a loop, for batches of
+  polynomials whose roots are all real, repeated or complex pairs, in
+  double and single precision
+- parse: `terms.parse` (uncached) in a loop and `ingest.parse_lines`
+- format: `str` of `Polynomial` objects (cached and not) and
+  `render.format_rows`
+
+Every case reports its best time over `--repeat` runs after a warm-up run
+(which also compiles jitted kernels), the time per item, and the peak of
+the Python and numpy memory allocated by one more traced run.
+
+Run from the repository root, e.g. saving a baseline and later comparing:
+
+    python benchmarks/suite.py --sizes 1,100,10000,1000000 -o base.json
+    python benchmarks/suite.py --sizes 1,100,10000,1000000 --baseline \
+base.json
+
+Exits with status 1 if any case is more than `--threshold` slower than in
+the baseline.
+
+`benchmarks/baseline.json` is the reference report of the current code,
+made on the machine described by its `meta` entry with
+
+    python benchmarks/suite.py --sizes 1,100,10000 --repeat 7 \
+-o benchmarks/baseline.json
+
+and regenerated with the same command by changes that are meant to change
+performance. Timings only compare on the same machine: elsewhere, first
+write a baseline of the reference commit, then compare the change against
+it, allowing for noise on shared machines, e.g. `--threshold 0.25`.
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import re
+import sys
+import time
+import tracemalloc
+
+import numba
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from equations import fqs, ingest, render, terms  # noqa: E402
+from equations.equations import Polynomial, _render  # noqa: E402
+
+SIZES = [1, 100, 10**4, 10**6]
+REPEAT = 3
+THRESHOLD = 0.10
+
+# Largest batches solved or parsed one polynomial at a time in Python
+LOOP_LIMIT = 10**4
+
+MIXES = ("real", "repeated", "complex")
+DTYPES = ("float64", "float32")
+
+
+def polynomials(degree: int, mix: str, n: int,
+                rng: np.random.Generator) -> np.ndarray:
+    """
+    (n, degree + 1) monic coefficients of polynomials with known roots
+    ---
+    - @param mix: str - [`real`: distinct real roots, `repeated`: a double
+      (and for quartics also a triple) root, `complex`: complex pairs,
+      with one real root for cubics]
+    """
+    roots = rng.uniform(-10, 10, (n, degree)).astype(complex)
+    if mix == "repeated":
+        roots[:, 1] = roots[:, 0]
+        if degree == 4:
+            roots[:, 2] = roots[:, 0]
+    elif mix == "complex":
+        for k in range(0, degree - 1, 2):
+            pair = roots[:, k] + 1j * rng.uniform(0.5, 10, n)
+            roots[:, k], roots[:, k + 1] = pair, pair.conjugate()
+
+    coeffs = np.zeros((n, degree + 1), dtype=complex)
+    coeffs[:, 0] = 1
+    for k in range(degree):
+        coeffs[:, 1:] = coeffs[:, 1:] - roots[:, k:k + 1] * coeffs[:, :-1]
+    return coeffs.real.copy()
+
+
+def equation_lines(n: int, rng: np.random.Generator) -> list[str]:
+    """`n` quartic equations with integer coefficients"""
+    coeffs = rng.integers(-50, 50, (n, 5))
+    coeffs[:, 0] = rng.integers(1, 50, n)
+    return ["%dx⁴%+dx³%+dx²%+dx%+d" % tuple(row) for row in coeffs.tolist()]
+
+
+def measure(func, repeat: int) -> dict:
+    """Best time of `func` over `repeat` runs after a warm-up run, and the
+    peak memory traced during one more run"""
+    func()
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def root_cases(sizes: list[int], rng: np.random.Generator):
+    """(name, items, function) of the root solver cases"""
+    for degree, kind in ((3, "cubic"), (4, "quartic")):
+        single = getattr(fqs, f"single_{kind}")
+        multi = getattr(fqs, f"multi_{kind}")
+        roots = getattr(fqs, f"{kind}_roots")
+        for mix in MIXES:
+            for dtype in DTYPES:
+                for n in sizes:
+                    p = polynomials(degree, mix, n, rng).astype(dtype)
+                    name = f"roots/{kind}/{mix}/{dtype}"
+                    if n <= LOOP_LIMIT:
+                        # Python floats would call the double precision
+                        # kernel, single precision rows stay numpy scalars
+                        rows = (p.tolist() if dtype == "float64"
+                                else [tuple(row) for row in p])
+                        yield (f"{name}/single_loop/{n}", n,
+                               lambda s=single, r=rows: [s(*row) for row in r])
+                        if dtype == "float64":
+                            yield (f"{name}/np.roots/{n}", n,
+                                   lambda q=p: [np.roots(row) for row in q])
+                    yield (f"{name}/multi/{n}", n,
+                           lambda m=multi, q=p.T: m(*q))
+                    for backend in fqs.BACKENDS:
+                        yield (f"{name}/{backend}/{n}", n,
+                               lambda f=roots, q=p, b=backend:
+                               f(q, backend=b, dtype=q.dtype))
+
+
+def parse_cases(sizes: list[int], rng: np.random.Generator):
+    """(name, items, function) of the parsing cases"""
+    for n in sizes:
+        lines = equation_lines(n, rng)
+        data = ("\n".join(lines) + "\n").encode()
+        if n <= LOOP_LIMIT:
+            yield (f"parse/terms.parse/{n}", n,
+                   lambda ls=lines: list(map(terms.parse.__wrapped__, ls)))
+        yield (f"parse/parse_lines/{n}", n,
+               lambda d=data: ingest.parse_lines(d))
+
+
+def format_cases(sizes: list[int], rng: np.random.Generator):
+    """(name, items, function) of the formatting cases"""
+    for n in sizes:
+        coeffs = rng.integers(-50, 50, (n, 5))
+        if n <= LOOP_LIMIT:
+            polys = [Polynomial(*row) for row in coeffs.tolist()]
+            yield (f"format/str/{n}", n, lambda q=polys: list(map(str, q)))
+            yield (f"format/str_uncached/{n}", n,
+                   lambda q=polys: list(map(_render.__wrapped__, q)))
+        yield (f"format/format_rows/{n}", n,
+               lambda c=coeffs: render.format_rows(c))
+        yield (f"format/format_rows_float/{n}", n,
+               lambda c=rng.standard_normal((n, 5)): render.format_rows(c))
+
+
+GROUPS = {
+    "roots": root_cases,
+    "parse": parse_cases,
+    "format": format_cases,
+}
+
+
+def metadata() -> dict:
+    return {
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "numba": numba.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "threads": numba.get_num_threads(),
+    }
+
+
+def run(sizes: list[int], repeat: int, pattern: str | None) -> dict:
+    """Runs the cases whose names match `pattern`, printing progress"""
+    rng = np.random.default_rng(0)
+    selected = re.compile(pattern) if pattern else None
+    results = {}
+    for cases in GROUPS.values():
+        for name, items, func in cases(sizes, rng):
+            if selected and not selected.search(name):
+                continue
+            result = measure(func, repeat)
+            result["items"] = items
+            result["ns_per_item"] = result["seconds"] / items * 1e9
+            results[name] = result
+            print(f"{name:<52} {result['ns_per_item']:>12.1f} ns/item "
+                  f"{result['peak_bytes'] / 2**20:>10.2f} MiB",
+                  file=sys.stderr)
+    return {"meta": metadata(), "results": results}
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Prints the ratio of every case's time to its baseline, returns the
+    names of the cases slower than the baseline by more than `threshold`
+    """
+    regressions = []
+    print(f"{'case':<52} {'baseline':>12} {'now':>12} {'ratio':>7}")
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = result["seconds"] / base["seconds"]
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<52} {base['ns_per_item']:>9.1f} ns "
+              f"{result['ns_per_item']:>9.1f} ns {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0],
+        epilog="Case groups: " + ", ".join(GROUPS))
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help="comma-separated batch sizes, up to 10^8 "
+                             "(default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=REPEAT,
+                        help="timed runs per case (default: %(default)s)")
+    parser.add_argument("--filter", help="regular expression selecting "
+                                         "case names, e.g. '^parse/'")
+    parser.add_argument("-o", "--output", help="write the JSON report here "
+                                               "(default: stdout)")
+    parser.add_argument("--baseline", help="JSON report to compare with")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="slowdown flagged as a regression "
+                             "(default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(float(size)) for size in args.sizes.split(",")]
+    report = run(sizes, args.repeat, args.filter)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    elif not args.baseline:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions above "
+                  f"{args.threshold:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
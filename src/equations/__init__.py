@@ -3,12 +3,35 @@ __all__ = [
     "terms",
 
     # equations
-    "Cubic",
+    "Linear",
     "Quadratic",
+    "Cubic",
+    "Quartic",
     "Equation",
+    "Polynomial",
+    "PolynomialBatch",
     "number",
+    "product",
     "real",
+
+    # evaluation
+    "evaluate",
+
+    # ingestion and rendering
+    "format_rows",
+    "parse_lines",
+    "write_rows",
+
+    # classification
+    "RootType",
+    "classify",
+    "count_real_roots",
 ]
 
 from . import terms
-from .equations import Cubic, Equation, Quadratic, number, real
+from .classify import RootType, classify, count_real_roots
+from .equations import (Cubic, Equation, Linear, Polynomial, PolynomialBatch,
+                        Quadratic, Quartic, number, product, real)
+from .horner import evaluate
+from .ingest import parse_lines
+from .render import format_rows, write_rows
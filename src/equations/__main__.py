@@ -0,0 +1,390 @@
+"""
+Command line interface, solving streams of polynomials of degree up to 4
+
+    python -m equations solve equations.txt -o roots.csv
+    python -m equations solve --from jsonl --to bin < rows.jsonl > roots.bin
+
+Input rows are equations (`x²-3x+2`) or coefficients, highest power first:
+
+- text: one equation per line
+- csv: coefficients (`1,-3,2`) or a single equation cell per row
+- jsonl: a list of coefficients, an equation string, or an object with
+  `coefficients` or `equation` per line
+- bin: native float64 rows of `--width` coefficients
+
+Roots are written one row per input row as csv (`re,im` pairs of 4 roots,
+padded with `nan`), jsonl (`{"degree": n, "roots": [[re, im], ...]}` with
+`null` for parts that are not finite) or bin (native complex128 rows of 4
+roots, padded with `nan`).
+
+Reading and parsing, solving, and writing run on separate threads joined
+by bounded queues of `--chunk-rows` rows, so that I/O overlaps the solver.
+
+Run from `src`, or with `src` on the path:
+
+    cd src && python -m equations solve --help
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import queue
+import sys
+import threading
+from itertools import islice
+
+import numpy as np
+
+from . import solvers
+from .ingest import WIDTH, parse_lines
+from .terms import parse
+
+FORMATS = ("text", "csv", "jsonl", "bin")
+EXTENSIONS = {
+    ".txt": "text",
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".bin": "bin",
+    ".f64": "bin",
+}
+
+# Rows read, solved and written at a time
+CHUNK_ROWS = 1 << 16
+
+# Chunks waiting between two threads of the pipeline
+QUEUE_SIZE = 4
+
+# jsonl rows of roots by degree, for finite roots (`repr` is valid JSON)
+_JSON_ROOTS = ['{"degree": %d, "roots": [' % n + ", ".join(["[%r, %r]"] * n)
+               + "]}" for n in range(WIDTH)]
+
+_DONE = object()
+
+
+class _Failure:
+    """Exception raised in a pipeline thread, passed on to the next"""
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def _format_of(path: str, default: str) -> str:
+    """Format named by the extension of `path`, `default` if none"""
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower(), default)
+
+
+def _line_error(line: str) -> str:
+    """Why an equation line could not be parsed"""
+    try:
+        coeffs = parse(line)
+    except ValueError as error:
+        return str(error)
+    return f"Degree {len(coeffs) - 1} above {WIDTH - 1} in {line!r}"
+
+
+def _coefficient_rows(items: list, first: int) -> np.ndarray:
+    """
+    (M, 5) coefficients, padded with leading zeros, from rows of numbers
+    or equation strings
+    ---
+    - @param items: list - [sequences of numbers or number strings, or
+      equation strings]
+    - @param first: int - [row number of the first item, for errors]
+    """
+    widths = {len(item) for item in items if not isinstance(item, str)}
+    if len(widths) == 1 and len(items) and not isinstance(items[0], str):
+        try:
+            rows = np.array(items, dtype=np.float64)
+        except ValueError:
+            pass
+        else:
+            if rows.ndim == 2 and 0 < rows.shape[1] <= WIDTH:
+                coeffs = np.zeros((len(items), WIDTH))
+                coeffs[:, WIDTH - rows.shape[1]:] = rows
+                return coeffs
+
+    coeffs = np.zeros((len(items), WIDTH))
+    for i, item in enumerate(items):
+        try:
+            values = (parse(item) if isinstance(item, str)
+                      else list(map(float, item)))
+            if not values or len(values) > WIDTH:
+                raise ValueError(f"Expected 1 to {WIDTH} coefficients, got "
+                                 f"{len(values)}")
+        except (TypeError, ValueError) as error:
+            raise ValueError(f"Row {first + i}: {error}") from None
+        coeffs[i, WIDTH - len(values):] = values
+    return coeffs
+
+
+def _csv_item(row: list[str]) -> list[str] | str:
+    """A csv row as coefficient strings, or its single equation cell"""
+    if len(row) == 1:
+        try:
+            float(row[0])
+        except ValueError:
+            return row[0]
+    return row
+
+
+def _json_item(line: bytes):
+    """A jsonl line as coefficients or an equation string"""
+    item = json.loads(line)
+    if isinstance(item, dict):
+        item = item.get("coefficients", item.get("equation"))
+    if not isinstance(item, (list, str)):
+        raise ValueError(f"Expected coefficients or an equation, got "
+                         f"{line.decode().strip()!r}")
+    return item
+
+
+def read_chunks(file, fmt: str, chunk_rows: int = CHUNK_ROWS,
+                width: int = WIDTH):
+    """
+    Reads (M, 5) float64 coefficient chunks from a binary stream
+    ---
+    - @param file: file object - [open binary stream]
+    - @param fmt: str - [one of `FORMATS`]
+    - @param chunk_rows: int - [rows per chunk]
+    - @param width: int - [coefficients per row of `bin` input]
+    """
+    row = 1
+    if fmt == "text":
+        while lines := list(islice(file, chunk_rows)):
+            coeffs, degree = parse_lines(b"".join(lines), errors="coerce")
+            failed = np.flatnonzero(degree < 0)
+            if failed.size:
+                i = failed[0]
+                line = lines[i].decode().rstrip("\r\n")
+                raise ValueError(f"Line {row + i}: {_line_error(line)}")
+            yield coeffs
+            row += len(lines)
+
+    elif fmt == "csv":
+        reader = csv.reader(io.TextIOWrapper(file, encoding="utf-8",
+                                             newline=""))
+        while rows := list(islice(reader, chunk_rows)):
+            yield _coefficient_rows(list(map(_csv_item, rows)), row)
+            row += len(rows)
+
+    elif fmt == "jsonl":
+        while lines := list(islice(file, chunk_rows)):
+            try:
+                items = list(map(_json_item, lines))
+            except ValueError:
+                for i, line in enumerate(lines):
+                    try:
+                        _json_item(line)
+                    except ValueError as error:
+                        raise ValueError(f"Line {row + i}: {error}") \
+                            from None
+            yield _coefficient_rows(items, row)
+            row += len(lines)
+
+    elif fmt == "bin":
+        if not 0 < width <= WIDTH:
+            raise ValueError(f"Expected a width of 1 to {WIDTH}, got {width}")
+        size = chunk_rows * width * 8
+        while data := file.read(size):
+            if len(data) % (width * 8):
+                raise ValueError(f"Expected whole rows of {width} float64, "
+                                 f"got {len(data)} bytes after row {row}")
+            rows = np.frombuffer(data, dtype=np.float64).reshape(-1, width)
+            coeffs = np.zeros((rows.shape[0], WIDTH))
+            coeffs[:, WIDTH - width:] = rows
+            yield coeffs
+            row += rows.shape[0]
+
+    else:
+        raise ValueError(f"Expected a format in {FORMATS}, got {fmt!r}")
+
+
+def _json_roots(degree: int, pairs: list[float]) -> str:
+    """
+    jsonl row of the first `degree` roots of a row, as strict JSON with
+    `null` for parts that are not finite
+    """
+    parts = [x if math.isfinite(x) else None for x in pairs[:2 * degree]]
+    return json.dumps({"degree": degree,
+                       "roots": [parts[k:k + 2] for k in range(0, len(parts),
+                                                               2)]},
+                      allow_nan=False)
+
+
+def format_roots(roots: np.ndarray, degree: np.ndarray, fmt: str) -> bytes:
+    """
+    Encodes solved roots, one row per polynomial
+    ---
+    - @param roots: ndarray - [(M, 4) complex roots padded with `nan`]
+    - @param degree: ndarray - [(M,) degree of each row]
+    - @param fmt: str - [`csv`, `jsonl` or `bin`]
+    """
+    if fmt == "bin":
+        return np.ascontiguousarray(roots, dtype=np.complex128).tobytes()
+
+    pairs = np.ascontiguousarray(roots, dtype=np.complex128) \
+        .view(np.float64).tolist()
+    if fmt == "csv":
+        lines = map(",".join, (map(repr, row) for row in pairs))
+    elif fmt == "jsonl":
+        finite = np.isfinite(roots) | (np.arange(roots.shape[1])
+                                       >= degree[:, np.newaxis])
+        lines = (_JSON_ROOTS[n] % tuple(row[:2 * n]) if ok else
+                 _json_roots(n, row)
+                 for n, row, ok in zip(degree.tolist(), pairs,
+                                       finite.all(axis=1).tolist()))
+    else:
+        raise ValueError(f"Expected csv, jsonl or bin output, got {fmt!r}")
+    return ("\n".join(lines) + "\n").encode() if pairs else b""
+
+
+def _put(channel: queue.Queue, item, stop: threading.Event) -> bool:
+    """Puts `item` unless the pipeline stopped, whether it was put"""
+    while not stop.is_set():
+        try:
+            channel.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _drain(channel: queue.Queue):
+    """Items of `channel` up to its end, raising passed on failures"""
+    while (item := channel.get()) is not _DONE:
+        if isinstance(item, _Failure):
+            raise item.error
+        yield item
+
+
+def _stage(items, function, channel: queue.Queue,
+           stop: threading.Event) -> None:
+    """Thread body putting `function` of every item into `channel`"""
+    try:
+        for item in items:
+            if not _put(channel, function(item), stop):
+                return
+    except BaseException as error:
+        _put(channel, _Failure(error), stop)
+    else:
+        _put(channel, _DONE, stop)
+
+
+def pipeline(chunks, solve, write, queue_size: int = QUEUE_SIZE) -> None:
+    """
+    Solves and writes chunks on three threads: reading and parsing, solving,
+    and writing (the calling thread), joined by bounded queues
+    ---
+    - @param chunks: iterable - [coefficient chunks, produced lazily]
+    - @param solve: callable - [chunk to result]
+    - @param write: callable - [consumes a result]
+    - @param queue_size: int - [chunks waiting between two threads]
+    """
+    parsed = queue.Queue(queue_size)
+    solved = queue.Queue(queue_size)
+    stop = threading.Event()
+
+    threads = [
+        threading.Thread(target=_stage, args=(chunks, lambda c: c, parsed,
+                                              stop), daemon=True),
+        threading.Thread(target=_stage, args=(_drain(parsed), solve, solved,
+                                              stop), daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for result in _drain(solved):
+            write(result)
+    finally:
+        stop.set()
+
+
+def _inputs(paths: list[str], fmt: str, chunk_rows: int, width: int):
+    """Coefficient chunks of every input in turn, `-` for stdin"""
+    for path in paths:
+        if path == "-":
+            yield from read_chunks(sys.stdin.buffer, fmt or "text",
+                                   chunk_rows, width)
+        else:
+            with open(path, "rb") as file:
+                yield from read_chunks(file, fmt or _format_of(path, "text"),
+                                       chunk_rows, width)
+
+
+def solve_command(args: argparse.Namespace) -> None:
+    """Runs `python -m equations solve`"""
+    source = args.inputs[0] if len(args.inputs) == 1 else ""
+    in_fmt = args.input_format or _format_of(source, "text")
+    out_fmt = args.output_format or (
+        _format_of(args.output, "") if args.output != "-" else "") or (
+        in_fmt if in_fmt != "text" else "csv")
+    if out_fmt == "text":
+        raise ValueError("Roots can be written as csv, jsonl or bin")
+
+    chunks = _inputs(args.inputs, args.input_format, args.chunk_rows,
+                     args.width)
+
+    def solve(coeffs: np.ndarray) -> bytes:
+        roots, degree = solvers.solve_batch(coeffs, workers=args.workers)
+        return format_roots(roots, degree, out_fmt)
+
+    if args.output == "-":
+        pipeline(chunks, solve, sys.stdout.buffer.write, args.queue_size)
+        sys.stdout.buffer.flush()
+    else:
+        with open(args.output, "wb") as file:
+            pipeline(chunks, solve, file.write, args.queue_size)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Entry point of `python -m equations`"""
+    parser = argparse.ArgumentParser(
+        prog="python -m equations",
+        description="Solve polynomial equations of degree up to 4.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    solve = commands.add_parser(
+        "solve", help="solve rows of equations or coefficients",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    solve.add_argument("inputs", nargs="*", default=["-"],
+                       help="input files, - for stdin (default)")
+    solve.add_argument("-o", "--output", default="-",
+                       help="output file, - for stdout (default)")
+    solve.add_argument("--from", dest="input_format", choices=FORMATS,
+                       help="input format, by default from the extension "
+                            "or text")
+    solve.add_argument("--to", dest="output_format", choices=FORMATS[1:],
+                       help="output format, by default from the extension, "
+                            "the input format or csv")
+    solve.add_argument("--width", type=int, default=WIDTH,
+                       help="coefficients per row of bin input "
+                            "(default: %(default)s)")
+    solve.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS,
+                       help="rows per chunk (default: %(default)s)")
+    solve.add_argument("--queue-size", type=int, default=QUEUE_SIZE,
+                       help="chunks buffered between threads "
+                            "(default: %(default)s)")
+    solve.add_argument("--workers", type=int,
+                       help="solve on this many processes")
+
+    args = parser.parse_args(argv)
+    try:
+        solve_command(args)
+    except BrokenPipeError:
+        # Output closed early, e.g. piped to `head`, silence the final flush
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (OSError, ValueError) as error:
+        parser.exit(1, f"{parser.prog}: error: {error}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Batched Aberth-Ehrlich solver for polynomials of any degree, used where
+`fqs` has no closed form (degree > 4).
+"""
+
+import cmath
+import math
+import numpy as np
+from numba import jit, prange
+
+
+# Default relative size of the last correction at which a root is accepted
+TOLERANCE = 1e-14
+
+# Default cap on the number of Aberth sweeps per polynomial
+MAX_ITER = 100
+
+# Machine epsilon, a root is also accepted once its polynomial value is
+# within the rounding error of Horner's scheme
+_EPS = np.finfo(np.float64).eps
+
+
+@jit('(float64[:], complex128)', nopython=True, cache=True,
+     error_model='numpy')
+def monic_horner(a, z):
+    ''' Value and derivative at `z` of the polynomial with coefficients
+    `a`, taking the leading coefficient as one, and ``sum |a_k| |z|^k``,
+    which scales the rounding error of the value.
+    '''
+    f = 1. + 0j
+    df = 0j
+    r = abs(z)
+    bound = 1.
+    for k in range(1, a.shape[0]):
+        df = df*z + f
+        f = f*z + a[k]
+        bound = bound*r + abs(a[k])
+    return f, df, bound
+
+
+# Compiled on first call rather than at import, and cached on disk
+@jit(nopython=True, parallel=True, cache=True, error_model='numpy')
+def batch_aberth(p, roots, tol, max_iter, iterations, converged):
+    ''' Aberth-Ehrlich iteration for multiple polynomials of the same degree,
+    parallelised over polynomials.
+
+    All roots of a polynomial are refined simultaneously, each correction
+    using the already updated positions of the other roots (Gauss-Seidel
+    order). Roots start evenly spaced on a circle, slightly rotated off the
+    real axis, of radius ``max|a_k/a_0|^(1/k)``. Every root modulus is at
+    most twice this radius (Fujiwara's bound).
+
+    Parameters
+    ----------
+    p: ndarray
+        Coefficients of the polynomials, of size ``(M, N+1)``, with non-zero
+        leading coefficients.
+
+    roots: ndarray
+        Output array of size ``(M, N)``.
+
+    tol: float
+        A root is accepted once its correction is below `tol` relative to
+        its modulus, or once its polynomial value is within the rounding
+        error of evaluating it, beyond which corrections are noise.
+
+    max_iter: int
+        Maximum number of sweeps over the roots of a polynomial.
+
+    iterations, converged: ndarray
+        Output arrays of size ``(M,)``: sweeps taken and whether every root
+        was accepted within `max_iter` sweeps.
+    '''
+    n = p.shape[1] - 1
+    for i in prange(p.shape[0]):
+        a = p[i] / p[i, 0]
+
+        radius = 0.
+        for k in range(1, n + 1):
+            radius = max(radius, abs(a[k])**(1. / k))
+
+        if radius == 0:
+            roots[i, :] = 0
+            iterations[i] = 0
+            converged[i] = True
+            continue
+
+        for k in range(n):
+            roots[i, k] = radius * cmath.exp(1j*(2*math.pi*k + 0.4) / n)
+
+        done = np.zeros(n, dtype=np.bool_)
+        n_done = 0
+        it = 0
+        while n_done < n and it < max_iter:
+            it += 1
+            for k in range(n):
+                if done[k]:
+                    continue
+                z = roots[i, k]
+                f, df, bound = monic_horner(a, z)
+                if abs(f) <= _EPS * bound:
+                    done[k] = True
+                    n_done += 1
+                    continue
+
+                # Sum of 1 / (z - z_j), as conj(d) / |d|^2 which is cheaper
+                # than complex division
+                s_re = 0.
+                s_im = 0.
+                for j in range(n):
+                    if j != k:
+                        d = z - roots[i, j]
+                        d_re = d.real
+                        d_im = d.imag
+                        scale = 1. / (d_re*d_re + d_im*d_im)
+                        s_re += d_re * scale
+                        s_im -= d_im * scale
+                s = complex(s_re, s_im)
+
+                denom = df - f*s
+                if denom == 0:
+                    continue
+                w = f / denom
+                z = z - w
+                roots[i, k] = z
+
+                if abs(w) <= tol * abs(z) or abs(w) <= tol * tol * radius:
+                    done[k] = True
+                    n_done += 1
+
+        iterations[i] = it
+        converged[i] = n_done == n
+
+
+def aberth_roots(p, tol=TOLERANCE, max_iter=MAX_ITER):
+    '''
+    Roots of multiple polynomials of the same, arbitrary degree by the
+    Aberth-Ehrlich method, jitted and parallelised over polynomials.
+
+    Parameters
+    ----------
+    p: array_like
+        Input data are coefficients of the polynomials of degree N::
+
+            p[:,0]*x^N + p[:,1]*x^(N-1) + ... + p[:,N] = 0
+
+        Should be a 2D array of size ``(M, N+1)``, where ``M`` is the number
+        of polynomials, with non-zero leading coefficients ``p[:,0]``. A 1D
+        array is treated as a single polynomial.
+
+    tol: float, optional
+        Relative size of the last correction at which a root is accepted,
+        roots whose polynomial value is within rounding error are accepted
+        regardless.
+
+    max_iter: int, optional
+        Maximum number of sweeps per polynomial.
+
+    Returns
+    -------
+    roots: ndarray
+        An array of size ``(M, N)`` containing the complex roots.
+
+    iterations: ndarray
+        Number of sweeps taken for every polynomial, of size ``(M,)``.
+
+    converged: ndarray
+        Boolean array of size ``(M,)``, `False` where some root was not
+        accepted within `max_iter` sweeps.
+
+    Examples
+    --------
+    >>> roots, iterations, converged = aberth_roots([1, 0, 0, 0, 0, -1])
+    >>> np.sort_complex(roots[0])
+    array([-0.80901699-0.58778525j, -0.80901699+0.58778525j,
+            0.30901699-0.95105652j,  0.30901699+0.95105652j,
+            1.        +0.j        ])
+    '''
+    p = np.asarray(p, dtype=np.float64)
+    if p.ndim < 2:
+        p = p[np.newaxis, :]
+    if p.shape[1] < 2:
+        raise ValueError('Expected at least 2 coefficients, '
+                         'got {:d}.'.format(p.shape[1]))
+    if not np.all(p[:, 0]):
+        raise ValueError('Leading coefficients must be non-zero.')
+
+    m, n = p.shape[0], p.shape[1] - 1
+    roots = np.empty((m, n), dtype=np.complex128)
+    iterations = np.empty(m, dtype=np.int64)
+    converged = np.empty(m, dtype=np.bool_)
+    batch_aberth(p, roots, tol, max_iter, iterations, converged)
+
+    return roots, iterations, converged
@@ -0,0 +1,49 @@
+"""
+Build `_fqs_aot`, an ahead-of-time compiled extension module holding the
+scalar `fqs` kernels for double precision.
+
+When the module is importable, `fqs` uses it for the ``'single'`` backend,
+so short-lived processes solve their first equations without waiting for
+numba. The batch kernels rely on the on-disk JIT cache instead.
+
+Usage (from `src`, needs a C compiler):
+
+    python -m equations.build_aot
+"""
+import os
+
+from numba.pycc import CC
+
+from . import fqs
+
+__all__ = [
+    "build",
+]
+
+SIGNATURES = {
+    "single_cubic": "UniTuple(complex128, 3)(f8, f8, f8, f8)",
+    "single_cubic_one": "complex128(f8, f8, f8, f8)",
+    "single_quartic": "UniTuple(complex128, 4)(f8, f8, f8, f8, f8)",
+    "single_cubic_real": "Tuple((f8, f8, f8, i8))(f8, f8, f8, f8)",
+    "single_quartic_real": "Tuple((f8, f8, f8, f8, i8))(f8, f8, f8, f8, f8)",
+}
+
+
+def build(output_dir: str = os.path.dirname(os.path.abspath(__file__))):
+    """
+    Compile the scalar kernels into `_fqs_aot`
+
+    ---
+    - @param output_dir: str [ Directory to write the extension module to ]
+    """
+    cc = CC("_fqs_aot")
+    cc.output_dir = output_dir
+
+    for name, signature in SIGNATURES.items():
+        cc.export(name, signature)(getattr(fqs, name).py_func)
+
+    cc.compile()
+
+
+if __name__ == "__main__":
+    build()
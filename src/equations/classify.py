@@ -0,0 +1,372 @@
+"""
+Number and nature of the real roots of polynomials without solving them:
+discriminants for quadratics, cubics and quartics, Sturm sequences for any
+degree.
+"""
+
+import enum
+import numpy as np
+from numba import jit, prange
+
+from . import fqs
+
+
+# Quantities smaller than `TOLERANCE` times the magnitude of the terms they
+# are computed from are taken as zero, so that repeated roots are recognised
+# despite rounding
+TOLERANCE = 1e-12
+
+
+class RootType(enum.IntEnum):
+    ''' Nature of the roots of a quadratic, cubic or quartic polynomial with
+    real coefficients. Simple roots are listed as distinct.
+    '''
+    # Quadratics
+    TWO_REAL = 1
+    DOUBLE_REAL = 2
+    COMPLEX_PAIR = 3
+    # Cubics
+    THREE_REAL = 4
+    ONE_REAL_COMPLEX_PAIR = 5
+    DOUBLE_AND_SIMPLE_REAL = 6
+    TRIPLE_REAL = 7
+    # Quartics
+    FOUR_REAL = 8
+    TWO_REAL_COMPLEX_PAIR = 9
+    TWO_COMPLEX_PAIRS = 10
+    DOUBLE_AND_TWO_REAL = 11
+    DOUBLE_REAL_COMPLEX_PAIR = 12
+    TRIPLE_AND_SIMPLE_REAL = 13
+    TWO_DOUBLE_REAL = 14
+    DOUBLE_COMPLEX_PAIR = 15
+    QUADRUPLE_REAL = 16
+
+
+# Number of distinct real roots of every `RootType`, by value
+REAL_COUNTS = np.array([0,
+                        2, 1, 0,
+                        3, 1, 2, 1,
+                        4, 2, 0, 3, 1, 2, 2, 0, 1], dtype=np.int8)
+
+# Root types with a repeated root
+REPEATED = frozenset({
+    RootType.DOUBLE_REAL, RootType.DOUBLE_AND_SIMPLE_REAL,
+    RootType.TRIPLE_REAL, RootType.DOUBLE_AND_TWO_REAL,
+    RootType.DOUBLE_REAL_COMPLEX_PAIR, RootType.TRIPLE_AND_SIMPLE_REAL,
+    RootType.TWO_DOUBLE_REAL, RootType.DOUBLE_COMPLEX_PAIR,
+    RootType.QUADRUPLE_REAL})
+
+
+def _sign(x, scale, tol):
+    ''' Sign of `x`, zero where it is within `tol` times `scale` of zero. '''
+    return np.where(np.abs(x) <= tol * scale, 0, np.sign(x)).astype(np.int8)
+
+
+def _classify_quadratic(a0, b0, c0, tol):
+    ''' Root types of quadratics from the sign of ``b^2 - 4ac``. '''
+    bb = b0 * b0
+    ac4 = 4 * a0 * c0
+    sign = _sign(bb - ac4, bb + np.abs(ac4), tol)
+    return np.choose(sign + 1, [RootType.COMPLEX_PAIR, RootType.DOUBLE_REAL,
+                                RootType.TWO_REAL]).astype(np.int8)
+
+
+def _classify_cubic(a0, b0, c0, d0, tol):
+    ''' Root types of cubics from the signs of `f` and `h` of `cubic_fgh`. '''
+    f, g, h = fqs.cubic_fgh(a0, b0, c0, d0)
+    gg = 0.25 * g * g
+    fff = f * f * f
+    h_sign = _sign(h, gg + np.abs(fff), tol)
+    # f == 0 at a repeated root makes it a triple root (g is then 0 too)
+    f_zero = np.abs(fff) <= tol * (gg + np.abs(fff))
+
+    code = np.where(h_sign > 0, RootType.ONE_REAL_COMPLEX_PAIR,
+                    RootType.THREE_REAL)
+    code = np.where(h_sign == 0,
+                    np.where(f_zero, RootType.TRIPLE_REAL,
+                             RootType.DOUBLE_AND_SIMPLE_REAL),
+                    code)
+    return code.astype(np.int8)
+
+
+@jit('int64(float64, float64, float64)', nopython=True, cache=True)
+def _sign_of(x, scale, tol):
+    if abs(x) <= tol * scale:
+        return 0
+    return 1 if x > 0 else -1
+
+
+# Quartic root types as plain integers, which numba freezes into
+# `classify_quartic` as compile-time constants
+_TWO_REAL_COMPLEX_PAIR = int(RootType.TWO_REAL_COMPLEX_PAIR)
+_FOUR_REAL = int(RootType.FOUR_REAL)
+_TWO_COMPLEX_PAIRS = int(RootType.TWO_COMPLEX_PAIRS)
+_DOUBLE_AND_TWO_REAL = int(RootType.DOUBLE_AND_TWO_REAL)
+_DOUBLE_REAL_COMPLEX_PAIR = int(RootType.DOUBLE_REAL_COMPLEX_PAIR)
+_TRIPLE_AND_SIMPLE_REAL = int(RootType.TRIPLE_AND_SIMPLE_REAL)
+_TWO_DOUBLE_REAL = int(RootType.TWO_DOUBLE_REAL)
+_DOUBLE_COMPLEX_PAIR = int(RootType.DOUBLE_COMPLEX_PAIR)
+_QUADRUPLE_REAL = int(RootType.QUADRUPLE_REAL)
+
+
+# The parallel kernels are compiled on first call rather than at import,
+# and cached on disk
+@jit(nopython=True, parallel=True, cache=True)
+def classify_quartic(p, tol, code):
+    ''' Root types of multiple quartics from the signs of the discriminant
+    and of the auxiliary polynomials `P`, `R`, `D` and `Delta0`, following
+    the usual case analysis (e.g. Rees 1922).
+
+    Parameters
+    ----------
+    p: ndarray
+        Coefficients of the quartics, of size ``(M, 5)``.
+
+    tol: float
+        Relative tolerance for zero, see `TOLERANCE`.
+
+    code: ndarray
+        Output array of `RootType` values, of size ``(M,)``.
+    '''
+    for i in prange(p.shape[0]):
+        b = p[i, 1] / p[i, 0]
+        c = p[i, 2] / p[i, 0]
+        d = p[i, 3] / p[i, 0]
+        e = p[i, 4] / p[i, 0]
+
+        bb = b*b
+        cc = c*c
+        dd = d*d
+        ee = e*e
+
+        # Discriminant of the monic quartic, term by term
+        t = (256*ee*e, -192*b*d*ee, -128*cc*ee, 144*c*dd*e, -27*dd*dd,
+             144*bb*c*ee, -6*bb*dd*e, -80*b*cc*d*e, 18*b*c*dd*d,
+             16*cc*cc*e, -4*cc*c*dd, -27*bb*bb*ee, 18*bb*b*c*d*e,
+             -4*bb*b*dd*d, -4*bb*cc*c*e, bb*cc*dd)
+        disc = 0.
+        disc_scale = 0.
+        for term in t:
+            disc += term
+            disc_scale += abs(term)
+        disc = _sign_of(disc, disc_scale, tol)
+
+        P = _sign_of(8*c - 3*bb, 8*abs(c) + 3*bb, tol)
+        R = _sign_of(bb*b + 8*d - 4*b*c, abs(bb*b) + 8*abs(d) + 4*abs(b*c),
+                     tol)
+        delta0 = _sign_of(cc - 3*b*d + 12*e,
+                          cc + 3*abs(b*d) + 12*abs(e), tol)
+        D = _sign_of(64*e - 16*cc + 16*bb*c - 16*b*d - 3*bb*bb,
+                     64*abs(e) + 16*cc + 16*abs(bb*c) + 16*abs(b*d)
+                     + 3*bb*bb, tol)
+
+        if disc < 0:
+            code[i] = _TWO_REAL_COMPLEX_PAIR
+        elif disc > 0:
+            if P < 0 and D < 0:
+                code[i] = _FOUR_REAL
+            else:
+                code[i] = _TWO_COMPLEX_PAIRS
+        elif P < 0 and D < 0 and delta0 != 0:
+            code[i] = _DOUBLE_AND_TWO_REAL
+        elif D > 0 or (P > 0 and (D != 0 or R != 0)):
+            code[i] = _DOUBLE_REAL_COMPLEX_PAIR
+        elif delta0 == 0 and D != 0:
+            code[i] = _TRIPLE_AND_SIMPLE_REAL
+        elif P < 0:
+            code[i] = _TWO_DOUBLE_REAL
+        elif P > 0:
+            code[i] = _DOUBLE_COMPLEX_PAIR
+        else:
+            code[i] = _QUADRUPLE_REAL
+    return code
+
+
+def classify(p, tol=TOLERANCE):
+    '''
+    Number of distinct real roots and nature of the roots of multiple
+    quadratics, cubics or quartics, from their discriminants. Much cheaper
+    than solving them.
+
+    Parameters
+    ----------
+    p: array_like
+        Coefficients of the polynomials, highest power first, of size
+        ``(M, 3)``, ``(M, 4)`` or ``(M, 5)``, with non-zero leading
+        coefficients. A 1D array is treated as a single polynomial.
+
+    tol: float, optional
+        Quantities within `tol` of zero relative to the terms they are
+        computed from count as zero. Roots closer than about ``sqrt(tol)``
+        relative to their size are reported as repeated.
+
+    Returns
+    -------
+    count: ndarray
+        Number of distinct real roots, of size ``(M,)``.
+
+    code: ndarray
+        `RootType` value of every polynomial, of size ``(M,)``.
+
+    Examples
+    --------
+    >>> count, code = classify([[1, -3, 2], [1, -2, 1], [1, 0, 1]])
+    >>> count
+    array([2, 1, 0], dtype=int8)
+    >>> [RootType(c).name for c in code]
+    ['TWO_REAL', 'DOUBLE_REAL', 'COMPLEX_PAIR']
+    '''
+    p = np.asarray(p, dtype=np.float64)
+    if p.ndim < 2:
+        p = p[np.newaxis, :]
+
+    if p.shape[1] == 3:
+        code = _classify_quadratic(*p.T, tol)
+    elif p.shape[1] == 4:
+        code = _classify_cubic(*p.T, tol)
+    elif p.shape[1] == 5:
+        code = classify_quartic(np.ascontiguousarray(p), tol,
+                                np.empty(p.shape[0], dtype=np.int8))
+    else:
+        raise ValueError('Expected 3 to 5 coefficients, '
+                         'got {:d}.'.format(p.shape[1]))
+
+    return REAL_COUNTS[code], code
+
+
+@jit('float64(float64[:], int64, float64)', nopython=True, cache=True)
+def _chain_value(q, n, x):
+    ''' Value at `x` of the polynomial with the first `n` coefficients of
+    `q`, or of its sign at infinity for infinite `x`.
+    '''
+    if np.isinf(x):
+        return q[0] * (-1. if x < 0 and (n - 1) % 2 else 1.)
+    f = q[0]
+    for k in range(1, n):
+        f = f*x + q[k]
+    return f
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def sturm_count(p, lo, hi, tol, count):
+    ''' Number of distinct real roots of multiple polynomials in the
+    intervals ``(lo, hi]``, from the sign changes of their Sturm sequences.
+
+    Every polynomial of the sequence is scaled to a largest coefficient of
+    one; remainders with all coefficients below `tol` end the sequence.
+
+    Parameters
+    ----------
+    p: ndarray
+        Coefficients of the polynomials, of size ``(M, N+1)``, with non-zero
+        leading coefficients.
+
+    lo, hi: ndarray
+        Interval ends for every polynomial, of size ``(M,)``, may be
+        infinite.
+
+    tol: float
+        Relative tolerance for zero coefficients.
+
+    count: ndarray
+        Output array of size ``(M,)``.
+    '''
+    n = p.shape[1] - 1
+    for i in prange(p.shape[0]):
+        # Sequence p_0 = p, p_1 = p', p_k = -rem(p_(k-2), p_(k-1)); row k
+        # holds the `length[k]` coefficients of p_k
+        chain = np.zeros((n + 1, n + 1))
+        length = np.zeros(n + 1, dtype=np.int64)
+
+        scale = np.max(np.abs(p[i]))
+        chain[0, :] = p[i] / scale
+        length[0] = n + 1
+        for k in range(n):
+            chain[1, k] = chain[0, k] * (n - k)
+        length[1] = n
+        scale = np.max(np.abs(chain[1, :n]))
+        chain[1, :n] /= scale
+
+        m = 2
+        while m <= n and length[m - 1] > 1:
+            # Remainder of the division of p_(m-2) by p_(m-1)
+            num = chain[m - 2, :length[m - 2]].copy()
+            den = chain[m - 1, :length[m - 1]]
+            for k in range(num.shape[0] - den.shape[0] + 1):
+                factor = num[k] / den[0]
+                for j in range(den.shape[0]):
+                    num[k + j] -= factor * den[j]
+            rem = num[num.shape[0] - den.shape[0] + 1:]
+
+            # Strip leading zeros, stop at a zero remainder
+            start = 0
+            while start < rem.shape[0] and abs(rem[start]) <= tol:
+                start += 1
+            if start == rem.shape[0]:
+                break
+            rem = -rem[start:]
+            scale = np.max(np.abs(rem))
+            length[m] = rem.shape[0]
+            chain[m, :length[m]] = rem / scale
+            m += 1
+
+        changes = 0
+        for x, sign in ((lo[i], 1), (hi[i], -1)):
+            previous = 0.
+            for k in range(m):
+                f = _chain_value(chain[k], length[k], x)
+                if f == 0:
+                    continue
+                if previous != 0 and (f > 0) != (previous > 0):
+                    changes += sign
+                previous = f
+        count[i] = changes
+    return count
+
+
+def count_real_roots(p, lo=-np.inf, hi=np.inf, tol=TOLERANCE):
+    '''
+    Number of distinct real roots of multiple polynomials of any degree in
+    an interval, by Sturm's theorem, without solving them.
+
+    Parameters
+    ----------
+    p: array_like
+        Coefficients of the polynomials, highest power first, of size
+        ``(M, N+1)`` with non-zero leading coefficients. A 1D array is
+        treated as a single polynomial.
+
+    lo, hi: float or array_like, optional
+        Interval ``(lo, hi]``, for all polynomials or one per polynomial,
+        the whole real line by default.
+
+    tol: float, optional
+        Coefficients of the Sturm sequence (scaled to a largest coefficient
+        of one) below `tol` count as zero; roots closer than about `tol`
+        count as one.
+
+    Returns
+    -------
+    count: ndarray
+        Number of distinct real roots in the interval, of size ``(M,)``.
+
+    Examples
+    --------
+    >>> count_real_roots([1, -15, 85, -225, 274, -120], 0, 3.5)
+    array([3])
+    '''
+    p = np.asarray(p, dtype=np.float64)
+    if p.ndim < 2:
+        p = p[np.newaxis, :]
+    if p.shape[1] < 2:
+        raise ValueError('Expected at least 2 coefficients, '
+                         'got {:d}.'.format(p.shape[1]))
+    if not np.all(p[:, 0]):
+        raise ValueError('Leading coefficients must be non-zero.')
+
+    m = p.shape[0]
+    lo = np.array(np.broadcast_to(lo, (m,)), dtype=np.float64)
+    hi = np.array(np.broadcast_to(hi, (m,)), dtype=np.float64)
+    count = np.empty(m, dtype=np.int64)
+
+    return sturm_count(np.ascontiguousarray(p), lo, hi, tol, count)
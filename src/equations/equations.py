@@ -1,33 +1,49 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from functools import lru_cache
+from numbers import Real
+from operator import add, itemgetter, sub
 from typing import TypeVar, overload
 
-import solvers
-from terms import (cubic_coefficients, linear_coefficients,
-                   quadratic_coefficients, quartic_coefficients,
-                   sign_cube_terms, sign_linear_terms, sign_quad_terms,
-                   sign_quart_terms)
+import numpy as np
+
+from . import products, render, solvers
+from .horner import evaluate
+from .terms import (cubic_coefficients, linear_coefficients,
+                    quadratic_coefficients, quartic_coefficients, sign_terms)
 
 __all__ = [
     # constants
     "real",
 
     # classes
-    "Cubic",
+    "Linear",
     "Quadratic",
+    "Cubic",
+    "Quartic",
     "Equation",
+    "Polynomial",
+    "PolynomialBatch",
+
+    # functions
+    "product",
 ]
 
 real = int | float
 number = real | complex
 
+# Number of rendered equations kept by `Polynomial.__str__`
+STR_CACHE_SIZE = 4096
+
 T_co = TypeVar("T_co", "Linear", "Quadratic", "Cubic", "Quartic",
                covariant=True)
 
 
 class Equation(ABC):
     """Abstract base class for equation sub-classes"""
+    __slots__ = ()
+
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}('{str(self)}')"
 
@@ -52,75 +68,170 @@ class Equation(ABC):
         """
 
 
-class Linear(Equation):
+class Polynomial(Equation, tuple):
     """
-    Linear equation in form `ax + b`
-    where coefficients are real or complex
+    Polynomial of any degree with real coefficients, stored as an
+    immutable tuple of coefficients without a per-instance `__dict__`
     ---
-    - @param a: number - [coefficient for x¹]
-    - @param b: number - [coefficient for x⁰]
+    - @param coefficients: real - [coefficients, highest power first]
     ---
-    - @param equation: str - [equation in string form]
+    - @param equation: str - [equation in string form, only for the
+      fixed degree sub-classes]
     """
-    @overload
-    def __init__(self, a: real, b: real, c: real) -> None: ...
-    @overload
-    def __init__(self, equation: str) -> None: ...
+    __slots__ = ()
+
+    # Degree of every instance, `None` for any degree
+    DEGREE: int | None = None
+
+    def __new__(cls, *args: real) -> Polynomial:
+        if len(args) == 1 and isinstance(args[0], str):
+            args = cls._parse(args[0])
 
-    def __init__(self, *args: real) -> None:
-        if len(args) == 1:
-            self._a, self._b = linear_coefficients(*args)
-        else:
-            self._a, self._b = args
+        if cls.DEGREE is not None and len(args) != cls.DEGREE + 1:
+            raise ValueError(f"{cls.__name__} takes {cls.DEGREE + 1} "
+                             f"coefficients, got {len(args)}")
 
-    def __str__(self: T_co) -> str:
-        a, b = sign_linear_terms(self.a, self.b)
+        return tuple.__new__(cls, args)
 
-        if a.startswith("+"):
-            a = a[1:]
+    def __getnewargs__(self) -> tuple[real, ...]:
+        return tuple(self)
 
-        return f"{a}{b}"
+    @staticmethod
+    def _parse(equation: str) -> tuple[real, ...]:
+        raise ValueError("Only fixed degree equations can be parsed")
 
+    @staticmethod
+    def from_coefficients(coefficients) -> Polynomial:
+        """
+        Polynomial of the matching degree specific class, e.g. a `Cubic`
+        for four coefficients
+        ---
+        - @param coefficients: iterable[real] - [highest power first]
+        """
+        coefficients = tuple(coefficients)
+        degree = len(coefficients) - 1
+        if 0 < degree < len(EQUATION_TYPES):
+            return EQUATION_TYPES[degree](*coefficients)
+        return Polynomial(*coefficients)
+
+    def __str__(self) -> str:
+        # Equal coefficients of different types, e.g. 1 and 1.0, render
+        # differently
+        return _render(self, *map(type, self))
+
+    def __call__(self, x):
+        """
+        Value of the polynomial at `x`
+        ---
+        - @param x: number | array_like - [point or points, see
+          `horner.evaluate`]
+        """
+        if isinstance(x, (int, float, complex)):
+            value = 0
+            for c in self:
+                value = value * x + c
+            return value
+        return evaluate(self, x)
+
+    # Polynomials never equal plain sequences, only batches compare
+    # themselves with polynomials
     def __eq__(self: T_co, other: T_co) -> bool:
-        return [self.a, self.b] == [other.a, other.b]
+        if isinstance(other, Polynomial):
+            return tuple.__eq__(self, other)
+        if isinstance(other, PolynomialBatch):
+            return NotImplemented
+        return False
+
+    def __ne__(self: T_co, other: T_co) -> bool:
+        if isinstance(other, Polynomial):
+            return tuple.__ne__(self, other)
+        if isinstance(other, PolynomialBatch):
+            return NotImplemented
+        return True
+
+    def __hash__(self) -> int:
+        # Distinct from the hash of the coefficient tuple, alike for equal
+        # polynomials of different classes
+        return hash((Polynomial, tuple(self)))
+
+    def _combine(self, other: Polynomial, op) -> Polynomial:
+        """
+        `op` of matching coefficients, the lower degree operand padded
+        with leading zeros, of the class of `self` for equal degrees
+        """
+        if len(self) == len(other):
+            return self.__class__(*map(op, self, other))
+        size = max(len(self), len(other))
+        mine = (0,) * (size - len(self)) + tuple(self)
+        theirs = (0,) * (size - len(other)) + tuple(other)
+        return Polynomial.from_coefficients(map(op, mine, theirs))
 
     def __add__(self: T_co, other: T_co) -> T_co:
-        return self.__class__(
-            self.a + other.a,
-            self.b + other.b,
-        )
+        return self._combine(other, add)
 
     def __sub__(self: T_co, other: T_co) -> T_co:
-        return self.__class__(
-            self.a - other.a,
-            self.b - other.b,
-        )
-
-    def __mul__(self: T_co, other: real) -> T_co:
-        return self.__class__(
-            self.a * other,
-            self.b * other,
-        )
-
-    def __div__(self: T_co, other: real) -> T_co:
-        return self.__class__(
-            self.a / other,
-            self.b / other,
-        )
+        return self._combine(other, sub)
+
+    def __mul__(self: T_co, other: real | Polynomial) -> Polynomial:
+        if isinstance(other, Polynomial):
+            coefficients = products.multiply(self, other)
+            return Polynomial.from_coefficients(coefficients)
+        if not isinstance(other, Real):
+            return NotImplemented
+        return self.__class__(*(x * other for x in self))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self: T_co, other: real) -> T_co:
+        return self.__class__(*(x / other for x in self))
+
+    __div__ = __truediv__
 
     @property
-    def a(self) -> T_co:
-        return self._a
+    def coefficients(self) -> tuple[real, ...]:
+        return tuple(self)
 
     @property
-    def b(self) -> T_co:
-        return self._b
+    def degree(self) -> int:
+        return len(self) - 1
+
+    def solve(self):
+        if self.degree > solvers.CLOSED_FORM_DEGREE:
+            roots, _ = solvers.solve_batch(self)
+            return list(roots[0])
+        return solvers.solve(*self, as_list=True)
+
+
+class Linear(Polynomial):
+    """
+    Linear equation in form `ax + b`
+    where coefficients are real or complex
+    ---
+    - @param a: number - [coefficient for x¹]
+    - @param b: number - [coefficient for x⁰]
+    ---
+    - @param equation: str - [equation in string form]
+    """
+    __slots__ = ()
+    DEGREE = 1
+    _parse = staticmethod(linear_coefficients)
+
+    @overload
+    def __new__(cls, a: real, b: real) -> T_co: ...
+    @overload
+    def __new__(cls, equation: str) -> T_co: ...
+
+    def __new__(cls, *args: real) -> T_co:
+        return super().__new__(cls, *args)
+
+    a = property(itemgetter(0))
+    b = property(itemgetter(1))
 
     def solve(self: T_co) -> number:
         return solvers.solve(self.a, self.b)
 
 
-class Quadratic(Equation):
+class Quadratic(Polynomial):
     """
     Quadratic equation in form `ax² + bx + c`
     where all coefficients are real
@@ -131,73 +242,24 @@ class Quadratic(Equation):
     ---
     - @param equation: str - [equation in string form]
     """
+    __slots__ = ()
+    DEGREE = 2
+    _parse = staticmethod(quadratic_coefficients)
+
     @overload
-    def __init__(self, a: real, b: real, c: real) -> None: ...
+    def __new__(cls, a: real, b: real, c: real) -> T_co: ...
     @overload
-    def __init__(self, equation: str) -> None: ...
-
-    def __init__(self, *args: real) -> None:
-        if len(args) == 1:
-            self._a, self._b, self._c = quadratic_coefficients(*args)
-        else:
-            self._a, self._b, self._c = args
-
-    def __str__(self):
-        a, b, c = sign_quad_terms(self.a, self.b, self.c)
-
-        if a.startswith("+"):
-            a = a[1:]
-
-        return f"{a}{b}{c}"
-
-    def __eq__(self: T_co, other: T_co) -> bool:
-        return [self.a, self.b, self.c] == [other.a, other.b, other.c]
-
-    def __add__(self: T_co, other: T_co) -> T_co:
-        return self.__class__(
-            self.a + other.a,
-            self.b + other.b,
-            self.c + other.c
-        )
-
-    def __sub__(self: T_co, other: T_co) -> T_co:
-        return self.__class__(
-            self.a - other.a,
-            self.b - other.b,
-            self.c - other.c,
-        )
-
-    def __mul__(self: T_co, other: real) -> T_co:
-        return self.__class__(
-            self.a * other,
-            self.b * other,
-            self.c * other,
-        )
-
-    def __div__(self: T_co, other: real) -> T_co:
-        return self.__class__(
-            self.a / other,
-            self.b / other,
-            self.c / other,
-        )
-
-    @property
-    def a(self) -> real:
-        return self._a
-
-    @property
-    def b(self) -> real:
-        return self._b
+    def __new__(cls, equation: str) -> T_co: ...
 
-    @property
-    def c(self) -> real:
-        return self._c
+    def __new__(cls, *args: real) -> T_co:
+        return super().__new__(cls, *args)
 
-    def solve(self) -> tuple[real, real]:
-        return solvers.solve(self.a, self.b, as_list=True)
+    a = property(itemgetter(0))
+    b = property(itemgetter(1))
+    c = property(itemgetter(2))
 
 
-class Cubic(Equation):
+class Cubic(Polynomial):
     """
     Quadratic equation in form `ax³ + bx² + cx + d`
     where all coefficients are real
@@ -209,85 +271,25 @@ class Cubic(Equation):
     ---
     - @param equation: str - [equation in string form]
     """
+    __slots__ = ()
+    DEGREE = 3
+    _parse = staticmethod(cubic_coefficients)
+
     @overload
-    def __init__(self, a: real, b: real, c: real, d: real) -> None: ...
+    def __new__(cls, a: real, b: real, c: real, d: real) -> T_co: ...
     @overload
-    def __init__(self, equation: str) -> None: ...
-
-    def __init__(self, *args: real) -> None:
-        if len(args) == 1:
-            self._a, self._b, self._c, self._d = cubic_coefficients(*args)
-        else:
-            self._a, self._b, self._c, self._d = args
-            self._a: real
-            self._b: real
-            self._c: real
-            self._d: real
-
-    def __str__(self) -> str:
-        a, b, c, d = sign_cube_terms(self.a, self.b, self.c, self.d)
+    def __new__(cls, equation: str) -> T_co: ...
 
-        if a.startswith("+"):
-            a = a[1:]
+    def __new__(cls, *args: real) -> T_co:
+        return super().__new__(cls, *args)
 
-        return f"{a}{b}{c}{d}"
+    a = property(itemgetter(0))
+    b = property(itemgetter(1))
+    c = property(itemgetter(2))
+    d = property(itemgetter(3))
 
-    def __eq__(self: T_co, other: T_co) -> bool:
-        return [self.a, self.b, self.c, self.d] == [other.a, other.b, other.c, self.d]  # noqa
 
-    def __add__(self: T_co, other: T_co) -> T_co:
-        return self.__class__(
-            self.a + other.a,
-            self.b + other.b,
-            self.c + other.c,
-            self.d + other.d,
-        )
-
-    def __sub__(self: T_co, other: T_co) -> T_co:
-        return self.__class__(
-            self.a - other.a,
-            self.b - other.b,
-            self.c - other.c,
-            self.d - other.d,
-        )
-
-    def __mul__(self: T_co, other: real) -> T_co:
-        return self.__class__(
-            self.a * other,
-            self.b * other,
-            self.c * other,
-            self.d * other,
-        )
-
-    def __div__(self: T_co, other: real) -> T_co:
-        return self.__class__(
-            self.a / other,
-            self.b / other,
-            self.c / other,
-            self.d / other,
-        )
-
-    @property
-    def a(self) -> real:
-        return self._a
-
-    @property
-    def b(self) -> real:
-        return self._b
-
-    @property
-    def c(self) -> real:
-        return self._c
-
-    @property
-    def d(self) -> real:
-        return self._d
-
-    def solve(self):
-        return solvers.solve(self.a, self.b, self.c, as_list=True)
-
-
-class Quartic(Equation):
+class Quartic(Polynomial):
     """
     Quadratic equation in form `ax⁴ + bx³ + cx² + dx + e`
     where all coefficients are real
@@ -300,94 +302,202 @@ class Quartic(Equation):
     ---
     - @param equation: str - [equation in string form]
     """
+    __slots__ = ()
+    DEGREE = 4
+    _parse = staticmethod(quartic_coefficients)
+
     @overload
-    def __init__(self,
-                 a: real, b: real, c: real, d: real, e: real) -> None: ...
+    def __new__(cls,
+                a: real, b: real, c: real, d: real, e: real) -> T_co: ...
 
     @overload
-    def __init__(self, equation: str) -> None: ...
-
-    def __init__(self, *args: real) -> None:
-        if len(args) == 1:
-            (self._a, self._b,
-             self._c, self._d, self._e) = quartic_coefficients(*args)
-        else:
-            self._a, self._b, self._c, self._d, self._e = args
-            self._a: real
-            self._b: real
-            self._c: real
-            self._d: real
-            self._e: real
+    def __new__(cls, equation: str) -> T_co: ...
 
-    def __str__(self) -> str:
-        a, b, c, d, e = sign_quart_terms(
-            self.a, self.b, self.c, self.d, self.e
-        )
+    def __new__(cls, *args: real) -> T_co:
+        return super().__new__(cls, *args)
 
-        if a.startswith("+"):
-            a = a[1:]
+    a = property(itemgetter(0))
+    b = property(itemgetter(1))
+    c = property(itemgetter(2))
+    d = property(itemgetter(3))
+    e = property(itemgetter(4))
 
-        return f"{a}{b}{c}{d}{e}"
 
-    def __eq__(self: T_co, other: T_co) -> bool:
-        return [self.a, self.b, self.c, self.d, self.e] == [other.a, other.b, other.c, self.d, self.e]  # noqa
+class PolynomialBatch:
+    """
+    Many polynomials of one degree, stored column-wise with one contiguous
+    array per coefficient, i.e. `M` quadratics are three arrays `a`, `b`
+    and `c` of length `M` rather than `M` `Quadratic` objects. Coefficients
+    are stored as floats, and integral ones render as integers, as in
+    `str(Quadratic(1, -3, 2))`
+    ---
+    - @param coefficients: array_like - [one array per coefficient, highest
+      power first, e.g. `PolynomialBatch(a, b, c)` for quadratics]
+    """
+    def __init__(self, *coefficients) -> None:
+        coeffs = np.array(np.broadcast_arrays(*coefficients), dtype=float)
+        if coeffs.ndim != 2 or len(coeffs) < 2:
+            raise ValueError("Expected at least 2 one-dimensional "
+                             f"coefficient arrays, got {len(coefficients)}")
+        self._coeffs = coeffs
+
+    @classmethod
+    def from_equations(cls, equations) -> PolynomialBatch:
+        """
+        Batch built from `Equation` objects, lower degree equations are
+        padded with leading zero coefficients
+        ---
+        - @param equations: iterable[Equation] - [equations to batch]
+        """
+        equations = list(equations)
+        # Constants, and empty batches, are batched as linear polynomials,
+        # of at least 2 coefficients
+        degree = max(1, max((eq.degree for eq in equations), default=0))
+        coeffs = np.zeros((degree + 1, len(equations)))
+        for n in range(degree + 1):
+            rows = [i for i, eq in enumerate(equations) if eq.degree == n]
+            if rows:
+                coeffs[degree - n:, rows] = np.array(
+                    [equations[i].coefficients for i in rows]).T
+        return cls(*coeffs)
+
+    def to_equations(self) -> list[Equation]:
+        """Batch as a list of `Equation` objects of the batch degree"""
+        return list(map(Polynomial.from_coefficients,
+                        self._coeffs.T.tolist()))
 
-    def __add__(self: T_co, other: T_co) -> T_co:
-        return self.__class__(
-            self.a + other.a,
-            self.b + other.b,
-            self.c + other.c,
-            self.d + other.d,
-            self.e + other.e,
-        )
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(degree={self.degree}, " \
+               f"size={len(self)})"
 
-    def __sub__(self: T_co, other: T_co) -> T_co:
-        return self.__class__(
-            self.a - other.a,
-            self.b - other.b,
-            self.c - other.c,
-            self.d - other.d,
-            self.e - other.e,
-        )
-
-    def __mul__(self: T_co, other: real) -> T_co:
-        return self.__class__(
-            self.a * other,
-            self.b * other,
-            self.c * other,
-            self.d * other,
-            self.e * other,
-        )
-
-    def __div__(self: T_co, other: real) -> T_co:
-        return self.__class__(
-            self.a / other,
-            self.b / other,
-            self.c / other,
-            self.d / other,
-            self.e / other,
-        )
+    def __str__(self) -> str:
+        return "\n".join(render.format_rows(self._coeffs.T, integral=True))
 
-    @property
-    def a(self) -> real:
-        return self._a
+    def write(self, file) -> int:
+        """
+        Writes the equations, one per line, to a text or binary stream in
+        large buffered chunks, see `render.write_rows`
+        ---
+        - @param file: file object - [open stream]
+        ---
+        - @return count: int - [number of lines written]
+        """
+        return render.write_rows(self._coeffs.T, file, integral=True)
 
-    @property
-    def b(self) -> real:
-        return self._b
+    def __len__(self) -> int:
+        return self._coeffs.shape[1]
 
-    @property
-    def c(self) -> real:
-        return self._c
+    def __call__(self, xs, grid: bool = False) -> np.ndarray:
+        """
+        Values of the polynomials, see `horner.evaluate`
+        ---
+        - @param xs: number | array_like - [one point for all polynomials or
+          one point per polynomial]
+        - @param grid: bool - [evaluate every polynomial at every point]
+        """
+        return evaluate(self._coeffs.T, xs, grid=grid)
+
+    def __getitem__(self, key) -> Equation | PolynomialBatch:
+        if isinstance(key, (int, np.integer)):
+            return Polynomial.from_coefficients(self._coeffs[:, key].tolist())
+        return self.__class__(*self._coeffs[:, key])
+
+    def _columns(self, other: PolynomialBatch | Equation) -> tuple:
+        """Coefficients of both operands padded to the same degree"""
+        if isinstance(other, Polynomial):
+            other = PolynomialBatch.from_equations([other])
+        mine, theirs = self._coeffs, other._coeffs
+        size = max(len(mine), len(theirs))
+        return (np.pad(mine, ((size - len(mine), 0), (0, 0))),
+                np.pad(theirs, ((size - len(theirs), 0), (0, 0))))
+
+    def __eq__(self, other: PolynomialBatch | Equation) -> np.ndarray:
+        if not isinstance(other, (PolynomialBatch, Polynomial)):
+            return NotImplemented
+        mine, theirs = self._columns(other)
+        return (mine == theirs).all(axis=0)
+
+    def __add__(self, other: PolynomialBatch | Equation) -> PolynomialBatch:
+        if not isinstance(other, (PolynomialBatch, Polynomial)):
+            return NotImplemented
+        mine, theirs = self._columns(other)
+        return self.__class__(*(mine + theirs))
+
+    def __sub__(self, other: PolynomialBatch | Equation) -> PolynomialBatch:
+        if not isinstance(other, (PolynomialBatch, Polynomial)):
+            return NotImplemented
+        mine, theirs = self._columns(other)
+        return self.__class__(*(mine - theirs))
+
+    def __mul__(self, other: PolynomialBatch | Polynomial | real | np.ndarray
+                ) -> PolynomialBatch:
+        """
+        Products of the polynomials, with a `Polynomial` or row by row with
+        another batch, like `Polynomial * Polynomial`, or scaled by a real
+        number or one real number per polynomial
+        """
+        if isinstance(other, (PolynomialBatch, Polynomial)):
+            mine = self._coeffs
+            theirs = (other._coeffs if isinstance(other, PolynomialBatch)
+                      else np.array(other, dtype=float)[:, np.newaxis])
+            size = np.broadcast_shapes(mine.shape[1:], theirs.shape[1:])
+            coeffs = np.zeros((len(mine) + len(theirs) - 1, *size))
+            for j, column in enumerate(theirs):
+                coeffs[j:j + len(mine)] += column * mine
+            return self.__class__(*coeffs)
+        if not _is_real_scale(other):
+            return NotImplemented
+        return self.__class__(*(self._coeffs * other))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: real | np.ndarray) -> PolynomialBatch:
+        if not _is_real_scale(other):
+            return NotImplemented
+        return self.__class__(*(self._coeffs / other))
+
+    __div__ = __truediv__
 
     @property
-    def d(self) -> real:
-        return self._d
+    def coefficients(self) -> np.ndarray:
+        """`(degree + 1, M)` coefficient array, highest power first"""
+        return self._coeffs
 
     @property
-    def e(self) -> real:
-        return self._e
+    def degree(self) -> int:
+        return len(self._coeffs) - 1
 
-    def solve(self):
-        return solvers.solve(self.a, self.b, self.c, self.d, self.e,
-                             as_list=True)
+    def solve(self, dtype=None) -> np.ndarray:
+        """
+        Roots of every polynomial, as an `(M, degree)` complex array
+        padded with `nan` where a leading coefficient is zero
+        """
+        roots, _ = solvers.solve_batch(self._coeffs.T, dtype=dtype)
+        return roots
+
+
+def _is_real_scale(x) -> bool:
+    """Whether `x` is a real number or an array of real numbers"""
+    if isinstance(x, np.ndarray):
+        return x.dtype.kind in "biuf"
+    return isinstance(x, Real)
+
+
+@lru_cache(maxsize=STR_CACHE_SIZE)
+def _render(coefficients: Polynomial, *types: type) -> str:
+    """Rendered equation, cached by coefficients and their types"""
+    return "".join(sign_terms(*coefficients)).removeprefix("+")
+
+
+def product(polys) -> Polynomial:
+    """
+    Product of many polynomials, expanded with a balanced product tree
+    and FFT convolution for long factors, see `products.product`
+    ---
+    - @param polys: iterable[Polynomial] - [factors]
+    """
+    return Polynomial.from_coefficients(products.product(polys))
+
+
+# Equation class for each degree, see `Polynomial.from_coefficients`
+EQUATION_TYPES = (None, Linear, Quadratic, Cubic, Quartic)
@@ -5,12 +5,140 @@ Created on Fri Jan  4 13:50:23 2019
 """
 
 import cmath
+import copy
+import itertools
+import json
 import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 import numpy as np
-from numba import jit
+from numba import get_num_threads, jit, prange
+
+try:
+    # Ahead-of-time compiled scalar kernels, see `build_aot.py`
+    from . import _fqs_aot
+except ImportError:
+    _fqs_aot = None
+
+
+# Default number of rows handed to the vectorized solvers per chunk when
+# streaming. Large enough to amortise the per-call `numpy` overhead, small
+# enough that the dozen row-sized temporaries of `multi_quartic` stay in cache.
+CHUNK_SIZE = 16384
+
+# Interchangeable implementations behind `cubic_roots` and `quartic_roots`
+BACKENDS = ('single', 'parallel', 'numpy')
+
+# Backend used when no calibration profile is available
+DEFAULT_BACKEND = 'parallel'
+
+# The real-only cubic solvers count the discriminant `h` as zero within this
+# tolerance relative to its terms, so that rounding does not turn repeated
+# real roots into a complex pair; pairs whose imaginary parts are below
+# about its square root relative to the roots count as real
+REAL_TOLERANCE = 1e-12
+
+# Location of the dispatch profile written by `calibrate`
+PROFILE_PATH = os.environ.get(
+    'FQS_PROFILE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'fqs', 'profile.json'))
+
+_profile = None
+
+# Counters and timers being recorded by the solvers, `None` unless enabled
+# with `enable_stats` or the `FQS_STATS` environment variable, and the ones
+# read by `stats`
+_stats = None
+_collected = None
+
+# Complex counterparts of the supported floating point types
+COMPLEX_TYPES = {np.dtype(np.float64): np.dtype(np.complex128),
+                 np.dtype(np.float32): np.dtype(np.complex64)}
+
+# Shared memory segments attached by a `ProcessPoolSolver` worker, by kind,
+# and the worker's intermediate buffers
+_attached = {}
+_workspace = None
+
+# Start numba's threading layer in the importing thread. The parallel
+# kernels are compiled on first call, and a layer first started by one of
+# them running in another thread, e.g. a reader thread of the command line
+# interface, hangs the interpreter at exit
+get_num_threads()
+
+
+def _eager(*templates):
+    ''' Compile a lazily jitted kernel for double precision when `fqs` is
+    imported. `{r}` and `{c}` in the signature templates stand for the real
+    and complex type names.
+
+    Only the scalar kernels, also exported by `build_aot.py`, are compiled
+    eagerly. The parallel batch kernels and the single precision variants
+    are compiled on their first call instead, as compiling all of them
+    takes several seconds. Every compiled kernel is cached on disk (in
+    `__pycache__`, or `NUMBA_CACHE_DIR`), so later processes load it
+    instead of compiling again.
+    '''
+    def compile_double(kernel):
+        for template in templates:
+            kernel.compile(template.format(r='float64', c='complex128'))
+        return kernel
+    return compile_double
+
+
+def _scalar_kernel(name, real):
+    ''' Scalar kernel `name` for the ``'single'`` backend: the ahead-of-time
+    compiled one for double precision if `_fqs_aot` is built, otherwise the
+    jitted one.
+    '''
+    if _fqs_aot is not None and real == np.float64:
+        return getattr(_fqs_aot, name)
+    return globals()[name]
+
+
+def resolve_dtype(dtype=None):
+    ''' Floating point type a solver works in, ``float64`` by default.
+
+    Parameters
+    ----------
+    dtype: data-type, optional
+        ``float64`` or ``float32``; ``complex128`` and ``complex64`` are
+        accepted as aliases of their real counterparts.
+
+    Returns
+    -------
+    real, cplx: numpy.dtype
+        Real and complex types used by the solver.
+    '''
+    real = np.dtype(np.float64 if dtype is None else dtype)
+    if real.kind == 'c':
+        real = np.dtype(real.char.lower())
+    if real not in COMPLEX_TYPES:
+        raise ValueError('Unsupported dtype {}, expected float64 or '
+                         'float32.'.format(real))
+    return real, COMPLEX_TYPES[real]
+
+
+def _working_dtype(*args):
+    ''' Floating point type the `multi_*` solvers use for given inputs:
+    ``float32`` if some are ``float32`` arrays or scalars and all other
+    `numpy` inputs fit in single precision, otherwise ``float64``. Python
+    numbers and lists do not decide the type.
+    '''
+    types = [arg.dtype for arg in args
+             if isinstance(arg, (np.ndarray, np.generic))]
+    if np.dtype(np.float32) in types \
+            and np.result_type(*types) == np.float32:
+        return np.float32
+    return np.float64
 
 
-@jit(nopython=True)
+@jit(['(complex128, complex128, complex128)'], nopython=True, cache=True,
+     error_model='numpy')
 def single_quadratic(a0, b0, c0):
     ''' Analytical solver for a single quadratic equation
     (2nd order polynomial).
@@ -43,7 +171,8 @@ def single_quadratic(a0, b0, c0):
     return r1, r2
 
 
-@jit(nopython=True)
+@_eager('({r}, {r}, {r}, {r})')
+@jit(nopython=True, cache=True, error_model='numpy')
 def single_cubic(a0, b0, c0, d0):
     ''' Analytical closed-form solver for a single cubic equation
     (3rd order polynomial), gives all three roots.
@@ -109,7 +238,8 @@ def single_cubic(a0, b0, c0, d0):
         return r1, r2, r3
 
 
-@jit(nopython=True)
+@_eager('({r}, {r}, {r}, {r})')
+@jit(nopython=True, cache=True, error_model='numpy')
 def single_cubic_one(a0, b0, c0, d0):
     ''' Analytical closed-form solver for a single cubic equation
     (3rd order polynomial), gives only one real root.
@@ -166,7 +296,8 @@ def single_cubic_one(a0, b0, c0, d0):
         return SPU - a13
 
 
-@jit(nopython=True)
+@_eager('({r}, {r}, {r}, {r}, {r})')
+@jit(nopython=True, cache=True, error_model='numpy')
 def single_quartic(a0, b0, c0, d0, e0):
     ''' Analytical closed-form solver for a single quartic equation
     (4th order polynomial). Calls `single_cubic_one` and
@@ -204,7 +335,7 @@ def single_quartic(a0, b0, c0, d0, e0):
     # Additional variables
     s = cmath.sqrt(2*p + 2*z0.real + 0j)
     if s == 0:
-        t = z0*z0 + r
+        t = cmath.sqrt(z0*z0 + r)
     else:
         t = -q / s
 
@@ -215,6 +346,354 @@ def single_quartic(a0, b0, c0, d0, e0):
     return r0 - a0, r1 - a0, r2 - a0, r3 - a0
 
 
+@_eager('({r}, {r}, {r}, {r})')
+@jit(nopython=True, cache=True, error_model='numpy')
+def single_cubic_real(a0, b0, c0, d0):
+    ''' Analytical closed-form solver for the real roots of a single cubic
+    equation (3rd order polynomial), using only real arithmetic.
+
+    Parameters
+    ----------
+    a0, b0, c0, d0: array_like
+        Input data are coefficients of the Cubic polynomial::
+
+            a0*x^3 + b0*x^2 + c0*x + d0 = 0
+
+    Returns
+    -------
+    r1, r2, r3, n: tuple
+        Output data is a tuple of three real roots, the largest one first,
+        followed by the number `n` of real roots. Missing roots are `nan`.
+    '''
+
+    ''' Reduce the cubic equation to to form:
+        x^3 + a*x^2 + bx + c = 0'''
+    a, b, c = b0 / a0, c0 / a0, d0 / a0
+
+    # Some repeating constants and variables
+    third = 1./3.
+    a13 = a*third
+    a2 = a13*a13
+    sqr3 = math.sqrt(3)
+
+    # Additional intermediate variables
+    f = third*b - a2
+    g = a13 * (2*a2 - b) + c
+    h = 0.25*g*g + f*f*f
+
+    def cubic_root(x):
+        ''' Compute cubic root of a number while maintaining its sign
+        '''
+        if x >= 0:
+            return x**third
+        else:
+            return -(-x)**third
+
+    if f == g == h == 0:
+        r1 = -cubic_root(c)
+        return r1, r1, r1, 3
+
+    elif h <= REAL_TOLERANCE * (0.25*g*g + abs(f*f*f)):
+        j = math.sqrt(-f)
+        k = math.acos(min(max(-0.5*g / (j*j*j), -1.), 1.))
+        m = math.cos(third*k)
+        n = sqr3 * math.sin(third*k)
+        r1 = 2*j*m - a13
+        r2 = -j * (m + n) - a13
+        r3 = -j * (m - n) - a13
+        return r1, r2, r3, 3
+
+    else:
+        sqrt_h = math.sqrt(h)
+        S = cubic_root(-0.5*g + sqrt_h)
+        U = cubic_root(-0.5*g - sqrt_h)
+        return S + U - a13, math.nan, math.nan, 1
+
+
+@_eager('({r}, {r}, {r}, {r}, {r})')
+@jit(nopython=True, cache=True, error_model='numpy')
+def single_quartic_real(a0, b0, c0, d0, e0):
+    ''' Analytical closed-form solver for the real roots of a single
+    quartic equation (4th order polynomial), using only real arithmetic.
+    Calls `single_cubic_real`.
+
+    Parameters
+    ----------
+    a0, b0, c0, d0, e0: array_like
+        Input data are coefficients of the Quartic polynomial::
+
+        a0*x^4 + b0*x^3 + c0*x^2 + d0*x + e0 = 0
+
+    Returns
+    -------
+    r1, r2, r3, r4, n: tuple
+        Output data is a tuple of four real roots followed by the number `n`
+        of real roots. Missing roots are `nan`.
+    '''
+
+    ''' Reduce the quartic equation to to form:
+        x^4 + a*x^3 + b*x^2 + c*x + d = 0'''
+    a, b, c, d = b0/a0, c0/a0, d0/a0, e0/a0
+
+    # Some repeating variables
+    a0 = 0.25*a
+    a02 = a0*a0
+
+    # Coefficients of subsidiary cubic euqtion
+    p = 3*a02 - 0.5*b
+    q = a*a02 - b*a0 + 0.5*c
+    r = 3*a02*a02 - b*a02 + c*a0 - d
+
+    # Largest real root of the cubic equation, it splits the quartic into
+    # two quadratics with real coefficients
+    z0 = single_cubic_real(1, p, r, p*r - 0.5*q*q)[0]
+
+    # Additional variables
+    s2 = max(2*p + 2*z0, 0.)
+    s = math.sqrt(s2)
+    if s == 0:
+        t2 = z0*z0 + r
+        if t2 < 0:
+            # Both quadratics have complex coefficients
+            return math.nan, math.nan, math.nan, math.nan, 0
+        t = math.sqrt(t2)
+    else:
+        t = -q / s
+
+    # Real roots of x^2 + s*x + (z0 + t) and x^2 - s*x + (z0 - t)
+    r1 = r2 = r3 = r4 = math.nan
+    n = 0
+    delta = 0.25*s2 - z0 - t
+    if delta >= 0:
+        sqrt_delta = math.sqrt(delta)
+        r1 = -0.5*s - sqrt_delta - a0
+        r2 = -0.5*s + sqrt_delta - a0
+        n += 2
+    delta = 0.25*s2 - z0 + t
+    if delta >= 0:
+        sqrt_delta = math.sqrt(delta)
+        r3 = 0.5*s - sqrt_delta - a0
+        r4 = 0.5*s + sqrt_delta - a0
+        n += 2
+
+    return r1, r2, r3, r4, n
+
+
+@jit(nopython=True, parallel=True, cache=True, error_model='numpy')
+def batch_cubic(p, out):
+    ''' Multicore solver for multiple cubic equations, gives all three
+    roots. Rows are distributed over all available cores and each one is
+    solved by `single_cubic`.
+
+    Parameters
+    ----------
+    p: ndarray
+        Coefficients of the Cubic polynomials, of size ``(M, 4)``::
+
+            p[:, 0]*x^3 + p[:, 1]*x^2 + p[:, 2]*x + p[:, 3] = 0
+
+    out: ndarray
+        Preallocated complex array of size ``(M, 3)`` receiving the roots.
+
+    Returns
+    -------
+    out: ndarray
+        The `out` array, filled with the roots of given polynomials.
+    '''
+    for i in prange(p.shape[0]):
+        r1, r2, r3 = single_cubic(p[i, 0], p[i, 1], p[i, 2], p[i, 3])
+        out[i, 0] = r1
+        out[i, 1] = r2
+        out[i, 2] = r3
+    return out
+
+
+@jit(nopython=True, parallel=True, cache=True, error_model='numpy')
+def batch_cubic_one(p, out):
+    ''' Multicore solver for multiple cubic equations, gives only one real
+    root per equation. Rows are distributed over all available cores and each
+    one is solved by `single_cubic_one`.
+
+    Parameters
+    ----------
+    p: ndarray
+        Coefficients of the Cubic polynomials, of size ``(M, 4)``.
+
+    out: ndarray
+        Preallocated array of size ``(M,)`` receiving the real roots.
+
+    Returns
+    -------
+    out: ndarray
+        The `out` array, filled with one real root of each polynomial.
+    '''
+    for i in prange(p.shape[0]):
+        out[i] = single_cubic_one(p[i, 0], p[i, 1], p[i, 2], p[i, 3]).real
+    return out
+
+
+@jit(nopython=True, parallel=True, cache=True, error_model='numpy')
+def batch_quartic(p, out):
+    ''' Multicore solver for multiple quartic equations. Rows are
+    distributed over all available cores and each one is solved by
+    `single_quartic`.
+
+    Parameters
+    ----------
+    p: ndarray
+        Coefficients of the Quartic polynomials, of size ``(M, 5)``::
+
+            p[:, 0]*x^4 + p[:, 1]*x^3 + p[:, 2]*x^2 + p[:, 3]*x + p[:, 4] = 0
+
+    out: ndarray
+        Preallocated complex array of size ``(M, 4)`` receiving the roots.
+
+    Returns
+    -------
+    out: ndarray
+        The `out` array, filled with the roots of given polynomials.
+    '''
+    for i in prange(p.shape[0]):
+        r1, r2, r3, r4 = single_quartic(p[i, 0], p[i, 1], p[i, 2],
+                                        p[i, 3], p[i, 4])
+        out[i, 0] = r1
+        out[i, 1] = r2
+        out[i, 2] = r3
+        out[i, 3] = r4
+    return out
+
+
+@jit(nopython=True, parallel=True, cache=True, error_model='numpy')
+def batch_cubic_real(p, out, count):
+    ''' Multicore solver for the real roots of multiple cubic equations.
+    Each row is solved by `single_cubic_real`.
+
+    Parameters
+    ----------
+    p: ndarray
+        Coefficients of the Cubic polynomials, of size ``(M, 4)``.
+
+    out: ndarray
+        Preallocated real array of size ``(M, 3)`` receiving the roots.
+
+    count: ndarray
+        Preallocated integer array of size ``(M,)`` receiving the number of
+        real roots of each polynomial.
+
+    Returns
+    -------
+    out, count: ndarray
+        The `out` and `count` arrays, missing roots are `nan`.
+    '''
+    for i in prange(p.shape[0]):
+        r1, r2, r3, n = single_cubic_real(p[i, 0], p[i, 1], p[i, 2], p[i, 3])
+        out[i, 0] = r1
+        out[i, 1] = r2
+        out[i, 2] = r3
+        count[i] = n
+    return out, count
+
+
+@jit(nopython=True, parallel=True, cache=True, error_model='numpy')
+def batch_quartic_real(p, out, count):
+    ''' Multicore solver for the real roots of multiple quartic equations.
+    Each row is solved by `single_quartic_real`.
+
+    Parameters
+    ----------
+    p: ndarray
+        Coefficients of the Quartic polynomials, of size ``(M, 5)``.
+
+    out: ndarray
+        Preallocated real array of size ``(M, 4)`` receiving the roots.
+
+    count: ndarray
+        Preallocated integer array of size ``(M,)`` receiving the number of
+        real roots of each polynomial.
+
+    Returns
+    -------
+    out, count: ndarray
+        The `out` and `count` arrays, missing roots are `nan`.
+    '''
+    for i in prange(p.shape[0]):
+        r1, r2, r3, r4, n = single_quartic_real(p[i, 0], p[i, 1], p[i, 2],
+                                                p[i, 3], p[i, 4])
+        out[i, 0] = r1
+        out[i, 1] = r2
+        out[i, 2] = r3
+        out[i, 3] = r4
+        count[i] = n
+    return out, count
+
+
+@jit(nopython=True, cache=True, error_model='numpy')
+def horner(p, x):
+    ''' Value and first derivative of a polynomial, by Horner's scheme.
+
+    Parameters
+    ----------
+    p: ndarray
+        Coefficients of the polynomial, highest power first.
+
+    x: number
+        Real or complex point to evaluate the polynomial at.
+
+    Returns
+    -------
+    f, df: tuple
+        Values of the polynomial and of its derivative at `x`.
+    '''
+    f = x*0 + p[0]
+    df = x*0
+    for k in range(1, p.shape[0]):
+        df = df*x + f
+        f = f*x + p[k]
+    return f, df
+
+
+@jit(nopython=True, parallel=True, cache=True, error_model='numpy')
+def polish_roots(p, roots, n_iter):
+    ''' Refine roots of multiple polynomials in place by Newton's method,
+    applied to the original (not normalised) polynomials. A step is only
+    taken if it reduces the residual, so well-resolved roots are left alone
+    and repeated roots, where Newton converges slowly, are never degraded.
+
+    Parameters
+    ----------
+    p: ndarray
+        Coefficients of the polynomials, of size ``(M, N+1)``.
+
+    roots: ndarray
+        Real or complex roots of the polynomials, of size ``(M, N)``.
+        Missing roots (`nan`) are skipped.
+
+    n_iter: int
+        Maximum number of Newton steps per root.
+
+    Returns
+    -------
+    roots: ndarray
+        The `roots` array, refined in place.
+    '''
+    for i in prange(roots.shape[0]):
+        for j in range(roots.shape[1]):
+            x = roots[i, j]
+            if x != x:
+                continue
+            f, df = horner(p[i], x)
+            for _ in range(n_iter):
+                if f == 0 or df == 0:
+                    break
+                x_new = x - f / df
+                f_new, df_new = horner(p[i], x_new)
+                if abs(f_new) >= abs(f):
+                    break
+                x, f, df = x_new, f_new, df_new
+            roots[i, j] = x
+    return roots
+
+
 def multi_quadratic(a0, b0, c0):
     ''' Analytical solver for multiple quadratic equations
     (2nd order polynomial), based on `numpy` functions.
@@ -247,7 +726,122 @@ def multi_quadratic(a0, b0, c0):
     return r1, r2
 
 
-def multi_cubic(a0, b0, c0, d0, all_roots=True):
+class Workspace:
+    ''' Preallocated intermediate buffers for `multi_cubic` and
+    `multi_quartic`.
+
+    Passing the same workspace (and an `out` array) to repeated calls on
+    batches of at most `size` equations means the solvers do not allocate
+    any new arrays; every intermediate result is computed in place.
+
+    Parameters
+    ----------
+    size: int
+        Maximum number of equations solved with this workspace.
+
+    dtype: data-type, optional
+        Floating point type of the roots solved with this workspace,
+        ``float64`` (default) or ``float32``. The buffers always hold
+        double precision, as single precision intermediates lose most of
+        their digits to cancellation in the resolvent cubic, so a single
+        precision workspace is as large as a double precision one and
+        only the roots are narrowed.
+
+    Examples
+    --------
+    >>> ws = Workspace(4096)
+    >>> out = np.empty((4, 4096), dtype=complex)
+    >>> for p in batches:
+    ...     multi_quartic(*p.T, out=out, workspace=ws)
+    '''
+    # Number of buffers used by each solver
+    CUBIC_REAL = 15
+    QUARTIC_REAL = 12
+    QUARTIC_COMPLEX = 5
+    QUARTIC_MASKS = 2
+
+    def __init__(self, size, dtype=None):
+        self.size = size
+        self.dtype, self.complex_dtype = resolve_dtype(dtype)
+        self.cubic_real = np.empty((self.CUBIC_REAL, size), dtype=np.float64)
+        self.cubic_mask = np.empty(size, dtype=bool)
+        self.quartic_real = np.empty((self.QUARTIC_REAL, size),
+                                     dtype=np.float64)
+        self.quartic_complex = np.empty((self.QUARTIC_COMPLEX, size),
+                                        dtype=np.complex128)
+        self.quartic_masks = np.empty((self.QUARTIC_MASKS, size), dtype=bool)
+
+    def check(self, n):
+        ''' Raise if `n` equations do not fit into the workspace. '''
+        if n > self.size:
+            raise ValueError('Workspace holds {:d} equations, '
+                             'got {:d}.'.format(self.size, n))
+
+
+def cubic_fgh(a0, b0, c0, d0, workspace=None):
+    ''' Intermediate quantities of the closed-form cubic solution, which
+    also decide the nature of the roots: reducing the equation to
+    ``x^3 + a*x^2 + b*x + c = 0`` and substituting ``x = t - a/3`` gives
+    ``t^3 + 3f*t + 2g = 0``, whose discriminant is ``-108*h``.
+
+    Parameters
+    ----------
+    a0, b0, c0, d0: array_like
+        Input data are coefficients of the Cubic polynomial::
+
+            a0*x^3 + b0*x^2 + c0*x + d0 = 0
+
+    workspace: Workspace, optional
+        Buffers to compute in, see `multi_cubic`. The reduced coefficients
+        ``a, b, c`` and ``a/3``, ``(a/3)^2`` are left in the workspace.
+
+    Returns
+    -------
+    f, g, h: ndarray
+        ``f = b/3 - (a/3)^2``, ``g = (a/3)*(2*(a/3)^2 - b) + c`` and
+        ``h = g^2/4 + f^3``, views into the workspace. ``h > 0`` for one real
+        root and two complex conjugate roots, ``h < 0`` for three distinct
+        real roots and ``h == 0`` for repeated real roots, all three equal
+        when ``f == g == 0``.
+    '''
+    n = np.broadcast(a0, b0, c0, d0).size
+    if workspace is None:
+        workspace = Workspace(n, _working_dtype(a0, b0, c0, d0))
+    workspace.check(n)
+
+    a, b, c, a13, a2, f, g, h, tmp = workspace.cubic_real[:9, :n]
+
+    ''' Reduce the cubic equation to to form:
+        x^3 + a*x^2 + bx + c = 0'''
+    np.divide(b0, a0, out=a, dtype=a.dtype)
+    np.divide(c0, a0, out=b, dtype=b.dtype)
+    np.divide(d0, a0, out=c, dtype=c.dtype)
+
+    # Some repeating constants and variables
+    third = 1./3.
+    np.multiply(a, third, out=a13)
+    np.multiply(a13, a13, out=a2)
+
+    # Additional intermediate variables
+    # f = third*b - a2
+    np.multiply(b, third, out=f)
+    np.subtract(f, a2, out=f)
+    # g = a13 * (2*a2 - b) + c
+    np.multiply(a2, 2, out=tmp)
+    np.subtract(tmp, b, out=tmp)
+    np.multiply(a13, tmp, out=g)
+    np.add(g, c, out=g)
+    # h = 0.25*g*g + f*f*f
+    np.multiply(g, g, out=h)
+    np.multiply(h, 0.25, out=h)
+    np.multiply(f, f, out=tmp)
+    np.multiply(tmp, f, out=tmp)
+    np.add(h, tmp, out=h)
+
+    return f, g, h
+
+
+def multi_cubic(a0, b0, c0, d0, all_roots=True, out=None, workspace=None):
     ''' Analytical closed-form solver for multiple cubic equations
     (3rd order polynomial), based on `numpy` functions.
 
@@ -262,6 +856,17 @@ def multi_cubic(a0, b0, c0, d0, all_roots=True):
         If set to `True` (default) all three roots are computed and returned.
         If set to `False` only one (real) root is computed and returned.
 
+    out: ndarray, optional
+        Complex array of size (3, M) if `all_roots=True`, and real array of
+        size (M,) if `all_roots=False`, receiving the roots.
+
+    workspace: Workspace, optional
+        Buffers for intermediate results, allocated on every call if not
+        given. Roots are returned in the floating point type of the
+        workspace, intermediate results are always in double precision;
+        without one, single precision inputs give ``float32`` roots and
+        everything else ``float64``.
+
     Returns
     -------
     roots: ndarray
@@ -269,9 +874,266 @@ def multi_cubic(a0, b0, c0, d0, all_roots=True):
         (3, M) if `all_roots=True`, and an array of one root of size (M,)
         if `all_roots=False`.
     '''
+    n = np.broadcast(a0, b0, c0, d0).size
+    if workspace is None:
+        workspace = Workspace(n, _working_dtype(a0, b0, c0, d0))
+    workspace.check(n)
+    if out is None:
+        if all_roots:
+            out = np.empty((3, n), dtype=workspace.complex_dtype)
+        else:
+            out = np.empty(n, dtype=workspace.dtype)
 
-    ''' Reduce the cubic equation to to form:
-        x^3 + a*x^2 + bx + c = 0'''
+    (a, b, c, a13, a2, f, g, h, tmp,
+     j, k, m, nn, S, U) = workspace.cubic_real[:, :n]
+    mask = workspace.cubic_mask[:n]
+
+    recorder = _stats
+    if recorder is not None:
+        start = time.perf_counter()
+
+    cubic_fgh(a0, b0, c0, d0, workspace=workspace)
+
+    if recorder is not None:
+        start = recorder.stage('multi_cubic', 'normalize', start)
+        recorder.cubic_branches(f, g, h)
+
+    # Some repeating constants
+    third = 1./3.
+    sqr3 = math.sqrt(3)
+
+    # Real parts of the roots (only the first one if not `all_roots`)
+    if all_roots:
+        x1, x2, x3 = out.real
+        _, y2, y3 = out.imag
+        out.imag[0] = 0
+    else:
+        x1 = out
+
+    # All cases are evaluated over the whole batch in sequential sweeps and
+    # the right one is selected per row, rather than gathering and
+    # scattering each subset.
+
+    # Cardano's formula, exact wherever h >= 0: one real root and two
+    # complex (h > 0), or all roots real with at least two equal (h == 0)
+    # S, U = cbrt(-0.5*g +- sqrt(h))
+    np.maximum(h, 0, out=tmp)
+    np.sqrt(tmp, out=tmp)
+    np.multiply(g, -0.5, out=S)
+    np.subtract(S, tmp, out=U)
+    np.add(S, tmp, out=S)
+    np.cbrt(S, out=S)
+    np.cbrt(U, out=U)
+    # r1 = S + U - a13
+    np.add(S, U, out=tmp)
+    np.subtract(tmp, a13, out=x1)
+    if all_roots:
+        # r2, r3 = -0.5*(S + U) - a13 +- 0.5j*sqr3*(S - U)
+        np.multiply(tmp, -0.5, out=m)
+        np.subtract(m, a13, out=x2)
+        np.copyto(x3, x2)
+        np.subtract(S, U, out=y2)
+        np.multiply(y2, 0.5*sqr3, out=y2)
+        np.negative(y2, out=y3)
+
+    if recorder is not None:
+        start = recorder.stage('multi_cubic', 'cardano', start)
+
+    # Trigonometric formula where h < 0: roots are real and distinct. The
+    # imaginary parts are already zero there, since S == U.
+    np.less(h, 0, out=mask)
+    # j = sqrt(-f), k = arccos(-0.5*g / j^3) / 3
+    np.negative(f, out=j)
+    np.maximum(j, 0, out=j)
+    np.sqrt(j, out=j)
+    np.multiply(j, j, out=k)
+    np.multiply(k, j, out=k)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(g, k, out=k)
+    np.multiply(k, -0.5, out=k)
+    np.minimum(k, 1, out=k)
+    np.maximum(k, -1, out=k)
+    np.arccos(k, out=k)
+    np.multiply(k, third, out=k)
+    # r1 = 2*j*cos(k) - a13
+    np.cos(k, out=m)
+    np.multiply(j, m, out=tmp)
+    np.multiply(tmp, 2, out=tmp)
+    np.subtract(tmp, a13, out=tmp)
+    np.copyto(x1, tmp, where=mask)
+    if all_roots:
+        # r2, r3 = -j*(m +- sqr3*sin(k)) - a13
+        np.sin(k, out=nn)
+        np.multiply(nn, sqr3, out=nn)
+        for x, sign in ((x2, np.add), (x3, np.subtract)):
+            sign(m, nn, out=tmp)
+            np.multiply(tmp, j, out=tmp)
+            np.negative(tmp, out=tmp)
+            np.subtract(tmp, a13, out=tmp)
+            np.copyto(x, tmp, where=mask)
+
+    if recorder is not None:
+        recorder.stage('multi_cubic', 'trigonometric', start)
+
+    return out
+
+
+def multi_quartic(a0, b0, c0, d0, e0, out=None, workspace=None):
+    ''' Analytical closed-form solver for multiple quartic equations
+    (4th order polynomial), based on `numpy` functions. Calls
+    `multi_cubic`.
+
+    Parameters
+    ----------
+    a0, b0, c0, d0, e0: array_like
+        Input data are coefficients of the Quartic polynomial::
+
+            a0*x^4 + b0*x^3 + c0*x^2 + d0*x + e0 = 0
+
+    out: ndarray, optional
+        Complex array of size (4, M) receiving the roots.
+
+    workspace: Workspace, optional
+        Buffers for intermediate results, allocated on every call if not
+        given. Roots are returned in the floating point type of the
+        workspace, intermediate results are always in double precision;
+        without one, single precision inputs give ``float32`` roots and
+        everything else ``float64``.
+
+    Returns
+    -------
+    r1, r2, r3, r4: ndarray
+        Output data is an array of four roots of given polynomials, of size
+        (4, M).
+    '''
+    n = np.broadcast(a0, b0, c0, d0, e0).size
+    if workspace is None:
+        workspace = Workspace(n, _working_dtype(a0, b0, c0, d0, e0))
+    workspace.check(n)
+    if out is None:
+        out = np.empty((4, n), dtype=workspace.complex_dtype)
+
+    a, b, c, d, a4, a02, p, q, r, e, z0, tmp = workspace.quartic_real[:, :n]
+    s, t, u, delta1, delta2 = workspace.quartic_complex[:, :n]
+    mask, nmask = workspace.quartic_masks[:, :n]
+
+    recorder = _stats
+    if recorder is not None:
+        start = time.perf_counter()
+
+    ''' Reduce the quartic equation to to form:
+        x^4 ax^3 + bx^2 + cx + d = 0'''
+    np.divide(b0, a0, out=a, dtype=a.dtype)
+    np.divide(c0, a0, out=b, dtype=b.dtype)
+    np.divide(d0, a0, out=c, dtype=c.dtype)
+    np.divide(e0, a0, out=d, dtype=d.dtype)
+
+    # Some repeating variables, a4 = a/4 and a02 = a4^2
+    np.multiply(a, 0.25, out=a4)
+    np.multiply(a4, a4, out=a02)
+
+    # Coefficients of subsidiary cubic euqtion
+    # p = 3*a02 - 0.5*b
+    np.multiply(a02, 3, out=p)
+    np.multiply(b, 0.5, out=tmp)
+    np.subtract(p, tmp, out=p)
+    # q = a*a02 - b*a4 + 0.5*c
+    np.multiply(a, a02, out=q)
+    np.multiply(b, a4, out=tmp)
+    np.subtract(q, tmp, out=q)
+    np.multiply(c, 0.5, out=tmp)
+    np.add(q, tmp, out=q)
+    # r = 3*a02*a02 - b*a02 + c*a4 - d
+    np.multiply(a02, 3, out=r)
+    np.subtract(r, b, out=r)
+    np.multiply(r, a02, out=r)
+    np.multiply(c, a4, out=tmp)
+    np.add(r, tmp, out=r)
+    np.subtract(r, d, out=r)
+    # e = p*r - 0.5*q*q
+    np.multiply(p, r, out=e)
+    np.multiply(q, q, out=tmp)
+    np.multiply(tmp, 0.5, out=tmp)
+    np.subtract(e, tmp, out=e)
+
+    if recorder is not None:
+        start = recorder.stage('multi_quartic', 'normalize', start)
+
+    # One root of the cubic equation
+    multi_cubic(1, p, r, e, all_roots=False, out=z0, workspace=workspace)
+
+    if recorder is not None:
+        start = recorder.stage('multi_quartic', 'resolvent', start)
+
+    # Additional variables
+    # s = sqrt(2*p + 2*z0)
+    np.add(p, z0, out=tmp)
+    np.multiply(tmp, 2, out=tmp)
+    np.copyto(s, tmp)
+    np.sqrt(s, out=s)
+    # t = sqrt(z0*z0 + r) if s == 0 else -q / s
+    np.equal(s, 0, out=mask)
+    np.logical_not(mask, out=nmask)
+    np.copyto(t, q)
+    np.divide(t, s, out=t, where=nmask)
+    np.negative(t, out=t, where=nmask)
+    np.multiply(z0, z0, out=tmp)
+    np.add(tmp, r, out=tmp)
+    np.copyto(t, tmp, where=mask)
+    np.sqrt(t, out=t, where=mask)
+
+    # Compute roots by quadratic equations
+    # x^2 + s*x + (z0 + t) and x^2 - s*x + (z0 - t), with u = -0.5*s
+    # (real operands are copied to complex buffers first, mixed-type
+    # ufuncs would allocate casting buffers)
+    np.multiply(s, -0.5, out=u)
+    np.copyto(delta2, z0)
+    np.multiply(u, u, out=delta1)
+    np.subtract(delta1, delta2, out=delta1)
+    np.add(delta1, t, out=delta2)
+    np.subtract(delta1, t, out=delta1)
+    np.sqrt(delta1, out=delta1)
+    np.sqrt(delta2, out=delta2)
+
+    # Roots are centred on u - a4 and -u - a4, computed in `s` and `t` so
+    # that the roots are rounded to the type of `out` only once
+    r0, r1, r2, r3 = out
+    np.copyto(t, a4)
+    np.subtract(u, t, out=s)
+    np.add(s, delta1, out=r1)
+    np.subtract(s, delta1, out=r0)
+    np.add(u, t, out=s)
+    np.negative(s, out=s)
+    np.add(s, delta2, out=r3)
+    np.subtract(s, delta2, out=r2)
+
+    if recorder is not None:
+        recorder.stage('multi_quartic', 'quadratic', start)
+        zero = np.count_nonzero(mask)
+        recorder.branch('multi_quartic', 's_zero', zero)
+        recorder.branch('multi_quartic', 's_nonzero', n - zero)
+
+    return out
+
+
+def multi_cubic_real(a0, b0, c0, d0):
+    ''' Analytical closed-form solver for the real roots of multiple cubic
+    equations (3rd order polynomial), based on `numpy` functions and using
+    only real arithmetic.
+
+    Parameters
+    ----------
+    a0, b0, c0, d0: array_like
+        Input data are coefficients of the Cubic polynomial::
+
+            a0*x^3 + b0*x^2 + c0*x + d0 = 0
+
+    Returns
+    -------
+    roots: ndarray
+        Output data is an array of three real roots of given polynomials,
+        of size (3, M), the largest root first. Missing roots are `nan`.
+    '''
     a, b, c = b0 / a0, c0 / a0, d0 / a0
 
     # Some repeating constants and variables
@@ -284,81 +1146,35 @@ def multi_cubic(a0, b0, c0, d0, all_roots=True):
     f = third*b - a2
     g = a13 * (2*a2 - b) + c
     h = 0.25*g*g + f*f*f
-
-    # Masks for different combinations of roots
-    m1 = (f == 0) & (g == 0) & (h == 0)     # roots are real and equal
-    m2 = (~m1) & (h <= 0)                   # roots are real and distinct
-    m3 = (~m1) & (~m2)                      # one real root and two complex
-
-    def cubic_root(x):
-        ''' Compute cubic root of a number while maintaining its sign
-        '''
-        root = np.zeros_like(x)
-        positive = (x >= 0)
-        negative = ~positive
-        root[positive] = x[positive]**third
-        root[negative] = -(-x[negative])**third
-        return root
-
-    def roots_all_real_equal(c):
-        ''' Compute cubic roots if all roots are real and equal
-        '''
-        r1 = -cubic_root(c)
-        if all_roots:
-            return r1, r1, r1
-        else:
-            return r1
-
-    def roots_all_real_distinct(a13, f, g):
-        ''' Compute cubic roots if all roots are real and distinct
-        '''
+    complex_pair = h > REAL_TOLERANCE * (0.25*g*g + np.abs(f*f*f))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Cardano's formula where h > 0, only the first root is real and the
+        # other two are missing, and for a triple root (f == g == h == 0)
+        sqrt_h = np.sqrt(np.maximum(h, 0))
+        S = np.cbrt(-0.5*g + sqrt_h)
+        U = np.cbrt(-0.5*g - sqrt_h)
+        r23 = np.where(complex_pair, np.nan, -0.5*(S + U) - a13)
+        roots = np.stack([S + U - a13, r23, r23])
+
+        # Trigonometric formula where h <= 0 (within `REAL_TOLERANCE`)
+        # otherwise, so f < 0: all roots are real, and the first one is the
+        # largest also where two are equal, which `multi_quartic_real`
+        # relies on
         j = np.sqrt(-f)
-        k = np.arccos(-0.5*g / (j*j*j))
+        k = np.arccos(np.clip(-0.5*g / (j*j*j), -1, 1))
         m = np.cos(third*k)
-        r1 = 2*j*m - a13
-        if all_roots:
-            n = sqr3 * np.sin(third*k)
-            r2 = -j * (m + n) - a13
-            r3 = -j * (m - n) - a13
-            return r1, r2, r3
-        else:
-            return r1
-
-    def roots_one_real(a13, g, h):
-        ''' Compute cubic roots if one root is real and other two are complex
-        '''
-        sqrt_h = np.sqrt(h)
-        S = cubic_root(-0.5*g + sqrt_h)
-        U = cubic_root(-0.5*g - sqrt_h)
-        SPU = S + U
-        r1 = SPU - a13
-        if all_roots:
-            SMU = S - U
-            r2 = -0.5*SPU - a13 + SMU*sqr3*0.5j
-            r3 = -0.5*SPU - a13 - SMU*sqr3*0.5j
-            return r1, r2, r3
-        else:
-            return r1
-
-    # Compute roots
-    if all_roots:
-        roots = np.zeros((3, len(a))).astype(complex)
-        roots[:, m1] = roots_all_real_equal(c[m1])
-        roots[:, m2] = roots_all_real_distinct(a13[m2], f[m2], g[m2])
-        roots[:, m3] = roots_one_real(a13[m3], g[m3], h[m3])
-    else:
-        roots = np.zeros(len(a))  # .astype(complex)
-        roots[m1] = roots_all_real_equal(c[m1])
-        roots[m2] = roots_all_real_distinct(a13[m2], f[m2], g[m2])
-        roots[m3] = roots_one_real(a13[m3], g[m3], h[m3])
+        n = sqr3 * np.sin(third*k)
+        trig = np.stack([2*j*m - a13, -j*(m + n) - a13, -j*(m - n) - a13])
+        np.copyto(roots, trig, where=~complex_pair & (f < 0))
 
     return roots
 
 
-def multi_quartic(a0, b0, c0, d0, e0):
-    ''' Analytical closed-form solver for multiple quartic equations
-    (4th order polynomial), based on `numpy` functions. Calls
-    `multi_cubic` and `multi_quadratic`.
+def multi_quartic_real(a0, b0, c0, d0, e0):
+    ''' Analytical closed-form solver for the real roots of multiple
+    quartic equations (4th order polynomial), based on `numpy` functions and
+    using only real arithmetic. Calls `multi_cubic_real`.
 
     Parameters
     ----------
@@ -369,12 +1185,10 @@ def multi_quartic(a0, b0, c0, d0, e0):
 
     Returns
     -------
-    r1, r2, r3, r4: ndarray
-        Output data is an array of four roots of given polynomials.
+    roots: ndarray
+        Output data is an array of four real roots of given polynomials,
+        of size (4, M). Missing roots are `nan`.
     '''
-
-    ''' Reduce the quartic equation to to form:
-        x^4 ax^3 + bx^2 + cx + d = 0'''
     a, b, c, d = b0/a0, c0/a0, d0/a0, e0/a0
 
     # Some repeating variables
@@ -386,32 +1200,70 @@ def multi_quartic(a0, b0, c0, d0, e0):
     q = a*a02 - b*a0 + 0.5*c
     r = 3*a02*a02 - b*a02 + c*a0 - d
 
-    # One root of the cubic equation
-    z0 = multi_cubic(1, p, r, p*r - 0.5*q*q, all_roots=False)
+    # Largest real root of the cubic equation, it splits the quartic into
+    # two quadratics with real coefficients
+    z0 = multi_cubic_real(1, p, r, p*r - 0.5*q*q)[0]
 
-    # Additional variables
-    s = np.sqrt(2*p + 2*z0.real + 0j)
-    t = np.zeros_like(s)
-    mask = (s == 0)
-    t[mask] = z0[mask]*z0[mask] + r[mask]
-    t[~mask] = -q[~mask] / s[~mask]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Additional variables; `t` is `nan` if both quadratics have complex
+        # coefficients, so all of the roots come out missing
+        s2 = np.maximum(2*p + 2*z0, 0)
+        s = np.sqrt(s2)
+        t = np.where(s == 0, np.sqrt(z0*z0 + r), -q / s)
 
-    # Compute roots by quadratic equations
-    r0, r1 = multi_quadratic(1, s, z0 + t) - a0
-    r2, r3 = multi_quadratic(1, -s, z0 - t) - a0
+        # Real roots of x^2 + s*x + (z0 + t) and x^2 - s*x + (z0 - t),
+        # `sqrt` of a negative discriminant gives the `nan` of missing roots
+        sqrt_d1 = np.sqrt(0.25*s2 - z0 - t)
+        sqrt_d2 = np.sqrt(0.25*s2 - z0 + t)
 
-    return r0, r1, r2, r3
+    return np.stack([-0.5*s - sqrt_d1 - a0, -0.5*s + sqrt_d1 - a0,
+                     0.5*s - sqrt_d2 - a0, 0.5*s + sqrt_d2 - a0])
+
+
+def _real_roots(roots, count=None):
+    ''' Sort real roots of each row in ascending order, missing roots
+    (`nan`) last, and count the real roots if not already known.
+    '''
+    roots = np.sort(roots, axis=1)
+    if count is None:
+        count = (~np.isnan(roots)).sum(axis=1).astype(np.int8)
+    return roots, count
 
 
-def cubic_roots(p):
+def _cubic_real_roots(p, backend, real):
+    ''' Real roots of cubic polynomials for `cubic_roots(real_only=True)`.
+    '''
+    if backend == 'single':
+        single = _scalar_kernel('single_cubic_real', real)
+        roots = np.array([single(*pi) for pi in p.astype(real, copy=False)])
+        return _real_roots(roots[:, :3].astype(real),
+                           roots[:, 3].astype(np.int8))
+    elif backend == 'parallel':
+        p = np.ascontiguousarray(p, dtype=real)
+        out = np.empty((p.shape[0], 3), dtype=real)
+        count = np.empty(p.shape[0], dtype=np.int8)
+        return _real_roots(*batch_cubic_real(p, out, count))
+    elif backend == 'numpy':
+        # Rounded to `real` like for the other backends, solved in double
+        # precision
+        p = p.astype(real, copy=False).astype(np.float64, copy=False)
+        return _real_roots(multi_cubic_real(*p.T).T.astype(real, copy=False))
+    else:
+        raise ValueError('Unknown backend {!r}, expected one of '
+                         '{}.'.format(backend, BACKENDS))
+
+
+def cubic_roots(p, backend=None, dtype=None, real_only=False,
+                polish=0):
     '''
     A caller function for a fast cubic root solver (3rd order polynomial).
 
-    If a single cubic equation or a set of fewer than 100 equations is
-    given as an input, this function will call `single_cubic` inside
-    a list comprehension. Otherwise (if a more than 100 equtions is given), it
-    will call `multi_cubic` which is based on `numpy` functions.
-    Both equations are based on a closed-form analytical solutions by Cardano.
+    Without a calibration profile (see `calibrate`) the equations are solved
+    by `batch_cubic`, which runs `single_cubic` over all rows in parallel on
+    every available core.
+    Alternatively `single_cubic` can be called inside a list comprehension,
+    or `multi_cubic`, which is based on `numpy` functions, can be used.
+    All of them are based on a closed-form analytical solutions by Cardano.
 
     Parameters
     ----------
@@ -425,11 +1277,42 @@ def cubic_roots(p):
         number of polynomials. Note that the first axis should be used for
         stacking.
 
+    backend: str, optional
+        One of ``'single'`` (compiled solver per row in a list comprehension),
+        ``'parallel'`` (multicore jitted batch kernel) or ``'numpy'``
+        (vectorized `numpy` solver). By default the fastest backend for the
+        batch size is picked from the profile measured by `calibrate`.
+
+    dtype: data-type, optional
+        ``float64`` (default) or ``float32``. Single precision only
+        changes the width of the coefficients read and of the roots
+        returned (``float32`` and ``complex64``), all backends compute in
+        double precision, and the `numpy` backend keeps its intermediate
+        arrays in double precision too, so it moves about as many bytes
+        per row as in double precision. Expect a relative accuracy of
+        about 1e-7 on well separated roots, the rounding of the roots to
+        single precision; clustered or nearly repeated roots lose further
+        digits, as they do in double precision.
+
+    real_only: bool, optional
+        If set to `True` only real roots are computed, in real arithmetic.
+        Repeated real roots stay real despite rounding, see
+        `REAL_TOLERANCE`.
+
+    polish: int, optional
+        Number of Newton steps refining every root on the original
+        polynomial, see `polish_roots`. Off by default.
+
     Returns
     -------
     roots: ndarray
         Output data is an array of three roots of given polynomials,
-        of size ``(M, 3)``.
+        of size ``(M, 3)``. If `real_only=True` it is a real array with the
+        real roots of each polynomial in ascending order, padded with `nan`.
+
+    count: ndarray
+        Only returned if `real_only=True`: the number of real roots of each
+        polynomial, counted with multiplicity, of size ``(M,)``.
 
     Examples
     --------
@@ -450,6 +1333,10 @@ def cubic_roots(p):
            [ 25.80760451+0.j        , -31.51667909+0.j        ,
              -1.29092543+0.j        ]])
     '''
+    recorder = _stats
+    if recorder is not None:
+        start = time.perf_counter()
+
     # Convert input to array (if input is a list or tuple)
     p = np.asarray(p)
 
@@ -462,23 +1349,75 @@ def cubic_roots(p):
         raise ValueError('Expected 3rd order polynomial with 4 '
                          'coefficients, got {:d}.'.format(p.shape[1]))
 
-    if p.shape[0] < 100:
-        roots = [single_cubic(*pi) for pi in p]
-        return np.array(roots)
+    real, cplx = resolve_dtype(dtype)
+    if backend is None:
+        backend = select_backend('cubic', p.shape[0], real.name)
+    if recorder is not None:
+        dispatched = time.perf_counter()
+
+    if real_only:
+        roots, count = _cubic_real_roots(p, backend, real)
+    elif backend == 'single':
+        single = _scalar_kernel('single_cubic', real)
+        roots = [single(*pi) for pi in p.astype(real, copy=False)]
+        roots = np.array(roots, dtype=cplx)
+    elif backend == 'parallel':
+        roots = batch_cubic(np.ascontiguousarray(p, dtype=real),
+                            np.empty((p.shape[0], 3), dtype=cplx))
+    elif backend == 'numpy':
+        roots = multi_cubic(*p.astype(real, copy=False).T).T
     else:
-        roots = multi_cubic(*p.T)
-        return np.array(roots).T
+        raise ValueError('Unknown backend {!r}, expected one of '
+                         '{}.'.format(backend, BACKENDS))
 
+    if polish:
+        polish_roots(np.ascontiguousarray(p, dtype=real), roots, polish)
+        if real_only:
+            roots.sort(axis=1)
 
-def quartic_roots(p):
+    if recorder is not None:
+        recorder.call('cubic' + ('_real' if real_only else ''), backend,
+                      p.shape[0], start, dispatched)
+
+    if real_only:
+        return roots, count
+    return roots
+
+
+def _quartic_real_roots(p, backend, real):
+    ''' Real roots of quartic polynomials for `quartic_roots(real_only=True)`.
+    '''
+    if backend == 'single':
+        single = _scalar_kernel('single_quartic_real', real)
+        roots = np.array([single(*pi) for pi in p.astype(real, copy=False)])
+        return _real_roots(roots[:, :4].astype(real),
+                           roots[:, 4].astype(np.int8))
+    elif backend == 'parallel':
+        p = np.ascontiguousarray(p, dtype=real)
+        out = np.empty((p.shape[0], 4), dtype=real)
+        count = np.empty(p.shape[0], dtype=np.int8)
+        return _real_roots(*batch_quartic_real(p, out, count))
+    elif backend == 'numpy':
+        # Rounded to `real` like for the other backends, solved in double
+        # precision
+        p = p.astype(real, copy=False).astype(np.float64, copy=False)
+        return _real_roots(multi_quartic_real(*p.T).T.astype(real, copy=False))
+    else:
+        raise ValueError('Unknown backend {!r}, expected one of '
+                         '{}.'.format(backend, BACKENDS))
+
+
+def quartic_roots(p, backend=None, dtype=None, real_only=False,
+                  polish=0):
     '''
     A caller function for a fast quartic root solver (4th order polynomial).
 
-    If a single quartic equation or a set of fewer than 100 equations is
-    given as an input, this function will call `single_quartic` inside
-    a list comprehension. Otherwise (if a more than 100 equtions is given), it
-    will call `multi_quartic` which is based on `numpy` functions.
-    Both equations are based on a closed-form analytical solutions by Ferrari
+    Without a calibration profile (see `calibrate`) the equations are solved
+    by `batch_quartic`, which runs `single_quartic` over all rows in parallel
+    on every available core.
+    Alternatively `single_quartic` can be called inside a list comprehension,
+    or `multi_quartic`, which is based on `numpy` functions, can be used.
+    All of them are based on a closed-form analytical solutions by Ferrari
     and Cardano.
 
     Parameters
@@ -493,11 +1432,40 @@ def quartic_roots(p):
         number of polynomials. Note that the first axis should be used for
         stacking.
 
+    backend: str, optional
+        One of ``'single'`` (compiled solver per row in a list comprehension),
+        ``'parallel'`` (multicore jitted batch kernel) or ``'numpy'``
+        (vectorized `numpy` solver). By default the fastest backend for the
+        batch size is picked from the profile measured by `calibrate`.
+
+    dtype: data-type, optional
+        ``float64`` (default) or ``float32``. Single precision only
+        changes the width of the coefficients read and of the roots
+        returned (``float32`` and ``complex64``), all backends compute in
+        double precision, and the `numpy` backend keeps its intermediate
+        arrays in double precision too, so it moves about as many bytes
+        per row as in double precision. Expect a relative accuracy of
+        about 1e-7 on well separated roots, the rounding of the roots to
+        single precision; clustered or nearly repeated roots lose further
+        digits, as they do in double precision.
+
+    real_only: bool, optional
+        If set to `True` only real roots are computed, in real arithmetic.
+
+    polish: int, optional
+        Number of Newton steps refining every root on the original
+        polynomial, see `polish_roots`. Off by default.
+
     Returns
     -------
     roots: ndarray
         Output data is an array of four roots of given polynomials,
-        of size ``(M, 4)``.
+        of size ``(M, 4)``. If `real_only=True` it is a real array with the
+        real roots of each polynomial in ascending order, padded with `nan`.
+
+    count: ndarray
+        Only returned if `real_only=True`: the number of real roots of each
+        polynomial, counted with multiplicity, of size ``(M,)``.
 
     Examples
     --------
@@ -519,6 +1487,10 @@ def quartic_roots(p):
            [-30.76994812-0.j        ,  -7.60101564+0.j        ,
               6.61999319+0.j        ,  24.75097057-0.j        ]])
     '''
+    recorder = _stats
+    if recorder is not None:
+        start = time.perf_counter()
+
     # Convert input to an array (if input is a list or tuple)
     p: np.ndarray = np.asarray(p)
 
@@ -531,9 +1503,563 @@ def quartic_roots(p):
         raise ValueError('Expected 4th order polynomial with 5 '
                          'coefficients, got {:d}.'.format(p.shape[1]))
 
-    if p.shape[0] < 100:
-        roots = [single_quartic(*pi) for pi in p]
-        return np.array(roots)
+    real, cplx = resolve_dtype(dtype)
+    if backend is None:
+        backend = select_backend('quartic', p.shape[0], real.name)
+    if recorder is not None:
+        dispatched = time.perf_counter()
+
+    if real_only:
+        roots, count = _quartic_real_roots(p, backend, real)
+    elif backend == 'single':
+        single = _scalar_kernel('single_quartic', real)
+        roots = [single(*pi) for pi in p.astype(real, copy=False)]
+        roots = np.array(roots, dtype=cplx)
+    elif backend == 'parallel':
+        roots = batch_quartic(np.ascontiguousarray(p, dtype=real),
+                              np.empty((p.shape[0], 4), dtype=cplx))
+    elif backend == 'numpy':
+        roots = multi_quartic(*p.astype(real, copy=False).T).T
     else:
-        roots = multi_quartic(*p.T)
-        return np.array(roots).T
+        raise ValueError('Unknown backend {!r}, expected one of '
+                         '{}.'.format(backend, BACKENDS))
+
+    if polish:
+        polish_roots(np.ascontiguousarray(p, dtype=real), roots, polish)
+        if real_only:
+            roots.sort(axis=1)
+
+    if recorder is not None:
+        recorder.call('quartic' + ('_real' if real_only else ''), backend,
+                      p.shape[0], start, dispatched)
+
+    if real_only:
+        return roots, count
+    return roots
+
+
+class _Stats:
+    ''' Counters and timers recorded by the solvers while instrumentation
+    is enabled, see `stats` for their layout. Safe to update from several
+    threads.
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.branches = {}
+        self.backends = {}
+
+    def stage(self, solver, name, start):
+        ''' Add the time since `start` to a stage of `solver` and return the
+        current time, the start of the next stage.
+        '''
+        now = time.perf_counter()
+        with self.lock:
+            entry = self.stages.setdefault(solver, {}).setdefault(
+                name, {'calls': 0, 'seconds': 0.0})
+            entry['calls'] += 1
+            entry['seconds'] += now - start
+        return time.perf_counter()
+
+    def branch(self, solver, name, rows):
+        ''' Count `rows` rows of `solver` that took branch `name`. '''
+        with self.lock:
+            counts = self.branches.setdefault(solver, {})
+            counts[name] = counts.get(name, 0) + int(rows)
+
+    def cubic_branches(self, f, g, h):
+        ''' Count the rows of `multi_cubic` by the nature of their roots,
+        named as the masks of the original solver: three equal real roots
+        (``m1``), three real roots, some possibly equal (``m2``), and one
+        real and two complex conjugate roots (``m3``).
+        '''
+        m1 = np.count_nonzero((f == 0) & (g == 0) & (h == 0))
+        m3 = np.count_nonzero(h > 0)
+        self.branch('multi_cubic', 'm1', m1)
+        self.branch('multi_cubic', 'm2', h.size - m1 - m3)
+        self.branch('multi_cubic', 'm3', m3)
+
+    def call(self, kind, backend, rows, start, dispatched):
+        ''' Record a call of `cubic_roots` or `quartic_roots` solving `rows`
+        rows with `backend`, started at `start` and done choosing the
+        backend at `dispatched`.
+        '''
+        now = time.perf_counter()
+        # Batch sizes are binned by the next power of two
+        size = rows and 1 << (rows - 1).bit_length()
+        with self.lock:
+            entry = self.backends.setdefault(kind, {}).setdefault(
+                backend, {'calls': 0, 'rows': 0, 'seconds': 0.0,
+                          'dispatch_seconds': 0.0, 'sizes': {}})
+            entry['calls'] += 1
+            entry['rows'] += rows
+            entry['seconds'] += now - start
+            entry['dispatch_seconds'] += dispatched - start
+            entry['sizes'][size] = entry['sizes'].get(size, 0) + 1
+
+    def snapshot(self, reset=False):
+        ''' Copy of all counters, zeroed afterwards if `reset`. '''
+        with self.lock:
+            snapshot = copy.deepcopy({'stages': self.stages,
+                                      'branches': self.branches,
+                                      'backends': self.backends})
+            if reset:
+                self.stages, self.branches, self.backends = {}, {}, {}
+        return snapshot
+
+
+def enable_stats(enabled=True):
+    ''' Turn the instrumentation of the solvers on or off.
+
+    While enabled, `multi_cubic`, `multi_quartic`, `cubic_roots` and
+    `quartic_roots` record where their time goes, read by `stats`. While
+    disabled (the default, unless the `FQS_STATS` environment variable is
+    set to a value other than ``0``) each of them only checks a global,
+    and the counters recorded so far stay readable.
+
+    Parameters
+    ----------
+    enabled: bool, optional
+        Whether to record. Turning recording on starts from zero counters
+        unless it is already on.
+    '''
+    global _stats, _collected
+
+    if not enabled:
+        _stats = None
+    elif _stats is None:
+        _stats = _collected = _Stats()
+
+
+if os.environ.get('FQS_STATS', '0') not in ('', '0'):
+    enable_stats()
+
+
+def stats(reset=False):
+    ''' Snapshot of the counters and timers recorded since instrumentation
+    was enabled (see `enable_stats`) or last reset. Counters are per
+    process, workers of a `ProcessPoolSolver` keep their own.
+
+    Parameters
+    ----------
+    reset: bool, optional
+        Zero the counters after taking the snapshot.
+
+    Returns
+    -------
+    stats: dict
+        Nested dictionaries, empty until something was recorded:
+
+        ``stages[solver][stage]``
+            ``calls`` and total ``seconds`` of each stage of the `numpy`
+            solvers: ``'normalize'`` (reduction to a monic equation and
+            its intermediate variables), ``'cardano'`` and
+            ``'trigonometric'`` of `multi_cubic`; ``'normalize'``,
+            ``'resolvent'`` (the resolvent cubic, whose own stages are
+            also recorded under `multi_cubic`) and ``'quadratic'`` (the
+            split into two quadratics) of `multi_quartic`.
+
+        ``branches[solver][branch]``
+            Number of rows taking each branch: ``'m1'``, ``'m2'`` and
+            ``'m3'`` of `multi_cubic` (three equal real roots, three real
+            roots, one real root), ``'s_zero'`` and ``'s_nonzero'`` of
+            `multi_quartic` (whether the resolvent root gives ``s == 0``).
+
+        ``backends[kind][backend]``
+            Per ``'cubic'``, ``'quartic'``, ``'cubic_real'`` and
+            ``'quartic_real'`` calls of `cubic_roots` and `quartic_roots`
+            and each backend used: the number of ``calls`` and ``rows``,
+            total ``seconds``, the ``dispatch_seconds`` spent before the
+            backend is called (input conversion, checks and backend
+            selection), and ``sizes``, a histogram of the number of calls
+            by batch size rounded up to a power of two.
+
+    Examples
+    --------
+    >>> enable_stats()
+    >>> roots = quartic_roots(np.random.rand(1000, 5), backend='numpy')
+    >>> stats(reset=True)['backends']['quartic']['numpy']['sizes']
+    {1024: 1}
+    '''
+    if _collected is None:
+        return {'stages': {}, 'branches': {}, 'backends': {}}
+    return _collected.snapshot(reset)
+
+
+def load_profile(path=None):
+    ''' Load the dispatch profile written by `calibrate` and use it for all
+    subsequent calls of `cubic_roots` and `quartic_roots`.
+
+    Parameters
+    ----------
+    path: str, optional
+        Location of the profile, `PROFILE_PATH` by default.
+
+    Returns
+    -------
+    profile: dict
+        Crossover points per degree and dtype, empty if no profile exists.
+    '''
+    global _profile
+
+    try:
+        with open(path or PROFILE_PATH) as f:
+            _profile = json.load(f)
+    except (OSError, ValueError):
+        _profile = {}
+    return _profile
+
+
+def select_backend(kind, size, dtype='float64'):
+    ''' Pick the fastest backend for a batch of `size` polynomials.
+
+    Parameters
+    ----------
+    kind: str
+        Either ``'cubic'`` or ``'quartic'``.
+
+    size: int
+        Number of polynomials in the batch.
+
+    dtype: str, optional
+        Name of the floating point type the batch is solved in.
+
+    Returns
+    -------
+    backend: str
+        One of `BACKENDS`, `DEFAULT_BACKEND` if the batch is not covered by
+        the calibration profile.
+    '''
+    profile = _profile if _profile is not None else load_profile()
+    crossovers = profile.get(kind, {}).get(dtype)
+    if not crossovers:
+        return DEFAULT_BACKEND
+
+    # Crossovers are sorted `[min_size, backend]` pairs
+    backend = crossovers[0][1]
+    for min_size, name in crossovers:
+        if size < min_size:
+            break
+        backend = name
+    return backend
+
+
+def calibrate(sizes=(1, 10, 100, 1000, 10000, 100000),
+              dtypes=('float64', 'float32'), repeat=5, path=None, seed=0):
+    ''' Benchmark every backend of `cubic_roots` and `quartic_roots` across
+    batch sizes, store the crossover points on disk and use them for
+    dispatching from now on.
+
+    A backend that is more than ten times slower than the best one at some
+    size is not timed for larger batches.
+
+    Parameters
+    ----------
+    sizes: sequence of int, optional
+        Batch sizes to measure, in increasing order.
+
+    dtypes: sequence of str, optional
+        Floating point types to measure, see `resolve_dtype`.
+
+    repeat: int, optional
+        Number of timed runs per measurement, the fastest one is kept.
+
+    path: str, optional
+        Where to store the profile, `PROFILE_PATH` by default.
+
+    seed: int, optional
+        Seed for the random test polynomials.
+
+    Returns
+    -------
+    profile: dict
+        Mapping ``{kind: {dtype: [[min_size, backend], ...]}}``.
+    '''
+    global _profile
+
+    rng = np.random.default_rng(seed)
+    kinds = {'cubic': (cubic_roots, 4), 'quartic': (quartic_roots, 5)}
+    profile = {}
+
+    for kind, (solver, ncoeff) in kinds.items():
+        profile[kind] = {}
+        for dtype in dtypes:
+            real, _ = resolve_dtype(dtype)
+            alive = list(BACKENDS)
+            crossovers = []
+            for size in sizes:
+                p = rng.standard_normal((size, ncoeff)).astype(real)
+                timings = {}
+                for backend in alive:
+                    solver(p, backend=backend, dtype=real)  # warm-up, JIT
+                    best = math.inf
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        solver(p, backend=backend, dtype=real)
+                        best = min(best, time.perf_counter() - start)
+                    timings[backend] = best
+
+                fastest = min(timings, key=timings.get)
+                alive = [b for b in alive
+                         if timings[b] < 10*timings[fastest]]
+                if not crossovers or crossovers[-1][1] != fastest:
+                    crossovers.append([size, fastest])
+            profile[kind][real.name] = crossovers
+
+    path = path or PROFILE_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2)
+
+    _profile = profile
+    return profile
+
+
+def _iter_chunks(p, ncoeff, chunk_size):
+    ''' Split coefficient rows into blocks of at most `chunk_size` rows.
+
+    Arrays are sliced without copying; any other iterable is consumed
+    lazily, so only one block of rows is ever materialised at a time.
+    '''
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive, '
+                         'got {:d}.'.format(chunk_size))
+
+    if isinstance(p, np.ndarray):
+        if p.ndim < 2:
+            p = p[np.newaxis, :]
+        for start in range(0, p.shape[0], chunk_size):
+            yield p[start:start + chunk_size]
+        return
+
+    rows = iter(p)
+    while True:
+        block = np.array(list(itertools.islice(rows, chunk_size)))
+        if block.size == 0:
+            return
+        if block.ndim < 2 or block.shape[1] != ncoeff:
+            raise ValueError('Expected rows of {:d} coefficients, got '
+                             'block of shape {}.'.format(ncoeff, block.shape))
+        yield block
+
+
+def iter_cubic_roots(p, chunk_size=CHUNK_SIZE, backend=None, dtype=None,
+                     real_only=False, polish=0):
+    '''
+    Streaming variant of `cubic_roots` for very large inputs.
+
+    Coefficient rows are consumed in blocks of `chunk_size` and the roots of
+    each block are yielded as soon as they are computed, so peak memory is
+    bounded by `chunk_size` rather than by the number of polynomials.
+
+    Parameters
+    ----------
+    p: array_like or iterable
+        Either an array of size ``(M, 4)`` or any iterable yielding rows of
+        four coefficients (for example a generator reading from a file).
+
+    chunk_size: int, optional
+        Maximum number of rows solved per block.
+
+    backend, dtype, real_only, polish: optional
+        Passed on to `cubic_roots` for every block.
+
+    Yields
+    ------
+    roots: ndarray
+        Roots of consecutive blocks of polynomials, each of size ``(m, 3)``
+        with ``m <= chunk_size``, as returned by `cubic_roots`, i.e. with
+        their real root counts if `real_only` is set.
+
+    Examples
+    --------
+    >>> p = np.random.rand(10**6, 4)
+    >>> roots = np.concatenate(list(iter_cubic_roots(p, chunk_size=2**16)))
+    '''
+    for block in _iter_chunks(p, 4, chunk_size):
+        yield cubic_roots(block, backend=backend, dtype=dtype,
+                          real_only=real_only, polish=polish)
+
+
+def iter_quartic_roots(p, chunk_size=CHUNK_SIZE, backend=None, dtype=None,
+                       real_only=False, polish=0):
+    '''
+    Streaming variant of `quartic_roots` for very large inputs.
+
+    Coefficient rows are consumed in blocks of `chunk_size` and the roots of
+    each block are yielded as soon as they are computed, so peak memory is
+    bounded by `chunk_size` rather than by the number of polynomials.
+
+    Parameters
+    ----------
+    p: array_like or iterable
+        Either an array of size ``(M, 5)`` or any iterable yielding rows of
+        five coefficients (for example a generator reading from a file).
+
+    chunk_size: int, optional
+        Maximum number of rows solved per block.
+
+    backend, dtype, real_only, polish: optional
+        Passed on to `quartic_roots` for every block.
+
+    Yields
+    ------
+    roots: ndarray
+        Roots of consecutive blocks of polynomials, each of size ``(m, 4)``
+        with ``m <= chunk_size``, as returned by `quartic_roots`, i.e. with
+        their real root counts if `real_only` is set.
+
+    Examples
+    --------
+    >>> p = np.random.rand(10**6, 5)
+    >>> roots = np.concatenate(list(iter_quartic_roots(p, chunk_size=2**16)))
+    '''
+    for block in _iter_chunks(p, 5, chunk_size):
+        yield quartic_roots(block, backend=backend, dtype=dtype,
+                            real_only=real_only, polish=polish)
+
+
+def _pool_init():
+    ''' Warm up a `ProcessPoolSolver` worker so the first real request does
+    not pay for it.
+    '''
+    p = np.ones((1, 5))
+    multi_quartic(*p.T)
+    multi_cubic(*p[:, :4].T)
+
+
+def _pool_attach(kind, name):
+    ''' Attach to a shared memory segment, reusing the attachment if the
+    parent has not replaced the segment since the previous task.
+    '''
+    cached = _attached.get(kind)
+    if cached is not None and cached.name == name:
+        return cached
+    if cached is not None:
+        cached.close()
+    shm = shared_memory.SharedMemory(name=name)
+    _attached[kind] = shm
+    return shm
+
+
+def _pool_solve(kind, in_name, out_name, capacity, start, stop):
+    ''' Solve rows ``start:stop`` of the shared coefficient array and write
+    their roots into the shared output array. Runs in a worker process.
+    '''
+    ncoeff, solver = {'cubic': (4, multi_cubic),
+                      'quartic': (5, multi_quartic)}[kind]
+    shm_in = _pool_attach(kind + '-in', in_name)
+    shm_out = _pool_attach(kind + '-out', out_name)
+    p = np.ndarray((capacity, ncoeff), dtype=np.float64, buffer=shm_in.buf)
+    out = np.ndarray((capacity, ncoeff - 1), dtype=complex,
+                     buffer=shm_out.buf)
+
+    global _workspace
+    if _workspace is None:
+        _workspace = Workspace(CHUNK_SIZE)
+
+    for lo in range(start, stop, CHUNK_SIZE):
+        hi = min(lo + CHUNK_SIZE, stop)
+        solver(*p[lo:hi].T, out=out[lo:hi].T, workspace=_workspace)
+
+
+class ProcessPoolSolver:
+    '''
+    Long-lived pool of worker processes solving large batches of cubic and
+    quartic equations with `multi_cubic` and `multi_quartic`.
+
+    Coefficients are copied once into a shared memory segment, each worker
+    solves a disjoint range of rows and writes the roots straight into a
+    shared output segment, so nothing is pickled per row. Segments and
+    worker processes are reused between calls, close the pool with `close`
+    or use it as a context manager.
+
+    Parameters
+    ----------
+    workers: int, optional
+        Number of worker processes, `os.cpu_count()` by default.
+
+    Examples
+    --------
+    >>> with ProcessPoolSolver(workers=8) as pool:
+    ...     roots = pool.quartic_roots(np.random.rand(10**7, 5))
+    '''
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count()
+        # Workers are spawned rather than forked: forking after the
+        # threading layer of the parallel kernels has started deadlocks the
+        # children
+        self._executor = ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_pool_init)
+        self._segments = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _segment(self, key, nbytes):
+        ''' Shared memory segment of at least `nbytes`, grown on demand. '''
+        shm = self._segments.get(key)
+        if shm is None or shm.size < nbytes:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+            self._segments[key] = shm
+        return shm
+
+    def _solve(self, kind, p, ncoeff):
+        p = np.asarray(p, dtype=np.float64)
+        if p.ndim < 2:
+            p = p[np.newaxis, :]
+        if p.shape[1] != ncoeff:
+            raise ValueError('Expected {:d} coefficients, '
+                             'got {:d}.'.format(ncoeff, p.shape[1]))
+
+        n = p.shape[0]
+        itemsize = np.dtype(complex).itemsize
+        shm_in = self._segment(kind + '-in', n * ncoeff * 8)
+        shm_out = self._segment(kind + '-out', n * (ncoeff - 1) * itemsize)
+        capacity = shm_in.size // (ncoeff * 8)
+        capacity = min(capacity, shm_out.size // ((ncoeff - 1) * itemsize))
+
+        shared_p = np.ndarray((capacity, ncoeff), dtype=np.float64,
+                              buffer=shm_in.buf)
+        shared_out = np.ndarray((capacity, ncoeff - 1), dtype=complex,
+                                buffer=shm_out.buf)
+        shared_p[:n] = p
+
+        bounds = np.linspace(0, n, self.workers + 1).astype(int)
+        futures = [
+            self._executor.submit(_pool_solve, kind, shm_in.name,
+                                  shm_out.name, capacity, lo, hi)
+            for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo
+        ]
+        for future in futures:
+            future.result()
+
+        return shared_out[:n].copy()
+
+    def cubic_roots(self, p):
+        ''' Roots of an ``(M, 4)`` array of cubic coefficients, see
+        `cubic_roots`. Returns an array of size ``(M, 3)``.
+        '''
+        return self._solve('cubic', p, 4)
+
+    def quartic_roots(self, p):
+        ''' Roots of an ``(M, 5)`` array of quartic coefficients, see
+        `quartic_roots`. Returns an array of size ``(M, 4)``.
+        '''
+        return self._solve('quartic', p, 5)
+
+    def close(self):
+        ''' Shut the worker processes down and release shared memory. '''
+        self._executor.shutdown()
+        for shm in self._segments.values():
+            shm.close()
+            shm.unlink()
+        self._segments.clear()
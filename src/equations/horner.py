@@ -0,0 +1,149 @@
+"""
+Batched evaluation of polynomials by Horner's scheme
+"""
+
+import numpy as np
+from numba import jit, prange
+
+
+# Kernels are compiled on first call for each combination of real and
+# complex coefficients and points, and cached on disk
+@jit(nopython=True, parallel=True, cache=True)
+def horner_pairs(p, x, out):
+    ''' Evaluate polynomial ``p[i]`` at point ``x[i]`` for every `i`. A single
+    polynomial (one row of `p`) or a single point is used for every `i`.
+
+    Parameters
+    ----------
+    p: ndarray
+        Coefficients of the polynomials, of size ``(M, K)``, highest power
+        first, where ``M`` is 1 or the size of `out`.
+
+    x: ndarray
+        Points, of size 1 or the size of `out`.
+
+    out: ndarray
+        Output array for the values.
+    '''
+    # Index steps, 0 to reuse a single polynomial or point
+    dp = 1 if p.shape[0] > 1 else 0
+    dx = 1 if x.shape[0] > 1 else 0
+    for i in prange(out.shape[0]):
+        row = p[i*dp]
+        xi = x[i*dx]
+        f = row[0]
+        for k in range(1, row.shape[0]):
+            f = f*xi + row[k]
+        out[i] = f
+    return out
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def horner_grid(p, x, out):
+    ''' Evaluate every polynomial of `p` at every point of `x`, writing
+    ``p[i]`` at ``x[j]`` to ``out[i, j]``.
+
+    Parameters
+    ----------
+    p: ndarray
+        Coefficients of the polynomials, of size ``(M, K)``, highest power
+        first.
+
+    x: ndarray
+        Points, of size ``(N,)``.
+
+    out: ndarray
+        Output array of size ``(M, N)``.
+    '''
+    for i in prange(p.shape[0]):
+        row = p[i]
+        for j in range(x.shape[0]):
+            xj = x[j]
+            f = row[0]
+            for k in range(1, row.shape[0]):
+                f = f*xj + row[k]
+            out[i, j] = f
+    return out
+
+
+def _kernel_type(a):
+    ''' `complex128` for complex input, `float64` otherwise. '''
+    return np.complex128 if np.iscomplexobj(a) else np.float64
+
+
+def evaluate(coeffs, xs, *, grid=False, out=None):
+    '''
+    Evaluate one or many polynomials at one or many points.
+
+    Parameters
+    ----------
+    coeffs: array_like
+        Coefficients, highest power first, of a single polynomial of size
+        ``(K,)`` or of ``M`` polynomials of size ``(M, K)``. Real or complex.
+
+    xs: array_like
+        Points, real or complex. For a single polynomial any shape, which
+        the result takes. For ``M`` polynomials a scalar, evaluated by every
+        polynomial, or one point per polynomial of size ``(M,)``.
+
+    grid: bool, optional
+        Evaluate each of the ``M`` polynomials at each of the ``N`` points
+        `xs` instead, giving a result of size ``(M, N)``.
+
+    out: ndarray, optional
+        C-contiguous array of the result's shape and type (``float64``, or
+        ``complex128`` if `coeffs` or `xs` is complex) to write to.
+
+    Returns
+    -------
+    values: ndarray
+        Values of the polynomials, `out` if given.
+
+    Examples
+    --------
+    >>> evaluate([1, -3, 2], [0, 1, 2, 3])
+    array([2., 0., 0., 2.])
+    >>> evaluate([[1, -3, 2], [1, 0, -1]], [3, 2])
+    array([2., 3.])
+    >>> evaluate([[1, -3, 2], [1, 0, -1]], [0, 1], grid=True)
+    array([[ 2.,  0.],
+           [-1.,  0.]])
+    '''
+    p = np.asarray(coeffs)
+    p = np.ascontiguousarray(p, dtype=_kernel_type(p))
+    x = np.asarray(xs)
+    x = np.asarray(x, dtype=_kernel_type(x))
+    value_type = np.result_type(p, x)
+
+    if p.ndim == 1:
+        p = p[np.newaxis, :]
+        shape = (x.shape[0],) if grid and x.ndim == 1 else x.shape
+    elif p.ndim == 2:
+        if grid:
+            shape = (p.shape[0], x.size)
+        elif x.ndim == 0 or x.shape == (p.shape[0],):
+            shape = (p.shape[0],)
+        else:
+            raise ValueError('Expected a scalar or {:d} points, got shape '
+                             '{}.'.format(p.shape[0], x.shape))
+    else:
+        raise ValueError('Expected coefficients of 1 or 2 dimensions, '
+                         'got {:d}.'.format(p.ndim))
+    if p.shape[1] == 0:
+        raise ValueError('Expected at least 1 coefficient.')
+
+    if out is None:
+        out = np.empty(shape, dtype=value_type)
+    elif (out.shape != shape or out.dtype != value_type
+          or not out.flags.c_contiguous):
+        raise ValueError('Expected a C-contiguous out of shape {} and type '
+                         '{}, got {} and {}.'.format(shape, value_type,
+                                                     out.shape, out.dtype))
+
+    x = np.ascontiguousarray(x.reshape(-1))
+    if grid and p.shape[0] > 1:
+        horner_grid(p, x, out)
+    else:
+        horner_pairs(p, x, out.reshape(-1))
+
+    return out if out.ndim else out[()]
@@ -0,0 +1,325 @@
+"""
+Bulk parsing of equation strings, one per line, into coefficient arrays
+"""
+
+import os
+from itertools import islice
+
+import numpy as np
+from numba import jit, prange, types
+
+from .terms import coefficients
+
+
+# Number of coefficients of every row, up to quartics
+WIDTH = 5
+
+# Bytes read from a file at a time, cut after the last complete line
+CHUNK_SIZE = 1 << 24
+
+# Lines taken from an iterable at a time, about `CHUNK_SIZE` bytes of
+# typical equations
+CHUNK_LINES = CHUNK_SIZE >> 5
+
+# Exact powers of ten, for the fast path of decimal to float conversion
+_POW10 = np.array([10.**k for k in range(23)])
+
+# Lines as read-only bytes, viewed without copying
+_BYTES = types.Array(types.uint8, 1, 'C', readonly=True)
+
+# Largest mantissa converted exactly in double precision
+_MAX_MANTISSA = 1 << 53
+
+
+@jit(types.int64(_BYTES, types.int64, types.int64), nopython=True,
+     cache=True)
+def _skip_spaces(buf, pos, end):
+    while pos < end and buf[pos] == 32:
+        pos += 1
+    return pos
+
+
+@jit(types.int64(_BYTES, types.int64, types.int64, types.float64[:]),
+     nopython=True, cache=True)
+def scan_line(buf, pos, end, row):
+    ''' Parse the polynomial ``buf[pos:end]`` into `row` and return its
+    degree, or -1 if the line is left to `terms.coefficients`: malformed,
+    of degree above 4, or with numbers not converted exactly by the fast
+    path (mantissas from 2^53 or exponents beyond 22).
+
+    `row` must be zeroed, coefficients are added to ``row[4 - power]``.
+    '''
+    degree = -1
+    first = True
+    pos = _skip_spaces(buf, pos, end)
+    while pos < end:
+        # Sign, required between terms
+        negative = False
+        if buf[pos] == 43 or buf[pos] == 45:    # + -
+            negative = buf[pos] == 45
+            pos = _skip_spaces(buf, pos + 1, end)
+        elif not first:
+            return -1
+        first = False
+
+        # Coefficient: digits [. digits] [e [sign] digits] or . digits
+        mantissa = 0
+        exponent = 0
+        n_integer = 0
+        n_fraction = 0
+        while pos < end and 48 <= buf[pos] <= 57:
+            mantissa = mantissa*10 + (buf[pos] - 48)
+            n_integer += 1
+            pos += 1
+            if mantissa >= _MAX_MANTISSA:
+                return -1
+        if pos < end and buf[pos] == 46:        # .
+            pos += 1
+            while pos < end and 48 <= buf[pos] <= 57:
+                mantissa = mantissa*10 + (buf[pos] - 48)
+                n_fraction += 1
+                pos += 1
+                if mantissa >= _MAX_MANTISSA:
+                    return -1
+            if n_integer == 0 and n_fraction == 0:
+                return -1
+            exponent = -n_fraction
+        if n_integer and pos < end and buf[pos] == 101:      # e
+            pos += 1
+            e_negative = False
+            if pos < end and (buf[pos] == 43 or buf[pos] == 45):
+                e_negative = buf[pos] == 45
+                pos += 1
+            e_value = 0
+            e_digits = 0
+            while pos < end and 48 <= buf[pos] <= 57:
+                e_value = min(e_value*10 + (buf[pos] - 48), 1000)
+                e_digits += 1
+                pos += 1
+            if e_digits == 0:
+                return -1
+            exponent += -e_value if e_negative else e_value
+        n_digits = n_integer + n_fraction
+        pos = _skip_spaces(buf, pos, end)
+
+        # x and its power, as superscript digits or after `^`
+        power = 0
+        if pos < end and buf[pos] == 120:       # x
+            pos = _skip_spaces(buf, pos + 1, end)
+            power = 1
+            if pos < end and buf[pos] == 94:    # ^
+                pos = _skip_spaces(buf, pos + 1, end)
+                if pos == end or not 48 <= buf[pos] <= 57:
+                    return -1
+                power = 0
+                while pos < end and 48 <= buf[pos] <= 57:
+                    power = min(power*10 + (buf[pos] - 48), 100)
+                    pos += 1
+            else:
+                # ¹ ² ³ are C2 B9, C2 B2, C2 B3; ⁰ ⁴-⁹ are E2 81 B0-B9
+                n_power = 0
+                value = 0
+                while pos < end:
+                    if (buf[pos] == 0xC2 and pos + 1 < end
+                            and buf[pos + 1] in (0xB2, 0xB3, 0xB9)):
+                        digit = buf[pos + 1] - 0xB0 if buf[pos + 1] != 0xB9 \
+                            else 1
+                        pos += 2
+                    elif (buf[pos] == 0xE2 and pos + 2 < end
+                            and buf[pos + 1] == 0x81
+                            and (buf[pos + 2] == 0xB0
+                                 or 0xB4 <= buf[pos + 2] <= 0xB9)):
+                        digit = buf[pos + 2] - 0xB0
+                        pos += 3
+                    else:
+                        break
+                    value = min(value*10 + digit, 100)
+                    n_power += 1
+                if n_power:
+                    power = value
+            pos = _skip_spaces(buf, pos, end)
+            if n_digits == 0:
+                mantissa = 1
+        elif n_digits == 0:
+            return -1
+
+        if power > 4 or exponent > 22 or exponent < -22:
+            return -1
+        if exponent >= 0:
+            value = mantissa * _POW10[exponent]
+        else:
+            value = mantissa / _POW10[-exponent]
+        row[4 - power] += -value if negative else value
+        degree = max(degree, power)
+
+    return degree
+
+
+# Compiled on first call rather than at import, and cached on disk
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def scan_lines(buf, starts, ends, out, degree):
+    ''' Parse every line ``buf[starts[i]:ends[i]]`` into ``out[i]``, with
+    its degree, or -1 where `scan_line` leaves it, in ``degree[i]``.
+    '''
+    for i in prange(starts.shape[0]):
+        out[i, :] = 0
+        end = ends[i]
+        if end > starts[i] and buf[end - 1] == 13:      # \r
+            end -= 1
+        degree[i] = scan_line(buf, starts[i], end, out[i])
+
+
+def _chunks(source):
+    ''' Text of `source` as byte strings of complete lines. '''
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield bytes(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as file:
+            yield from _chunks(file)
+    elif hasattr(source, 'read'):
+        rest = b''
+        while True:
+            data = source.read(CHUNK_SIZE)
+            if not data:
+                break
+            if isinstance(data, str):
+                data = data.encode()
+            data = rest + data
+            cut = data.rfind(b'\n') + 1
+            if cut:
+                yield data[:cut]
+            rest = data[cut:]
+        if rest:
+            yield rest
+    else:
+        lines = iter(source)
+        while batch := list(islice(lines, CHUNK_LINES)):
+            yield ''.join([line.rstrip('\r\n') + '\n'
+                           for line in batch]).encode()
+
+
+def _scan_chunk(chunk, out):
+    ''' Parse the lines of `chunk` into the first rows of `out`, or a new
+    array, return these rows, their degrees (-1 where left to Python) and
+    the bytes and bounds of the lines.
+    '''
+    buf = np.frombuffer(chunk, dtype=np.uint8)
+    ends = np.flatnonzero(buf == 10)
+    if chunk and not chunk.endswith(b'\n'):
+        ends = np.append(ends, len(buf))
+    starts = np.empty_like(ends)
+    starts[0:1] = 0
+    starts[1:] = ends[:-1] + 1
+
+    n = ends.shape[0]
+    if out is None:
+        out = np.empty((n, WIDTH))
+    elif out.shape[0] < n:
+        raise ValueError('Expected out to have at least {:d} more rows, '
+                         'got {:d}.'.format(n, out.shape[0]))
+    degree = np.empty(n, dtype=np.int8)
+    if n:
+        scan_lines(buf, starts, ends, out, degree)
+    return out[:n], degree, buf, starts, ends
+
+
+def parse_lines(source, out=None, *, errors='raise'):
+    '''
+    Coefficients of many polynomials of degree up to 4, one per line, in a
+    jitted single pass over the bytes of each line.
+
+    Lines follow the syntax of `terms.coefficients`, e.g. ``x⁴-5x²+4``,
+    ``1.5x^2 - 3x + 2`` or ``-2x³+x``. Lines the fast scanner cannot convert
+    exactly (e.g. numbers of more than 15 digits) are passed to
+    `terms.coefficients`, so results never differ from it.
+
+    Parameters
+    ----------
+    source: str, path-like, bytes, file or iterable of str
+        File name or binary or text file to read in chunks of `CHUNK_SIZE`
+        bytes, UTF-8 bytes of the lines, or the lines themselves, taken in
+        chunks of `CHUNK_LINES`.
+
+    out: ndarray, optional
+        C-contiguous ``float64`` array of size ``(M, 5)`` with at least one
+        row per line, to write to instead of allocating.
+
+    errors: {'raise', 'coerce'}, optional
+        On malformed lines or degrees above 4 raise `ValueError` naming the
+        line numbers (from 1), or fill their rows with NaN and give them
+        degree -1.
+
+    Returns
+    -------
+    coeffs: ndarray
+        Coefficients of size ``(M, 5)``, highest power first, lower degrees
+        padded with leading zeros as expected by `solvers.solve_batch`. The
+        first ``M`` rows of `out` if given.
+
+    degree: ndarray
+        Highest power written on every line, of size ``(M,)``.
+
+    Examples
+    --------
+    >>> coeffs, degree = parse_lines(['x²-3x+2', '2x^4 - x', '1.5x³'])
+    >>> coeffs
+    array([[ 0. ,  0. ,  1. , -3. ,  2. ],
+           [ 2. ,  0. ,  0. , -1. ,  0. ],
+           [ 0. ,  1.5,  0. ,  0. ,  0. ]])
+    >>> degree
+    array([2, 4, 3], dtype=int8)
+    '''
+    if errors not in ('raise', 'coerce'):
+        raise ValueError("Expected errors 'raise' or 'coerce', "
+                         "got {!r}.".format(errors))
+    if out is not None and (out.shape[1:] != (WIDTH,)
+                            or out.dtype != np.float64
+                            or not out.flags.c_contiguous):
+        raise ValueError('Expected a C-contiguous float64 out of size '
+                         '(M, {:d}), got {} and {}.'.format(WIDTH, out.shape,
+                                                            out.dtype))
+
+    blocks = []
+    degrees = []
+    failed = []
+    row = 0
+    for chunk in _chunks(source):
+        target = None if out is None else out[row:]
+        block, degree, buf, starts, ends = _scan_chunk(chunk, target)
+
+        for i in np.flatnonzero(degree < 0):
+            line = bytes(buf[starts[i]:ends[i]]).decode().rstrip('\r')
+            try:
+                coeffs = coefficients(line)
+                if len(coeffs) > WIDTH:
+                    raise ValueError('Degree {:d} above {:d} in '
+                                     '{!r}'.format(len(coeffs) - 1,
+                                                   WIDTH - 1, line))
+            except ValueError as error:
+                failed.append((row + i + 1, error))
+                block[i] = np.nan
+                continue
+            block[i, :] = 0
+            block[i, WIDTH - len(coeffs):] = coeffs
+            degree[i] = len(coeffs) - 1
+
+        blocks.append(block)
+        degrees.append(degree)
+        row += block.shape[0]
+
+    if failed and errors == 'raise':
+        (number, error), more = failed[0], len(failed) - 1
+        raise ValueError('Line {:d}: {}'.format(number, error)
+                         + (' (and {:d} more lines)'.format(more)
+                            if more else ''))
+
+    if out is not None:
+        coeffs = out[:row]
+    elif len(blocks) == 1:
+        coeffs = blocks[0]
+    else:
+        coeffs = np.concatenate(blocks) if blocks else np.empty((0, WIDTH))
+    degree = (np.concatenate(degrees) if degrees
+              else np.empty(0, dtype=np.int8))
+
+    return coeffs, degree
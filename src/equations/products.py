@@ -0,0 +1,127 @@
+"""
+Multiplication of polynomials given by coefficient sequences, highest power
+first: exact direct convolution for short factors, FFT convolution for long
+ones, and balanced product trees for many factors.
+"""
+
+import numpy as np
+
+
+# Length of the shorter factor from which `multiply` convolves by FFT,
+# below it the direct O(n*m) convolution is faster
+FFT_THRESHOLD = 64
+
+
+def _is_exact(a):
+    ''' Whether all coefficients are Python integers. '''
+    return isinstance(a, (list, tuple)) and all(type(x) is int for x in a)
+
+
+def _fits_double(a):
+    ''' Whether the coefficients convert to a float or int64 array, which
+    Python integers beyond int64 do not.
+    '''
+    if isinstance(a, np.ndarray):
+        return a.dtype != object
+    return all(type(x) is not int or -2**63 <= x < 2**63 for x in a)
+
+
+def _direct(a, b):
+    ''' Direct convolution in Python arithmetic, exact for integers. '''
+    out = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                out[i + j] += x * y
+    return out
+
+
+def _fft(a, b):
+    ''' Convolution by zero-padded FFT, in double precision. '''
+    n = len(a) + len(b) - 1
+    size = 1 << (n - 1).bit_length()
+    if np.iscomplexobj(a) or np.iscomplexobj(b):
+        out = np.fft.ifft(np.fft.fft(a, size) * np.fft.fft(b, size))
+    else:
+        out = np.fft.irfft(np.fft.rfft(a, size) * np.fft.rfft(b, size), size)
+    return out[:n]
+
+
+def _convolve(a, b):
+    ''' Product coefficients as a list if computed exactly, otherwise as
+    an array.
+    '''
+    if not (_fits_double(a) and _fits_double(b)):
+        return _direct(a, b)
+    if min(len(a), len(b)) >= FFT_THRESHOLD:
+        return _fft(a, b)
+    if _is_exact(a) and _is_exact(b):
+        return _direct(a, b)
+    return np.convolve(a, b)
+
+
+def multiply(a, b):
+    '''
+    Coefficients of the product of two polynomials.
+
+    Parameters
+    ----------
+    a, b: sequence
+        Real or complex coefficients of the factors, highest power first.
+
+    Returns
+    -------
+    c: list
+        Coefficients of the product, of length ``len(a) + len(b) - 1``.
+        Exact for integer coefficients when the shorter factor has fewer
+        than `FFT_THRESHOLD` coefficients, or when any coefficient is beyond
+        int64 and so cannot be convolved by FFT. Otherwise computed in double
+        precision, by FFT for long factors, with errors relative to the
+        largest coefficient of about machine epsilon times
+        ``log2(len(c))``.
+
+    Examples
+    --------
+    >>> multiply([1, -2], [1, -3])
+    [1, -5, 6]
+    '''
+    if not len(a) or not len(b):
+        raise ValueError('Expected at least 1 coefficient per factor.')
+    c = _convolve(a, b)
+    return c if isinstance(c, list) else c.tolist()
+
+
+def product(factors):
+    '''
+    Coefficients of the product of many polynomials, multiplied pairwise in
+    a balanced tree so that factors of similar length meet and the long
+    products near the root are convolved by FFT. Expanding ``n`` linear
+    factors costs O(n log^2 n) instead of the O(n^2) of multiplying them in
+    turn.
+
+    Parameters
+    ----------
+    factors: iterable of sequence
+        Coefficients of the factors, highest power first.
+
+    Returns
+    -------
+    c: list
+        Coefficients of the product, see `multiply` for their accuracy.
+
+    Examples
+    --------
+    >>> product([[1, -1], [1, -2], [1, -3]])
+    [1, -6, 11, -6]
+    '''
+    level = [f if isinstance(f, np.ndarray) else list(f) for f in factors]
+    if not level:
+        return [1]
+    while len(level) > 1:
+        paired = [_convolve(level[i], level[i + 1])
+                  for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    c = level[0]
+    return c if isinstance(c, list) else c.tolist()
@@ -0,0 +1,153 @@
+"""
+Bulk rendering of polynomial coefficients to equation strings, identical to
+`str` of the corresponding `Polynomial` objects
+"""
+
+import numpy as np
+
+from .terms import sign_terms, superscript
+
+
+# Rows rendered and written at a time by `write_rows`
+CHUNK_ROWS = 1 << 16
+
+# Kinds of coefficients, rendered differently by `terms.sign_xn`
+ZERO, ONE, MINUS_ONE, POSITIVE, NEGATIVE = range(5)
+
+# Widest rows whose combination of kinds fits a 64-bit code
+MAX_CODED_WIDTH = 27
+
+
+def _kinds(p):
+    ''' Kind of every coefficient of `p`, constants are never ONE or
+    MINUS_ONE as `terms.sign_n` writes them as numbers.
+    '''
+    kind = np.where(p > 0, POSITIVE, NEGATIVE).astype(np.int64)
+    kind[:, :-1][p[:, :-1] == 1] = ONE
+    kind[:, :-1][p[:, :-1] == -1] = MINUS_ONE
+    kind[p == 0] = ZERO
+    return kind
+
+
+def _template(code, width):
+    ''' `str.format` template of the rows of `width` coefficients with
+    kinds `code`, taking the coefficients as positional arguments.
+    '''
+    terms = []
+    for j in range(width):
+        code, kind = divmod(code, 5)
+        power = width - 1 - j
+        suffix = 'x' + superscript(power) if power else ''
+        if kind == ONE:
+            terms.append('+' + suffix)
+        elif kind == MINUS_ONE:
+            terms.append('-' + suffix)
+        elif kind == POSITIVE:
+            terms.append('+{%d}%s' % (j, suffix))
+        elif kind == NEGATIVE:
+            # `sign_xn` and `sign_n` write negative coefficients after a
+            # minus too
+            terms.append('-{%d}%s' % (j, suffix))
+    return ''.join(terms).removeprefix('+')
+
+
+def _integral_as_int(column):
+    ''' Coefficients of a column of floats, those with integral values as
+    `int`.
+    '''
+    return [int(x) if x.is_integer() else x for x in column]
+
+
+def format_rows(coeffs, integral=False):
+    '''
+    Render many polynomials to strings at once.
+
+    Rows are grouped by the kinds of their coefficients (zero, one, minus
+    one, positive or negative), which fix the text around the numbers, so
+    that each row takes a single `str.format` call of its group's template.
+
+    Parameters
+    ----------
+    coeffs: array_like
+        Real coefficients of size ``(M, K)``, highest power first. Integer
+        arrays render as `int` coefficients, float arrays as `float`, e.g.
+        ``2.0x²``, like ``str(Polynomial(*row.tolist()))``. A 1D array is
+        treated as a single polynomial.
+
+    integral: bool, optional
+        Render float coefficients with integral values as `int`, e.g.
+        ``2x²`` for ``2.0``, as for coefficients stored as floats that were
+        given as integers.
+
+    Returns
+    -------
+    lines: list of str
+        The ``M`` equations, each identical to `str` of the `Polynomial`
+        with the same coefficients (for finite coefficients).
+
+    Examples
+    --------
+    >>> format_rows([[1, -3, 2], [0, 2, 0], [-1, 0, 5]])
+    ['x²--3x+2', '2x', '-x²+5']
+    >>> format_rows([[2.5, 0, -1]])
+    ['2.5x²--1.0']
+    >>> format_rows([[2.5, 0, -1]], integral=True)
+    ['2.5x²--1']
+    '''
+    p = np.asarray(coeffs)
+    if p.ndim < 2:
+        p = p[np.newaxis, :]
+    m, k = p.shape
+    if m == 0:
+        return []
+    columns = p.T.tolist()
+    if integral and p.dtype.kind == 'f':
+        columns = list(map(_integral_as_int, columns))
+    if k > MAX_CODED_WIDTH:
+        return [''.join(sign_terms(*row)).removeprefix('+')
+                for row in zip(*columns)]
+
+    code = _kinds(p) @ (5 ** np.arange(k, dtype=np.int64))
+    codes, inverse = np.unique(code, return_inverse=True)
+    templates = np.array([_template(c, k) for c in codes.tolist()],
+                         dtype=object)
+
+    return list(map(str.format, templates[inverse.ravel()].tolist(),
+                    *columns))
+
+
+def write_rows(coeffs, file, chunk_rows=CHUNK_ROWS, integral=False):
+    '''
+    Write many polynomials as equations, one per line, to a text or binary
+    stream in large writes of `chunk_rows` lines.
+
+    Parameters
+    ----------
+    coeffs: array_like
+        Real coefficients of size ``(M, K)``, see `format_rows`.
+
+    file: file object
+        Open text or binary (UTF-8) stream.
+
+    chunk_rows: int, optional
+        Number of lines rendered and written at a time.
+
+    integral: bool, optional
+        Write integral float coefficients as `int`, see `format_rows`.
+
+    Returns
+    -------
+    count: int
+        Number of lines written.
+    '''
+    p = np.asarray(coeffs)
+    if p.ndim < 2:
+        p = p[np.newaxis, :]
+    binary = not hasattr(file, 'encoding')
+
+    for start in range(0, p.shape[0], chunk_rows):
+        text = '\n'.join(format_rows(p[start:start + chunk_rows],
+                                     integral)) + '\n'
+        file.write(text.encode() if binary else text)
+
+    return p.shape[0]
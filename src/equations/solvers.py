@@ -1,17 +1,122 @@
+import atexit
+import math
+import threading
+from collections import OrderedDict, namedtuple
+
 import numpy as np
 
-import fqs
+from . import aberth, fqs
 
 __all__ = [
     "number",
     "real",
+    "cache_clear",
+    "cache_info",
+    "configure_cache",
     "solve",
+    "solve_batch",
     "solve_linear",
 ]
 
 number = int | float | complex
 real = int | float
 
+# Highest degree `solve_batch` solves in closed form, higher degrees are
+# solved iteratively by `aberth`
+CLOSED_FORM_DEGREE = 4
+
+# Long-lived process pools used by `solve_batch`, by number of workers
+_pools: dict[int, fqs.ProcessPoolSolver] = {}
+
+# Number of distinct equations whose roots `solve` remembers
+DEFAULT_CACHE_SIZE = 1024
+
+CacheInfo = namedtuple("CacheInfo",
+                       ["hits", "misses", "evictions", "maxsize", "currsize"])
+
+
+class SolveCache:
+    """
+    Bounded least recently used store of roots for `solve`, keyed on
+    normalised coefficients
+    ---
+    - @param maxsize: int - [most entries kept, `0` disables the cache]
+    """
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: tuple) -> np.ndarray | None:
+        with self._lock:
+            roots = self._entries.get(key)
+            if roots is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return roots
+
+    def put(self, key: tuple, roots: np.ndarray) -> None:
+        with self._lock:
+            self._entries[key] = roots
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.evictions,
+                         self.maxsize, len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+_cache = SolveCache()
+
+
+def configure_cache(maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+    """
+    Resize the `solve` cache, dropping the least recently used entries
+    ---
+    - @param maxsize: int - [most equations remembered, `0` disables]
+    """
+    with _cache._lock:
+        _cache.maxsize = maxsize
+        while len(_cache._entries) > maxsize:
+            _cache._entries.popitem(last=False)
+            _cache.evictions += 1
+
+
+def cache_info() -> CacheInfo:
+    """Hits, misses, evictions, maximum and current size of the cache"""
+    return _cache.info()
+
+
+def cache_clear() -> None:
+    """Empty the `solve` cache and reset its counters"""
+    _cache.clear()
+
+
+def _cache_key(coeffs: tuple[real, ...], dtype) -> tuple | None:
+    """
+    Monic float64 coefficients, equations differing only by a scale
+    factor have the same roots and share an entry; `None` where they are
+    not finite, as keys holding `nan` never match and would only fill the
+    cache, or where the leading coefficient is zero and has no scale
+    """
+    lead = float(coeffs[0])
+    if lead == 0:
+        return None
+    monic = [float(x) / lead for x in coeffs[1:]]
+    if not all(map(math.isfinite, (lead, *monic))):
+        return None
+    char = "d" if dtype is None else fqs.resolve_dtype(dtype)[0].char
+    return (char, *monic)
+
 
 def _assert_real(*args: number) -> None:
     assert all(isinstance(x, real) for x in args), "All Arguments must be real"
@@ -22,7 +127,7 @@ def solve_linear(a0: list[real]):
 
 
 def solve(a: real, b: real, c: real = 0, d: real = 0, e: real = 0,
-          *, as_list: bool = False) -> number:
+          *, as_list: bool = False, dtype=None) -> number:
     """
     Solves equation for ≥ 2 real coefficients passed
     where `a ≠ 0`
@@ -32,6 +137,9 @@ def solve(a: real, b: real, c: real = 0, d: real = 0, e: real = 0,
     - @param c: number - [coefficient for x ≤ ²]
     - @param d: number - [coefficient for x ≤ ¹]
     - @param e: number - [coefficient for x ≤ ⁰]
+    - @param dtype: data-type - [`float64` (default) or `float32`, see
+      `fqs.cubic_roots` for the accuracy of single precision, which only
+      narrows the roots returned]
     """
 
     list_type = np.array
@@ -41,14 +149,123 @@ def solve(a: real, b: real, c: real = 0, d: real = 0, e: real = 0,
 
     _assert_real(a, b, c, d, e)
 
+    key = _cache_key((a, b, c, d, e), dtype) if _cache.maxsize else None
+    if key is None:
+        roots = _solve(a, b, c, d, e, dtype)
+    else:
+        roots = _cache.get(key)
+        if roots is None:
+            roots = _solve(a, b, c, d, e, dtype)
+            _cache.put(key, roots)
+
+    return list_type(roots)
+
+
+def _solve(a: real, b: real, c: real, d: real, e: real,
+           dtype) -> np.ndarray:
+    """Uncached roots for `solve`, as a read-only array"""
     if e != 0:
-        roots = fqs.quartic_roots([a, b, c, d, e])
+        roots = fqs.quartic_roots([a, b, c, d, e], dtype=dtype)
     elif d != 0:
-        roots = fqs.cubic_roots([a, b, c, d])
+        roots = fqs.cubic_roots([a, b, c, d], dtype=dtype)
     elif c != 0:
-        roots = fqs.single_quadratic([a, b, c])
+        roots = fqs.single_quadratic(a, b, c)
     elif b != 0:
         roots = [solve_linear([a, b])]
     else:
         roots = [a]  # should never run
-    return list_type(roots)
+
+    roots = np.ravel(roots)
+    roots.flags.writeable = False
+    return roots
+
+
+def _pool(workers: int) -> fqs.ProcessPoolSolver:
+    """Process pool with `workers` workers, started on first use"""
+    if workers not in _pools:
+        _pools[workers] = fqs.ProcessPoolSolver(workers)
+        atexit.register(_pools[workers].close)
+    return _pools[workers]
+
+
+def _batch_degree(coeffs: np.ndarray) -> np.ndarray:
+    """
+    True degree of each row of coefficients, highest power first,
+    ignoring leading zeros (`0` for constant and all-zero rows)
+    """
+    nonzero = coeffs != 0
+    leading = nonzero.argmax(axis=1)
+    degree = coeffs.shape[1] - 1 - leading
+    degree[~nonzero.any(axis=1)] = 0
+    return degree
+
+
+def solve_batch(coeffs, *, dtype=None, workers: int | None = None,
+                tol: float = aberth.TOLERANCE, max_iter: int = aberth.MAX_ITER,
+                return_iterations: bool = False) -> tuple[np.ndarray, ...]:
+    """
+    Solves many polynomials of mixed degree at once
+
+    Rows are grouped by their true degree, found from leading zeros, and
+    each group is solved in one call of the matching batch solver, in
+    closed form up to quartics and by `aberth.aberth_roots` above
+    ---
+    - @param coeffs: array_like - [(M, N) real coefficients, highest power
+      first, e.g. `[0, 0, 1, -3, 2]` is the quadratic x² - 3x + 2]
+    - @param dtype: data-type - [`float64` (default) or `float32`, degrees
+      above four are always solved in double precision]
+    - @param workers: int - [solve cubic and quartic groups on a long-lived
+      `fqs.ProcessPoolSolver` with this many processes (double precision)]
+    - @param tol: float - [relative accuracy of iteratively solved roots]
+    - @param max_iter: int - [most iterations per iteratively solved row]
+    - @param return_iterations: bool - [also return iteration counts]
+    ---
+    - @return roots: ndarray - [(M, N - 1) complex roots, padded with `nan`]
+    - @return degree: ndarray - [(M,) degree of each row]
+    - @return iterations: ndarray - [(M,) iterations taken by each row, `0`
+      for closed forms and `-1` where `max_iter` was reached without
+      converging, only with `return_iterations`]
+    """
+    real_type, complex_type = fqs.resolve_dtype(dtype)
+
+    coeffs = np.asarray(coeffs, dtype=real_type)
+    if coeffs.ndim < 2:
+        coeffs = coeffs[np.newaxis, :]
+
+    width = coeffs.shape[1]
+    if width < 1:
+        raise ValueError("Expected at least 1 coefficient per row")
+
+    degree = _batch_degree(coeffs)
+    roots = np.full((coeffs.shape[0], width - 1), np.nan, dtype=complex_type)
+    iterations = np.zeros(coeffs.shape[0], dtype=np.int64)
+
+    pool = _pool(workers) if workers else None
+
+    for n in range(1, width):
+        rows = np.flatnonzero(degree == n)
+        if rows.size == 0:
+            continue
+
+        group = coeffs[rows, width - 1 - n:]
+
+        if n == 1:
+            group_roots = (-group[:, 1] / group[:, 0])[:, np.newaxis]
+        elif n == 2:
+            group_roots = np.stack(fqs.multi_quadratic(*group.T), axis=1)
+        elif n == 3:
+            group_roots = (pool.cubic_roots(group) if pool
+                           else fqs.cubic_roots(group, dtype=real_type))
+        elif n == CLOSED_FORM_DEGREE:
+            group_roots = (pool.quartic_roots(group) if pool
+                           else fqs.quartic_roots(group, dtype=real_type))
+        else:
+            group_roots, group_iterations, converged = aberth.aberth_roots(
+                group, tol=tol, max_iter=max_iter)
+            iterations[rows] = np.where(converged, group_iterations, -1)
+
+        roots[rows, :n] = group_roots
+
+    if return_iterations:
+        return roots, degree, iterations
+    return roots, degree
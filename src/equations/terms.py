@@ -1,11 +1,23 @@
-import re
+from functools import lru_cache
+
+import numpy as np
+
+from .horner import evaluate
 
 __all__ = [
+    "coefficients",
+    "compile_equation",
+    "parse",
+    "CompiledEquation",
+
     "sign_xn",
     "sign_n",
 
+    "sign_terms",
     "sign_quad_terms",
     "sign_cube_terms",
+    "sign_quart_terms",
+    "superscript",
 ]
 
 number = int | float
@@ -23,39 +35,17 @@ quart_terms =  tuple[number, number, number, number, number]          # noqa
 quint_terms =  tuple[number, number, number, number, number, number]  # noqa
 
 
-patterns: dict[str, dict[str, re.Pattern] | re.Pattern] = {
-    "coeff": re.compile(r"[+-]?\d*"),
-    "Linear": {
-        "equation": re.compile(r"(-?\d*x[+-]\d+)"),
-        "terms": re.compile(r"([+-]?\d*(x?))")
-    },
-    "Quadratic": {
-        "equation": re.compile(r"(-?\d*)x(²)([+-]\d+)x([+-]\d+)"),
-        "terms": re.compile(r"([+-]?\d*(x?)(²?))"),
-    },
-    "Cubic": {
-        "equation": re.compile(r"(-?\d*)x³([+-]?\d*)x²([+-]\d+)x([+-]\d+)"),
-        "terms": re.compile(r"([+-]?\d*(x?)([²³]?))"),
-    },
-    "Quartic": {
-        "equation": re.compile("(-?\d*)x⁴([+-]?\d*)x³([+-]?\d*)x²([+-]\d+)x([+-]\d+)"), # noqa
-        "terms": re.compile(r"([+-]?\d*(x?)([²³⁴]?))"),
-    }
-}
-
-
-def numify(num: str) -> number:
-    if num == "-":
-        return -1
-    if num == "":
-        return 1
-
-    if float(num) % 1 == 0:
-        f = int
-    else:
-        f = float
+SUPERSCRIPTS = str.maketrans("0123456789", "⁰¹²³⁴⁵⁶⁷⁸⁹")
+DIGITS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹", "0123456789")
+
+# Number of compiled equations kept by `compile_equation`
+COMPILE_CACHE_SIZE = 128
 
-    return f(num)
+# Number of parsed equations kept by `parse`
+PARSE_CACHE_SIZE = 512
+
+NUMBER_CHARS = frozenset("0123456789.eE+-")
+SUPERSCRIPT_DECIMALS = frozenset("⁰¹²³⁴⁵⁶⁷⁸⁹")
 
 
 def sign_xn(c, coeff: str = "") -> str:
@@ -88,6 +78,32 @@ def sign_n(c) -> str:
         return f"-{c}"
 
 
+def superscript(n: int) -> str:
+    """
+    Power of x as written after it, `""` for x¹
+
+    ---
+    - @param n: int [power]
+    """
+    return "" if n == 1 else str(n).translate(SUPERSCRIPTS)
+
+
+def sign_terms(*coeffs: number) -> tuple[str, ...]:
+    """
+    Add positive/negative signs to terms of any degree and/or remove
+    appropriately
+
+    ---
+    - @param coeffs: number [coefficients, highest power first]
+    """
+    degree = len(coeffs) - 1
+    terms = [sign_xn(c, superscript(degree - i))
+             for i, c in enumerate(coeffs[:-1])]
+    terms.append(sign_n(coeffs[-1]))
+
+    return tuple(terms)
+
+
 def sign_linear_terms(a: number, b: number) -> tuple[str, str]:
     """
     Add positive/negative signs to terms and/or remove appropriately
@@ -154,57 +170,120 @@ def sign_quart_terms(a: number, b: number, c: number, d: number, e:number) -> tu
     d = sign_xn(d)
     e = sign_n(e)
 
+    return a, b, c, d, e
 
-def linear_coefficients(equation: str) -> linear_terms:
+
+def _number(text: str) -> number:
+    """Value of a scanned coefficient, an `int` when it is integral"""
+    if text.isdigit() and text.isascii():
+        return int(text)
+    if not NUMBER_CHARS.issuperset(text) or text[0] not in "0123456789.":
+        raise ValueError(text)
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+def _join_exponents(pieces: list[str]) -> list[str]:
+    """Rejoin coefficients like `2e-3` split at the sign of the exponent"""
+    joined = [pieces[0]]
+    for piece in pieces[1:]:
+        last = joined[-1]
+        if last[-1:] in ("e", "E") and last[-2:-1] in NUMBER_CHARS:
+            joined[-1] = last + (piece if piece[:1] == "-" else "+" + piece)
+        else:
+            joined.append(piece)
+    return joined
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse(equation: str) -> tuple[number, ...]:
     """
-    Return coefficients from linear equation
+    Return coefficients, highest power first, from a polynomial of any
+    degree, with missing powers as zeros, in a single pass over its terms;
+    recently parsed equations are reused
+
+    Terms are a sign (optional for the first), a coefficient (`3`, `1.5`,
+    `.5`, `2e-3`) and/or x with its power as superscript digits (`x²`,
+    `x¹⁰`) or after `^` (`x^2`), spaces and tabs are ignored
 
     ---
-    - @param equation: str - [linear equation in form ax + b]
+    - @param equation: str [polynomial in x, e.g. `x⁴ - 5x² + 4` or
+      `1.5x^2 - 3x + 2`]
     """
-    cls = "Linear"
-
     # Remove all whitespace for regularity
-    equation.replace(" ", "")
+    equation = equation.replace(" ", "").replace("\t", "")
+    if not equation:
+        raise ValueError("Empty equation")
+
+    # Split into signed terms, only the first may be empty (a leading sign)
+    pieces = equation.replace("-", "+-").split("+")
+    if "e" in equation or "E" in equation:
+        pieces = _join_exponents(pieces)
+    if not pieces[0] and len(pieces) > 1:
+        del pieces[0]
+
+    by_power: list[number] = []
+    for term in pieces:
+        body = term[1:] if term[:1] == "-" else term
+        x = body.find("x")
+        coeff = body if x < 0 else body[:x]
+        try:
+            value = _number(coeff) if coeff else 1
+            if x < 0:
+                if not coeff:
+                    raise ValueError(term)
+                power = 0
+            else:
+                rest = body[x + 1:]
+                if not rest:
+                    power = 1
+                elif rest[0] == "^" and rest[1:].isdigit() \
+                        and rest.isascii():
+                    power = int(rest[1:])
+                elif SUPERSCRIPT_DECIMALS.issuperset(rest):
+                    power = int(rest.translate(DIGITS))
+                else:
+                    raise ValueError(rest)
+        except ValueError:
+            raise ValueError(f"Unexpected {term or '+'!r} in "
+                             f"{equation!r}") from None
+
+        if power >= len(by_power):
+            by_power.extend([0] * (power + 1 - len(by_power)))
+        by_power[power] += -value if body is not term else value
+
+    by_power.reverse()
+    return tuple(by_power)
+
+
+def _fixed_degree(equation: str, degree: int) -> tuple[number, ...]:
+    """Coefficients of `equation` as a polynomial of degree `degree`,
+    missing leading powers as zeros"""
+    coeffs = parse(equation)
+    if len(coeffs) > degree + 1:
+        raise ValueError(f"Expected degree {degree}, got {len(coeffs) - 1} "
+                         f"in {equation!r}")
+    return (0,) * (degree + 1 - len(coeffs)) + coeffs
 
-    # Find terms
-    a, b, *_ = patterns[cls]["terms"].findall(equation)
 
-    a = a[0]
-    b = b[0]
-
-    # Extract coefficients
-    a = numify(patterns["coeff"].findall(a)[0])
-    b = numify(patterns["coeff"].findall(b)[0])
+def linear_coefficients(equation: str) -> linear_terms:
+    """
+    Return coefficients from linear equation
 
-    return a, b
+    ---
+    - @param equation: str - [linear equation in form ax + b]
+    """
+    return _fixed_degree(equation, 1)
 
 
 def quadratic_coefficients(equation: str) -> quad_terms:
     """
-    Return coefficients from cubic equation
+    Return coefficients from quadratic equation
 
     ---
     - @param equation: str - [quadratic equation in form ax² + bx + c]
     """
-    cls = "Quadratic"
-
-    # Remove all whitespace for regularity
-    equation.replace(" ", "")
-
-    # Find terms
-    a, b, c, *_ = patterns[cls]["terms"].findall(equation)
-
-    a = a[0]
-    b = b[0]
-    c = c[0]
-
-    # Extract coefficients
-    a = numify(patterns["coeff"].findall(a)[0])
-    b = numify(patterns["coeff"].findall(b)[0])
-    c = numify(patterns["coeff"].findall(c)[0])
-
-    return a, b, c
+    return _fixed_degree(equation, 2)
 
 
 def cubic_coefficients(equation: str) -> cube_terms:
@@ -214,56 +293,76 @@ def cubic_coefficients(equation: str) -> cube_terms:
     ---
     - @param equation: str [cubic equation in form ax³ + bx² + cx + d]
     """
-    cls = "Cubic"
+    return _fixed_degree(equation, 3)
 
-    # Remove all whitespace for regularity
-    equation.replace(" ", "")
 
-    # Find terms
-    a, b, c, d, *_ = patterns[cls]["terms"].findall(equation)
+def quartic_coefficients(equation: str) -> quart_terms:
+    """
+    Return coefficients from quartic equation
 
-    # Get first from each group
-    a = a[0]
-    b = b[0]
-    c = c[0]
-    d = d[0]
+    ---
+    - @param equation: str [quartic equation in form
+      ax⁴ + bx³ + cx² + dx + e]
+    """
+    return _fixed_degree(equation, 4)
 
-    # Extract coefficients
-    a = numify(patterns["coeff"].findall(a)[0])
-    b = numify(patterns["coeff"].findall(b)[0])
-    c = numify(patterns["coeff"].findall(c)[0])
-    d = numify(patterns["coeff"].findall(d)[0])
 
-    return a, b, c, d
+def coefficients(equation: str) -> tuple[number, ...]:
+    """
+    Return coefficients, highest power first, from a polynomial of any
+    degree, with missing powers as zeros, see `parse`
 
+    ---
+    - @param equation: str [polynomial in x, e.g. `x⁴ - 5x² + 4` or
+      `1.5x^2 - 3x + 2`]
+    """
+    return parse(equation)
 
-def quartic_coefficients(equation: str) -> quart_terms:
+
+class CompiledEquation:
     """
-    Return coefficients from cubic equation
+    Polynomial parsed once and evaluated by the shared native Horner kernel
+    of `horner`, callable on numbers and arrays of real or complex x alike
 
     ---
-    - @param equation: str [cubic equation in form ax³ + bx² + cx + d]
+    - @param coeffs: tuple[number] [coefficients, highest power first]
     """
-    cls = "Quartic"
+    __slots__ = ("coefficients", "_values", "_slopes")
 
-    # Remove all whitespace for regularity
-    equation.replace(" ", "")
+    def __init__(self, coeffs: tuple[number, ...]) -> None:
+        self.coefficients = coeffs
 
-    # Find terms
-    a, b, c, d, e, *_ = patterns[cls]["terms"].findall(equation)
+        degree = len(coeffs) - 1
+        slopes = tuple(c * (degree - k) for k, c in enumerate(coeffs[:-1]))
 
-    # Get first from each group
-    a = a[0]
-    b = b[0]
-    c = c[0]
-    d = d[0]
-    e = e[0]
+        self._values = np.array(coeffs, dtype=np.float64)
+        self._slopes = np.array(slopes or (0,), dtype=np.float64)
 
-    # Extract coefficients
-    a = numify(patterns["coeff"].findall(a)[0])
-    b = numify(patterns["coeff"].findall(b)[0])
-    c = numify(patterns["coeff"].findall(c)[0])
-    d = numify(patterns["coeff"].findall(d)[0])
-    e = numify(patterns["coeff"].findall(e)[0])
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.coefficients})"
 
-    return a, b, c, d, e
+    def __call__(self, x):
+        return evaluate(self._values, x)
+
+    def derivative(self, x):
+        """Value of the derivative at `x`"""
+        return evaluate(self._slopes, x)
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile_equation(equation: str) -> CompiledEquation:
+    return CompiledEquation(coefficients(equation))
+
+
+def compile_equation(equation: str) -> CompiledEquation:
+    """
+    Parse an equation once for fast evaluation, with its derivative, at
+    native speed, recently compiled equations are reused
+
+    ---
+    - @param equation: str [polynomial in x, see `coefficients`]
+    ---
+    - @return f: CompiledEquation [`f(x)` and `f.derivative(x)` for
+      numbers or arrays of real or complex x]
+    """
+    return _compile_equation(equation.replace(" ", ""))
@@ -1,10 +1,52 @@
+import io
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
 from typing import TypeVar
 
-from . import Cubic, Quadratic
+import numpy as np
+
+from . import (Cubic, Linear, Polynomial, PolynomialBatch, Quadratic, Quartic,
+               RootType, aberth, classify, count_real_roots, evaluate,
+               format_rows, fqs, ingest, parse_lines, product, products,
+               solvers, terms, write_rows)
+from .__main__ import format_roots
 
 __all__ = [
     "test_operations",
     "test_properties",
+    "test_mixed_degree_operations",
+    "test_polynomial_tuple",
+    "test_polynomial_batch",
+    "test_polynomial_batch_products",
+    "test_repeated_resolvent_roots",
+    "test_working_dtype",
+    "test_single_precision",
+    "test_real_roots",
+    "test_solve_batch",
+    "test_solve_batch_high_degree",
+    "test_solve_cache",
+    "test_parse",
+    "test_parse_errors",
+    "test_compile_equation",
+    "test_format_rows",
+    "test_parse_lines",
+    "test_parse_lines_chunks",
+    "test_format_roots_jsonl",
+    "test_iter_roots",
+    "test_calibrate",
+    "test_process_pool_solver",
+    "test_workspace",
+    "test_polish",
+    "test_evaluate",
+    "test_products",
+    "test_classify",
+    "test_write_rows",
+    "test_stats",
+    "test_threaded_first_call_exits",
 ]
 
 T = TypeVar("T")
@@ -66,9 +108,872 @@ def test_properties():
     assert_equal(cube_equation_2.d, -6)
 
 
+def test_mixed_degree_operations():
+    # The lower degree operand is padded with leading zeros
+    assert_equal(Polynomial(1, 2, 3) + Polynomial(1, 1), Quadratic(1, 3, 4))
+    assert_equal(Polynomial(1, 1) + Polynomial(1, 2, 3), Quadratic(1, 3, 4))
+    assert_equal(Cubic(1, 0, 0, 5) - Linear(2, 1), Cubic(1, 0, -2, 4))
+    assert_equal(Linear(2, 1) - Quartic(1, 0, 0, 0, 5),
+                 Quartic(-1, 0, 0, 2, -4))
+    assert_equal(type(Linear(1, 1) + Polynomial(1, 0, 0, 0, 0, 1)),
+                 Polynomial, "degree 5 sum")
+    assert_equal(str(Quadratic(1, 3, 2) + Linear(1, 1)), "x²+4x+3")
+
+    # Equal degrees keep the class of the left operand
+    assert_equal(type(Polynomial(1, 2) + Linear(1, 1)), Polynomial)
+    assert_equal(type(Linear(1, 2) + Polynomial(1, 1)), Linear)
+
+    # Products are with polynomials or real numbers only
+    for other in ("ab", 1j, (1, 2)):
+        assert_equal(Polynomial(1, 2).__mul__(other), NotImplemented,
+                     repr(other))
+    try:
+        Polynomial(1, 2) * "ab"
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("product with a string")
+
+
+def test_polynomial_tuple():
+    equation = Quadratic(1, -3, 2)
+    assert not hasattr(equation, "__dict__"), "instance __dict__"
+    for cls in (Polynomial, Linear, Quadratic, Cubic, Quartic):
+        assert_equal(cls.__dict__.get("__slots__"), (), cls.__name__)
+
+    # Equal coefficients are equal and hash alike, whatever the class
+    assert_equal(equation, Quadratic("x²-3x+2"))
+    assert_equal(equation, Polynomial(1, -3, 2))
+    assert_equal(hash(equation), hash(Polynomial(1, -3, 2)))
+    assert_equal(len({equation, Quadratic(1, -3, 2), Polynomial(1, -3, 2)}),
+                 1, "set of equal polynomials")
+    assert equation != Quadratic(1, -3, 3), "different coefficients"
+    assert equation != Cubic(0, 1, -3, 2), "different degrees"
+
+    # Plain sequences of the same coefficients are neither equal nor the
+    # same key
+    for other in ((1, -3, 2), [1, -3, 2]):
+        assert_equal(equation == other, False, repr(other))
+        assert_equal(equation != other, True, repr(other))
+    assert hash(equation) != hash((1, -3, 2)), "hash of the tuple"
+    assert_equal(len({equation, (1, -3, 2)}), 2, "set with a tuple")
+    assert_equal({(1, -3, 2): 1}.get(equation), None, "dict key")
+
+    assert_equal(Polynomial.from_coefficients([2, 1]), Linear(2, 1))
+    assert_equal(type(Polynomial.from_coefficients([1, 0, 0, 0, 0, 1])),
+                 Polynomial, "degree 5")
+    try:
+        Cubic(1, 2, 3)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Cubic of 3 coefficients")
+
+
+def test_polynomial_batch():
+    equations = [Quadratic(1, -3, 2), Quadratic(1, 0, -1), Quadratic(2, 0, -8)]
+    batch = PolynomialBatch([1, 1, 2], [-3, 0, 0], [2, -1, -8])
+    assert_equal((len(batch), batch.degree), (3, 2))
+    assert_equal(batch.to_equations(), equations)
+    assert PolynomialBatch.from_equations(equations).__eq__(batch).all(), \
+        "from_equations"
+
+    # Indexing gives equations for integers and batches for slices
+    assert_equal(batch[0], equations[0])
+    assert_equal(type(batch[-1]), Quadratic)
+    assert_equal(batch[1:].to_equations(), equations[1:])
+    assert_equal(batch[[2, 0]].to_equations(), equations[::-2])
+
+    # Strings match the scalar classes, integral coefficients included
+    assert_equal(str(batch), "\n".join(map(str, equations)))
+    assert_equal(str(PolynomialBatch([1.5, 2], [0, 0.25], [-2, 1])),
+                 f"{Quadratic(1.5, 0, -2)}\n{Quadratic(2, 0.25, 1)}")
+
+    # Lower degrees, constants too, are padded with leading zeros
+    mixed = PolynomialBatch.from_equations(
+        [Quadratic(1, -3, 2), Linear(2, 1), Polynomial(5)])
+    np.testing.assert_array_equal(mixed.coefficients,
+                                  [[1, 0, 0], [-3, 2, 0], [2, 1, 5]])
+    constants = PolynomialBatch.from_equations([Polynomial(5), Polynomial(-1)])
+    np.testing.assert_array_equal(constants.coefficients, [[0, 0], [5, -1]])
+    empty = PolynomialBatch.from_equations([])
+    assert_equal((len(empty), empty.coefficients.shape), (0, (2, 0)))
+
+    # Arithmetic acts on every polynomial
+    assert (batch == batch).all(), "equal batches"
+    assert_equal((batch + Linear(1, 1)).to_equations(),
+                 [eq + Linear(1, 1) for eq in equations])
+    assert_equal((batch - batch).to_equations(), [Quadratic(0, 0, 0)] * 3)
+    assert_equal((batch / 2)[2], Quadratic(1, 0, -4))
+    assert_equal((batch * np.array([1, 2, 3])).to_equations(),
+                 [eq * k for eq, k in zip(equations, (1, 2, 3))])
+    np.testing.assert_array_equal(batch(2), [0, 3, 0])
+
+    np.testing.assert_allclose([sorted_roots(r) for r in batch.solve()],
+                               [[1, 2], [-1, 1], [-2, 2]])
+
+
+def test_polynomial_batch_products():
+    batch = PolynomialBatch([1, 1, 2], [-3, 0, 0], [2, -1, -8])
+    equations = batch.to_equations()
+    factor = Linear(1, 1)
+
+    # Products with polynomials multiply like `Polynomial * Polynomial`
+    for result in (batch * factor, factor * batch):
+        assert_equal(result.degree, 3)
+        assert_equal(result.to_equations(), [eq * factor for eq in equations])
+    assert_equal((batch * batch).to_equations(),
+                 [eq * eq for eq in equations])
+    assert_equal((2 * batch).to_equations(), [eq * 2 for eq in equations])
+
+    for other in ((1, 2), "x", 1j):
+        for operation in (batch.__mul__, batch.__rmul__, batch.__truediv__,
+                          batch.__eq__, batch.__add__, batch.__sub__):
+            assert_equal(operation(other), NotImplemented, repr(other))
+    assert_equal(batch == "x", False)
+
+
+def test_repeated_resolvent_roots():
+    # Quartics whose resolvent cubic has a repeated root (h == 0)
+    quartics = [
+        [1, 0, 2, 0, 1],    # (x²+1)², no real roots
+        [1, 0, -2, 0, 1],   # (x²-1)²
+        [1, -4, 6, -4, 1],  # (x-1)⁴
+        [1, 0, 8, 0, 16],   # (x²+4)²
+    ]
+    expected = [
+        [np.nan] * 4,
+        [-1, -1, 1, 1],
+        [1, 1, 1, 1],
+        [np.nan] * 4,
+    ]
+
+    for backend in fqs.BACKENDS:
+        roots, count = fqs.quartic_roots(quartics, backend=backend,
+                                         real_only=True)
+        assert_equal(count.tolist(), [0, 4, 4, 0], backend)
+        np.testing.assert_allclose(roots, expected, atol=1e-6,
+                                   err_msg=backend)
+
+
+def test_working_dtype():
+    single = np.ones(3, dtype=np.float32)
+
+    # Python numbers and lists are solved in double precision
+    assert_equal(fqs.multi_cubic(1.0, 2.0, 3.0, 4.0).dtype, np.complex128)
+    assert_equal(fqs.multi_quartic([1.0], [2.0], [3.0], [4.0], [5.0]).dtype,
+                 np.complex128)
+
+    # float32 inputs stay in single precision, unless mixed with float64
+    assert_equal(fqs.multi_cubic(single, 2.0, 3, 4).dtype, np.complex64)
+    assert_equal(fqs.multi_cubic(single, single, single, single,
+                                 all_roots=False).dtype, np.float32)
+    assert_equal(fqs.multi_cubic(single, np.ones(3), 3, 4).dtype,
+                 np.complex128)
+
+
+def test_single_precision():
+    rng = np.random.default_rng(0)
+    quartics = rng.uniform(-1, 1, (200, 5))
+    quartics[:, 0] = 1
+    # Well separated roots, but `p + z0` cancels in single precision
+    quartics[0] = [1, -0.0772, -0.9008, 0.0343, -0.9459]
+    quartics = quartics.astype(np.float32)
+
+    expected = [np.roots(p) for p in quartics.astype(np.float64)]
+    for backend in fqs.BACKENDS:
+        roots = fqs.quartic_roots(quartics, backend=backend, dtype="float32")
+        assert_equal(roots.dtype, np.complex64, backend)
+        for found, exact in zip(roots.astype(np.complex128), expected):
+            error = np.abs(found[:, np.newaxis] - exact).min(axis=1)
+            assert (error <= 1e-5 * np.abs(found)).all(), (backend, found)
+
+
+def real_roots_of(polynomials, tol=1e-3):
+    """Sorted real roots of every polynomial by `np.roots`, padded with nan"""
+    degree = len(polynomials[0]) - 1
+    found = np.full((len(polynomials), degree), np.nan)
+    for row, p in zip(found, polynomials):
+        roots = np.roots(p)
+        real = np.sort(roots.real[np.abs(roots.imag) <= tol])
+        row[:len(real)] = real
+    return found
+
+
+def test_real_roots():
+    cases = {
+        fqs.cubic_roots: [
+            [1, 2, 3], [1, 1, 2], [2, 2, 2], [0, 0, 5], [-1, 1j, -1j],
+            [0, 2 + 1j, 2 - 1j], [3, 0.5j, -0.5j], [-4, -4, 1],
+            [0.1, 0.1, 3], [-2, -2, -2],
+        ],
+        fqs.quartic_roots: [
+            [1, 2, 3, 4], [1, 1, 2, 2], [1, 1, 1, 3], [2, 2, 2, 2],
+            [0, 0, 1j, -1j], [1, 1, 1j, -1j], [1j, -1j, 2j, -2j],
+            [1 + 1j, 1 - 1j, 1 + 1j, 1 - 1j], [-3, 0, 0, 3],
+            [-1, 2, 1 + 2j, 1 - 2j], [-4, -4, 1, 2], [0.3, 0.3, -2, 5],
+            [1, 1, -1, -1], [-2, -2, -2, 1],
+        ],
+    }
+    for solve, roots in cases.items():
+        polynomials = np.array([np.poly(r).real for r in roots])
+        expected = real_roots_of(polynomials)
+        expected_count = (~np.isnan(expected)).sum(axis=1)
+        for backend in fqs.BACKENDS:
+            found, count = solve(polynomials, backend=backend,
+                                 real_only=True)
+            assert_equal(count.tolist(), expected_count.tolist(), backend)
+            np.testing.assert_allclose(found, expected, atol=1e-3,
+                                       err_msg=backend)
+
+
+def sorted_roots(roots: np.ndarray) -> np.ndarray:
+    """Roots sorted by real, then imaginary part"""
+    return roots[np.lexsort((roots.imag.round(6), roots.real.round(6)))]
+
+
+def test_solve_batch():
+    # Rows of every degree, padded with leading zeros, and a constant row
+    coeffs = [
+        [0, 0, 0, 2, -4],
+        [0, 0, 1, -3, 2],
+        [0, 1, -6, 11, -6],
+        [1, 0, -5, 0, 4],
+        [0, 0, 0, 0, 7],
+        [2, -2, 0, 3, 5],
+    ]
+    expected_degree = [1, 2, 3, 4, 0, 4]
+
+    for workers in (None, 2):
+        roots, degree = solvers.solve_batch(coeffs, workers=workers)
+        assert_equal(roots.shape, (6, 4), f"workers={workers}")
+        assert_equal(degree.tolist(), expected_degree, f"workers={workers}")
+        for row, p, n in zip(roots, coeffs, expected_degree):
+            assert np.isnan(row[n:]).all(), (p, row)
+            if n:
+                np.testing.assert_allclose(
+                    sorted_roots(row[:n]),
+                    sorted_roots(np.roots(np.trim_zeros(p, "f"))),
+                    atol=1e-9)
+
+
+def test_solve_batch_high_degree():
+    # Degrees above four are solved iteratively, rows up to any width
+    coeffs = np.zeros((3, 200))
+    coeffs[0, -6:] = np.poly([1, 2, 3, 4, 5])
+    coeffs[1, -8:] = np.poly([-3, -2, -1, 1j, -1j, 2 + 1j, 2 - 1j]).real
+    coeffs[2, 0], coeffs[2, -1] = 1, -1
+
+    roots, degree, iterations = solvers.solve_batch(coeffs,
+                                                    return_iterations=True)
+    assert_equal(degree.tolist(), [5, 7, 199])
+    assert (iterations > 0).all(), iterations
+    np.testing.assert_allclose(sorted_roots(roots[0, :5]), [1, 2, 3, 4, 5],
+                               atol=1e-8)
+    np.testing.assert_allclose(sorted_roots(roots[1, :7]),
+                               sorted_roots(np.roots(coeffs[1, -8:])),
+                               atol=1e-8)
+    np.testing.assert_allclose(np.abs(roots[2, :199]), 1, atol=1e-10)
+    assert np.isnan(roots[:2, 7:]).all()
+
+    # Roots accurate to rounding error are accepted, not iterated to the cap
+    roots, _, iterations = solvers.solve_batch(np.poly(range(1, 11)),
+                                               return_iterations=True)
+    assert 0 < iterations[0] < aberth.MAX_ITER // 4, iterations
+    np.testing.assert_allclose(sorted_roots(roots[0]), range(1, 11),
+                               atol=1e-8)
+
+
+def test_solve_cache():
+    solvers.configure_cache(2)
+    solvers.cache_clear()
+    try:
+        first = solvers.solve(1, -3, 2)
+        # Scaled equations have the same roots and share the entry
+        np.testing.assert_array_equal(solvers.solve(2, -6, 4), first)
+        assert_equal(solvers.cache_info()[:2], (1, 1))
+
+        # The precision is part of the key
+        single = solvers.solve(1, -3, 2, dtype="float32")
+        assert_equal(solvers.cache_info()[:2], (1, 2))
+        np.testing.assert_allclose(single, first)
+
+        # The least recently used entry is evicted
+        solvers.solve(1, -3, 2)
+        solvers.solve(1, 0, -1)
+        solvers.solve(1, -3, 2, dtype="float32")
+        assert_equal(solvers.cache_info(),
+                     solvers.CacheInfo(hits=2, misses=4, evictions=2,
+                                       maxsize=2, currsize=2))
+
+        # Equations with non-finite coefficients are not cached
+        solvers.solve(1, float("nan"), 2)
+        solvers.solve(1, float("nan"), 2)
+        assert_equal(solvers.cache_info()[:2], (2, 4))
+
+        # Nor are equations with a zero leading coefficient, whose roots
+        # differ from those of a leading 1
+        assert np.isnan(solvers.solve(0, 1, 2, 3, 4)).all(), "roots of 0x⁴"
+        roots = solvers.solve(1, 1, 2, 3, 4)
+        assert np.isfinite(roots).all(), "roots of x⁴ cached as 0x⁴"
+        np.testing.assert_allclose(np.polyval([1, 1, 2, 3, 4], roots), 0,
+                                   atol=1e-9)
+        assert_equal(solvers.cache_info()[:2], (2, 5))
+
+        solvers.cache_clear()
+        assert_equal(solvers.cache_info(),
+                     solvers.CacheInfo(0, 0, 0, 2, 0))
+    finally:
+        solvers.configure_cache()
+        solvers.cache_clear()
+
+
+def test_parse():
+    # Outputs of the original per-degree regex parsers
+    original = {
+        terms.linear_coefficients: {
+            "2x+3": (2, 3),
+            "-x-7": (-1, -7),
+            "12x-4": (12, -4),
+        },
+        terms.quadratic_coefficients: {
+            "x²-3x+2": (1, -3, 2),
+            "10x²-10x+10": (10, -10, 10),
+        },
+        terms.cubic_coefficients: {
+            "2x³+3x²-11x-6": (2, 3, -11, -6),
+            "x³-7x²+4x+12": (1, -7, 4, 12),
+        },
+        terms.quartic_coefficients: {
+            "x⁴-3x³+2x²-x+5": (1, -3, 2, -1, 5),
+            "2x⁴+7x³-806x²-1050x+38322": (2, 7, -806, -1050, 38322),
+        },
+    }
+    for parse, cases in original.items():
+        for equation, expected in cases.items():
+            assert_equal(parse(equation), expected, equation)
+            assert_equal(terms.coefficients(equation), expected, equation)
+
+    # Forms the original parsers got wrong or did not accept
+    cases = {
+        "3x² - 12x + 40": (3, -12, 40),
+        "-2x²+x-1": (-2, 1, -1),
+        "-x⁴-x³+x²+x-1": (-1, -1, 1, 1, -1),
+        "x⁴-5x²+4": (1, 0, -5, 0, 4),
+        "1.5x^2 - 3x + 2": (1.5, -3, 2),
+        "2e-3x+.5": (0.002, 0.5),
+        "x¹⁰-1": (1, *[0] * 9, -1),
+        "\tx² +\t1": (1, 0, 1),
+        "-x": (-1, 0),
+    }
+    for equation, expected in cases.items():
+        assert_equal(terms.parse(equation), expected, equation)
+        assert_equal(terms.parse.__wrapped__(equation), expected, equation)
+
+    # Lower degrees are padded with leading zeros
+    assert_equal(terms.cubic_coefficients("x²-1"), (0, 1, 0, -1))
+
+
+def test_parse_errors():
+    for parse, equation in [(terms.parse, ""), (terms.parse, "2y+1"),
+                            (terms.parse, "x++1"), (terms.parse, "x²-"),
+                            (terms.quadratic_coefficients, "x³+1")]:
+        try:
+            parse(equation)
+        except ValueError:
+            continue
+        raise AssertionError(f"{equation!r} parsed")
+
+
+def test_compile_equation():
+    f = terms.compile_equation("x⁴ - 5x² + 4")
+    assert f is terms.compile_equation("x⁴-5x²+4"), "compiled again"
+    assert_equal(f.coefficients, (1, 0, -5, 0, 4), "coefficients")
+    assert_equal(f(2), 0.0, "scalar root")
+    assert_equal(f.derivative(1), -6.0, "scalar slope")
+
+    # Real and complex points against numpy's evaluation
+    x = np.linspace(-3, 3, 101)
+    z = x + 1j * x[::-1]
+    slopes = np.polyder(f.coefficients)
+    for points in (x, z, z.reshape(-1, 1)):
+        assert np.allclose(f(points), np.polyval(f.coefficients, points)), \
+            "values"
+        assert np.allclose(f.derivative(points), np.polyval(slopes, points)), \
+            "slopes"
+
+    assert_equal(float(terms.compile_equation("5").derivative(1)), 0.0,
+                 "constant slope")
+
+
+def test_format_rows():
+    rng = np.random.default_rng(0)
+    for width in range(1, 7):
+        # Small coefficients, so that zeros, ones and minus ones are common
+        ints = rng.integers(-3, 4, (300, width))
+        floats = ints * rng.choice([1, 0.5, 2.25], ints.shape)
+        for coeffs in (ints, floats):
+            expected = [str(Polynomial(*row)) for row in coeffs.tolist()]
+            assert format_rows(coeffs) == expected, (width, coeffs.dtype)
+
+    assert_equal(format_rows([[1, -3, 2], [0, 2, 0], [-1, 0, 5]]),
+                 ["x²--3x+2", "2x", "-x²+5"])
+    assert_equal(format_rows(np.empty((0, 5))), [])
+
+
+def padded(equation: str) -> list:
+    """Coefficients of `terms.coefficients` as floats, padded to
+    `ingest.WIDTH`"""
+    coeffs = terms.coefficients(equation)
+    return [0.0] * (ingest.WIDTH - len(coeffs)) + list(map(float, coeffs))
+
+
+def test_parse_lines():
+    rng = np.random.default_rng(0)
+    coeffs = rng.integers(-50, 50, (500, 5))
+    coeffs = coeffs * rng.choice([1, 0.5, 0.25], (500, 5))
+    lines = ["%gx⁴%+gx³%+gx²%+gx%+g" % tuple(row) for row in coeffs.tolist()]
+    lines += ["x⁴-5x²+4", "1.5x^2 - 3x + 2", "-2x³+x", "2e-3x+.5", "7",
+              # Left to `terms.coefficients` by the jitted scanner
+              "x²\t-\t1", "12345678901234567x+1"]
+
+    for source in (lines, ("\n".join(lines) + "\n").encode(),
+                   ("\r\n".join(lines) + "\r\n").encode(),
+                   io.StringIO("\n".join(lines))):
+        found, degree = parse_lines(source)
+        assert_equal(found.tolist(), [padded(line) for line in lines])
+        assert_equal(degree.tolist(),
+                     [len(terms.coefficients(line)) - 1 for line in lines])
+
+    # Malformed lines and degrees above four
+    lines = ["x²-1", "2y+1", "x⁵+1", "3x-3"]
+    try:
+        parse_lines(lines)
+        raise AssertionError("malformed lines parsed")
+    except ValueError as error:
+        assert_equal(str(error).split(":")[0], "Line 2")
+        assert str(error).endswith("(and 1 more lines)"), error
+
+    found, degree = parse_lines(lines, errors="coerce")
+    assert_equal(degree.tolist(), [2, -1, -1, 1])
+    assert np.isnan(found[1:3]).all()
+    assert_equal(found[[0, 3]].tolist(), [[0, 0, 1, 0, -1], [0, 0, 0, 3, -3]])
+
+
+def test_parse_lines_chunks():
+    lines = ["x²-%dx+%d" % (k, k) for k in range(20)] + ["oops", "x-1"]
+    expected = [padded(line) for line in lines[:20]] + [padded(lines[-1])]
+
+    chunk_size, chunk_lines = ingest.CHUNK_SIZE, ingest.CHUNK_LINES
+    ingest.CHUNK_SIZE, ingest.CHUNK_LINES = 16, 3
+    try:
+        for source in (iter(lines),
+                       io.BytesIO(("\n".join(lines)).encode())):
+            found, degree = parse_lines(source, errors="coerce")
+            assert_equal(degree.tolist(), [2] * 20 + [-1, 1])
+            assert_equal(np.delete(found, 20, axis=0).tolist(), expected)
+
+        # Line numbers count across chunks
+        try:
+            parse_lines(lines)
+            raise AssertionError("malformed line parsed")
+        except ValueError as error:
+            assert str(error).startswith("Line 21:"), error
+    finally:
+        ingest.CHUNK_SIZE, ingest.CHUNK_LINES = chunk_size, chunk_lines
+
+
+def strict_json(text: str):
+    """Parse `text`, rejecting the `NaN` and `Infinity` extensions"""
+    def reject(constant: str):
+        raise ValueError(f"Not JSON: {constant}")
+    return json.loads(text, parse_constant=reject)
+
+
+def test_format_roots_jsonl():
+    nan, inf = np.nan, np.inf
+    roots = np.array([[1, nan, nan, nan],
+                      [complex(nan, 1), complex(inf, 0), 2, nan],
+                      [1, 2, 3, 4]])
+    lines = format_roots(roots, np.array([1, 3, 4]), "jsonl").splitlines()
+
+    assert_equal([strict_json(line) for line in lines], [
+        {"degree": 1, "roots": [[1.0, 0.0]]},
+        {"degree": 3, "roots": [[None, 1.0], [None, 0.0], [2.0, 0.0]]},
+        {"degree": 4, "roots": [[1.0, 0.0], [2.0, 0.0], [3.0, 0.0],
+                                [4.0, 0.0]]},
+    ])
+
+
+def test_iter_roots():
+    rng = np.random.default_rng(1)
+    for iterate, solve, width in ((fqs.iter_cubic_roots, fqs.cubic_roots, 4),
+                                  (fqs.iter_quartic_roots, fqs.quartic_roots,
+                                   5)):
+        p = rng.standard_normal((1000, width))
+        expected = np.sort(solve(p), axis=1)
+
+        # Arrays are sliced, any other iterable is read in blocks
+        for rows in (p, (row for row in p.tolist())):
+            blocks = list(iterate(rows, chunk_size=300))
+            assert_equal([len(block) for block in blocks],
+                         [300, 300, 300, 100], iterate.__name__)
+            np.testing.assert_allclose(
+                np.sort(np.concatenate(blocks), axis=1), expected, rtol=1e-9)
+
+        # Solver options apply to every block
+        single = np.concatenate(list(iterate(p, chunk_size=300,
+                                             dtype=np.float32)))
+        assert_equal(single.dtype, np.dtype(np.complex64), "float32 blocks")
+        np.testing.assert_array_equal(single, solve(p, dtype=np.float32))
+        real = list(iterate(p, chunk_size=300, real_only=True))
+        expected_roots, expected_count = solve(p, real_only=True)
+        np.testing.assert_array_equal(
+            np.concatenate([count for _, count in real]), expected_count)
+        np.testing.assert_array_equal(
+            np.concatenate([roots for roots, _ in real]), expected_roots)
+
+        assert_equal(list(iterate(iter([]))), [], "empty input")
+        for rows, chunk_size in (([[1] * (width + 1)], 10), (p, 0)):
+            try:
+                list(iterate(rows, chunk_size=chunk_size))
+            except ValueError:
+                continue
+            raise AssertionError(f"{iterate.__name__} chunk {chunk_size}")
+
+
+def test_calibrate():
+    default_path = fqs.PROFILE_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        fqs.PROFILE_PATH = os.path.join(tmp, "fqs", "profile.json")
+        try:
+            # Without a profile every batch goes to the default backend
+            assert_equal(fqs.load_profile(), {})
+            assert_equal(fqs.select_backend("cubic", 10**6),
+                         fqs.DEFAULT_BACKEND)
+
+            profile = fqs.calibrate(sizes=(1, 100), dtypes=("float64",),
+                                    repeat=1)
+            with open(fqs.PROFILE_PATH) as f:
+                assert_equal(json.load(f), profile, "stored profile")
+            for kind in ("cubic", "quartic"):
+                crossovers = profile[kind]["float64"]
+                assert_equal(crossovers[0][0], 1, kind)
+                assert set(b for _, b in crossovers) <= set(fqs.BACKENDS)
+                assert_equal(fqs.select_backend(kind, 1), crossovers[0][1])
+
+            # Crossovers pick the backend of the largest size not above
+            # the batch size, uncovered kinds and types the default
+            with open(fqs.PROFILE_PATH, "w") as f:
+                json.dump({"cubic": {"float64": [[1, "single"],
+                                                 [100, "numpy"]]}}, f)
+            fqs.load_profile()
+            assert_equal(fqs.select_backend("cubic", 99), "single")
+            assert_equal(fqs.select_backend("cubic", 100), "numpy")
+            assert_equal(fqs.select_backend("cubic", 100, "float32"),
+                         fqs.DEFAULT_BACKEND)
+            assert_equal(fqs.select_backend("quartic", 100),
+                         fqs.DEFAULT_BACKEND)
+        finally:
+            fqs.PROFILE_PATH = default_path
+            fqs._profile = None
+
+
+def test_process_pool_solver():
+    rng = np.random.default_rng(2)
+    with fqs.ProcessPoolSolver(workers=2) as pool:
+        for kind, width in (("cubic", 4), ("quartic", 5)):
+            solve = getattr(pool, f"{kind}_roots")
+            assert_equal(solve(np.empty((0, width))).shape, (0, width - 1),
+                         f"empty {kind}")
+
+            # Segments grow for larger batches and are reused for smaller
+            for n, grown in ((10, True), (5000, True), (100, False)):
+                before = pool._segments[f"{kind}-in"].name
+                p = rng.standard_normal((n, width))
+                expected = getattr(fqs, f"{kind}_roots")(p, backend="numpy")
+                np.testing.assert_allclose(solve(p), expected, rtol=1e-12)
+                segment = pool._segments[f"{kind}-in"]
+                assert segment.size >= p.nbytes, f"{kind} segment size"
+                assert_equal(segment.name != before, grown, f"{kind} {n}")
+
+
+def test_workspace():
+    rng = np.random.default_rng(3)
+    workspace = fqs.Workspace(64)
+    for solver, width in ((fqs.multi_cubic, 4), (fqs.multi_quartic, 5)):
+        out = np.empty((width - 1, 64), dtype=complex)
+        first, second = rng.standard_normal((2, 64, width))
+        expected = [solver(*first.T), solver(*second.T)]
+
+        # The same buffers solve every batch, results are written to `out`
+        for p, roots in zip((first, second, first), expected + expected):
+            result = solver(*p.T, out=out, workspace=workspace)
+            assert result is out, f"{solver.__name__} out"
+            np.testing.assert_array_equal(result, roots)
+
+        # Smaller batches fit into the workspace, larger ones do not
+        smaller = np.empty((width - 1, 10), dtype=complex)
+        solver(*first[:10].T, out=smaller, workspace=workspace)
+        np.testing.assert_array_equal(smaller, expected[0][:, :10])
+        try:
+            solver(*rng.standard_normal((width, 65)), workspace=workspace)
+        except ValueError:
+            continue
+        raise AssertionError(f"{solver.__name__} of 65 equations")
+
+
+def residuals(p: np.ndarray, roots: np.ndarray) -> np.ndarray:
+    """Absolute values of the polynomials of `p` at each of their roots"""
+    return np.abs(np.stack([evaluate(p, r) for r in roots.T], axis=1))
+
+
+def test_polish():
+    # Quartics with a close pair of roots, which lose digits unpolished
+    rng = np.random.default_rng(4)
+    roots = np.stack([1 + rng.random(200) * 1e-3, 1 + rng.random(200) * 1e-3,
+                      3 * rng.standard_normal(200),
+                      3 * rng.standard_normal(200)], axis=1)
+    quartics = np.array([np.poly(r) for r in roots])
+    cubics = rng.standard_normal((200, 4))
+
+    for solver, p in ((fqs.cubic_roots, cubics),
+                      (fqs.quartic_roots, quartics)):
+        for backend in fqs.BACKENDS:
+            plain = residuals(p, solver(p, backend=backend))
+            polished = residuals(p, solver(p, backend=backend, polish=3))
+            # Steps are only taken where they reduce the residual
+            assert (polished <= plain).all(), (solver.__name__, backend)
+            assert polished.sum() < plain.sum(), (solver.__name__, backend)
+
+
+def test_evaluate():
+    rng = np.random.default_rng(5)
+    p = rng.standard_normal((50, 6))
+    x = rng.standard_normal(50)
+    z = x + 1j * rng.standard_normal(50)
+    expected = np.array([np.polyval(row, x) for row in p])
+
+    # Pairs, one point per polynomial
+    np.testing.assert_allclose(evaluate(p, x), expected.diagonal())
+    np.testing.assert_allclose(evaluate(p, z),
+                               [np.polyval(r, xi) for r, xi in zip(p, z)])
+    np.testing.assert_allclose(evaluate(p + 1j, x),
+                               [np.polyval(r + 1j, xi) for r, xi in zip(p, x)])
+
+    # Grid, every polynomial at every point
+    np.testing.assert_allclose(evaluate(p, x, grid=True), expected)
+
+    # Broadcast, one point for every polynomial or one polynomial anywhere
+    np.testing.assert_allclose(evaluate(p, 0.5), np.polyval(p.T, 0.5))
+    np.testing.assert_allclose(evaluate(p[0], x.reshape(5, 10)),
+                               np.polyval(p[0], x.reshape(5, 10)))
+    assert_equal(evaluate([1, -3, 2], 2), 0.0, "scalar")
+    np.testing.assert_allclose(Polynomial(*p[0])(z), np.polyval(p[0], z))
+    assert_equal(Quadratic(1, -3, 2)(3), 2, "Quadratic.__call__")
+
+    out = np.empty(50)
+    assert evaluate(p, x, out=out) is out, "out"
+    for args in ((p, x[:10]), (p[np.newaxis], x), ([], x)):
+        try:
+            evaluate(*args)
+        except ValueError:
+            continue
+        raise AssertionError(f"evaluate of shapes {np.shape(args[0])}")
+
+
+def test_products():
+    rng = np.random.default_rng(6)
+    threshold = products.FFT_THRESHOLD
+    for n, m in ((3, 5), (threshold - 1, 200), (threshold, threshold),
+                 (300, 257)):
+        a, b = rng.standard_normal(n), rng.standard_normal(m)
+        expected = np.convolve(a, b)
+        np.testing.assert_allclose(products.multiply(a, b), expected,
+                                   atol=1e-12 * np.abs(expected).max())
+        c = a + 1j * rng.standard_normal(n)
+        np.testing.assert_allclose(products.multiply(c, b), np.convolve(c, b),
+                                   atol=1e-12 * np.abs(expected).max())
+
+    # Integers below the threshold multiply exactly, beyond float precision
+    big = 10**20 + 1
+    assert_equal(products.multiply([big, 1], [big, -1]), [big * big, 0, -1])
+    assert_equal(products.product([[1, -1], [1, -2], [1, -3]]),
+                 [1, -6, 11, -6])
+    assert_equal(products.product([]), [1])
+
+    # Product trees of many linear factors, long products use FFT
+    roots = rng.standard_normal(100)
+    np.testing.assert_allclose(products.product([[1, -r] for r in roots]),
+                               np.poly(roots), atol=1e-9)
+    assert_equal(Linear(1, -1) * Linear(1, -2), Quadratic(1, -3, 2))
+    assert_equal(Linear(1, 1) * 2, Linear(2, 2))
+    assert_equal(product([Linear(1, -1)] * 5), Polynomial(1, -5, 10, -10, 5,
+                                                          -1))
+
+    # Coefficients beyond int64 stay exact instead of reaching the FFT
+    assert_equal(products.product([[1, -2]] * 200),
+                 [math.comb(200, k) * (-2) ** k for k in range(201)])
+    expanded = product([Linear(1, -k) for k in range(1, 130)])
+    assert_equal(expanded.degree, 129)
+    assert_equal(expanded(7), 0)
+
+    try:
+        products.multiply([], [1])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("product of an empty factor")
+
+
+def distinct_real_roots(p, digits: int = 3) -> int:
+    """Number of distinct real roots of `p` by `np.roots`, rounded"""
+    roots = np.roots(p)
+    real = roots.real[np.abs(roots.imag) < 10.0 ** -digits]
+    return len(np.unique(real.round(digits)))
+
+
+def test_classify():
+    i = 1j
+    cases = {
+        (1, 2): RootType.TWO_REAL,
+        (1, 1): RootType.DOUBLE_REAL,
+        (i, -i): RootType.COMPLEX_PAIR,
+        (1, 2, 3): RootType.THREE_REAL,
+        (1, 1, 2): RootType.DOUBLE_AND_SIMPLE_REAL,
+        (2, 2, 2): RootType.TRIPLE_REAL,
+        (1, i, -i): RootType.ONE_REAL_COMPLEX_PAIR,
+        (1, 2, 3, 4): RootType.FOUR_REAL,
+        (1, 2, i, -i): RootType.TWO_REAL_COMPLEX_PAIR,
+        (i, -i, 1 + i, 1 - i): RootType.TWO_COMPLEX_PAIRS,
+        (1, 1, 2, 3): RootType.DOUBLE_AND_TWO_REAL,
+        (1, 1, i, -i): RootType.DOUBLE_REAL_COMPLEX_PAIR,
+        (1, 1, 1, 2): RootType.TRIPLE_AND_SIMPLE_REAL,
+        (1, 1, 2, 2): RootType.TWO_DOUBLE_REAL,
+        (i, -i, i, -i): RootType.DOUBLE_COMPLEX_PAIR,
+        (-1, -1, -1, -1): RootType.QUADRUPLE_REAL,
+    }
+    for roots, root_type in cases.items():
+        p = np.poly(roots).real
+        distinct = distinct_real_roots(p)
+        count, code = classify(p)
+        assert_equal((count[0], RootType(code[0])), (distinct, root_type),
+                     f"roots {roots}")
+        assert_equal(count_real_roots(p)[0], distinct, f"Sturm {roots}")
+
+    # Sturm counts in intervals `(lo, hi]`, for any degree
+    p = np.poly([1, 2, 3, 4, 5])
+    assert_equal(count_real_roots(p, 0, 3.5).tolist(), [3])
+    assert_equal(count_real_roots([p, p], [0, 1], [2, 5]).tolist(), [2, 4])
+    rng = np.random.default_rng(7)
+    p = rng.standard_normal((100, 7))
+    assert_equal(count_real_roots(p).tolist(),
+                 [distinct_real_roots(row, 6) for row in p])
+
+
+def test_write_rows():
+    rng = np.random.default_rng(8)
+    coeffs = rng.integers(-3, 4, (20, 5)) * 0.5
+    text = "".join(line + "\n" for line in format_rows(coeffs))
+
+    # Chunks of rows are written as whole lines, to text or binary streams
+    for chunk_rows in (1, 7, 20, 64):
+        stream, binary = io.StringIO(), io.BytesIO()
+        assert_equal(write_rows(coeffs, stream, chunk_rows), 20)
+        assert_equal(write_rows(coeffs, binary, chunk_rows), 20)
+        assert_equal(stream.getvalue(), text, f"chunks of {chunk_rows}")
+        assert_equal(binary.getvalue(), text.encode(), "binary")
+
+    # Integral float coefficients written as integers
+    stream = io.StringIO()
+    write_rows([[1.0, -3.0, 2.0], [0.5, 0.0, 1.0]], stream, 1, integral=True)
+    assert_equal(stream.getvalue(), f"{Quadratic(1, -3, 2)}\n"
+                                    f"{Quadratic(0.5, 0, 1)}\n")
+
+    batch = PolynomialBatch.from_equations([Quadratic(1, -3, 2), Linear(2, 1)])
+    stream = io.StringIO()
+    assert_equal(batch.write(stream), 2)
+    assert_equal(stream.getvalue(), str(batch) + "\n")
+
+
+def test_stats():
+    rng = np.random.default_rng(9)
+    fqs.enable_stats()
+    try:
+        fqs.stats(reset=True)
+        fqs.quartic_roots(rng.standard_normal((100, 5)), backend="numpy")
+        fqs.cubic_roots(rng.standard_normal((50, 4)), backend="numpy")
+        fqs.cubic_roots(rng.standard_normal((3, 4)), backend="parallel")
+
+        recorded = fqs.stats(reset=True)
+        backends = recorded["backends"]
+        assert_equal({k: v["calls"] for k, v in backends["cubic"].items()},
+                     {"numpy": 1, "parallel": 1})
+        quartic = backends["quartic"]["numpy"]
+        assert_equal((quartic["calls"], quartic["rows"], quartic["sizes"]),
+                     (1, 100, {128: 1}))
+        assert quartic["seconds"] >= quartic["dispatch_seconds"] >= 0
+
+        # The resolvent cubics of the quartics are counted with the cubics
+        branches = recorded["branches"]
+        assert_equal(sum(branches["multi_quartic"].values()), 100)
+        assert_equal(sum(branches["multi_cubic"].values()), 150)
+        assert_equal(set(recorded["stages"]["multi_quartic"]),
+                     {"normalize", "resolvent", "quadratic"})
+
+        # Reset counters, and nothing is recorded while disabled
+        assert_equal(fqs.stats(), {"stages": {}, "branches": {},
+                                   "backends": {}})
+        fqs.enable_stats(False)
+        fqs.cubic_roots(rng.standard_normal((50, 4)), backend="numpy")
+        assert_equal(fqs.stats()["backends"], {})
+    finally:
+        fqs.enable_stats(False)
+
+
+def test_threaded_first_call_exits():
+    # Parallel kernels first called from threads, as by the command line
+    # interface, must not hang the interpreter at exit
+    src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-m", "equations", "solve", "--to", "jsonl"],
+        input="x²-3x+2\n".encode(), capture_output=True, cwd=src, timeout=120)
+    assert_equal(result.returncode, 0, result.stderr.decode())
+    assert_equal(json.loads(result.stdout)["roots"], [[1.0, 0.0], [2.0, 0.0]])
+
+
 def run_all_tests():
     test_operations()
     test_properties()
+    test_mixed_degree_operations()
+    test_polynomial_tuple()
+    test_polynomial_batch()
+    test_polynomial_batch_products()
+    test_repeated_resolvent_roots()
+    test_working_dtype()
+    test_single_precision()
+    test_real_roots()
+    test_solve_batch()
+    test_solve_batch_high_degree()
+    test_solve_cache()
+    test_parse()
+    test_parse_errors()
+    test_compile_equation()
+    test_format_rows()
+    test_parse_lines()
+    test_parse_lines_chunks()
+    test_format_roots_jsonl()
+    test_iter_roots()
+    test_calibrate()
+    test_process_pool_solver()
+    test_workspace()
+    test_polish()
+    test_evaluate()
+    test_products()
+    test_classify()
+    test_write_rows()
+    test_stats()
+    test_threaded_first_call_exits()
 
 
 if __name__ == "__main__":